@@ -1,10 +1,22 @@
 # bot.py
+import asyncio
 import logging
+import threading
 from telegram import Update
 from telegram.ext import ApplicationBuilder, ContextTypes, MessageHandler, filters, CommandHandler
-from services.stock_data import get_stock_data
-from services.analysis_engine import analyze_stock
-from services.structured_report import generate_structured_report
+from config import CONCURRENT_UPDATES, REPORT_FORMAT, WEBHOOK_ENABLED
+from services.query_pipeline import build_stock_report, REPORT_CACHE
+from services.outbound_queue import OUTBOX, reply
+from templates.engine import PARSE_MODES
+from services import nse_client, corporate_index, pdf_generator, chart_service
+from services.webhook_server import run_webhook
+from symbols.generate_symbols import pick_symbol
+from handlers.scan_handler import scan_command
+from handlers.pdf_handler import pdf_command
+from handlers.chart_handler import chart_command
+from handlers.news_handler import news_command
+from handlers.alert_handler import alert_command, alerts_command, unalert_command, alert_loop
+from handlers.watch_handler import watch_command, unwatch_command, watchlist_command, digest_loop
 
 # Configure logging
 logging.basicConfig(
@@ -18,49 +30,113 @@ TELEGRAM_BOT_TOKEN = '7844949436:AAGuSSKfIaxojLMCcoWT2gigrq7ofv06zyQ'
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle the /start command."""
-    await update.message.reply_text(
+    await reply(
+        update,
         "👋 Welcome! Send me a valid stock symbol (e.g., TCS) and I'll provide a detailed technical analysis report."
     )
 
+async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle the /stats command: report cache counters."""
+    s = REPORT_CACHE.stats()
+    q = OUTBOX.stats()
+    await reply(
+        update,
+        "📊 Report cache\n"
+        f"• Entries: {s['entries']} ({s['inflight']} in flight)\n"
+        f"• Hits: {s['hits']} | Misses: {s['misses']} | Coalesced: {s['coalesced']}\n"
+        f"• Hit rate: {s['hit_rate']}%\n\n"
+        "📤 Outbound queue\n"
+        f"• Queued: {q['queued']['interactive']} interactive | {q['queued']['alert']} alert | "
+        f"{q['queued']['broadcast']} broadcast ({q['deferred']} waiting on chat limits)\n"
+        f"• Sent: {q['sent']} | Failed: {q['failed']} | Retried: {q['retried']} "
+        f"(flood waits: {q['retry_after']})\n"
+        f"• Avg queue wait: {q['avg_wait_ms']} ms"
+    )
+
 async def handle_stock_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle incoming text messages as stock symbol queries."""
-    stock_name = update.message.text.strip().upper()
-    logger.info("Received query for stock symbol: %s", stock_name)
-
-    # Fetch OHLCV data for the requested stock
-    data = get_stock_data(stock_name)
-    # Properly check if DataFrame is empty or None
-    if data is None or data.empty:
-        await update.message.reply_text(
-            f"❌ Error: Could not fetch data for symbol '{stock_name}'. Please verify the symbol and try again."
-        )
-        return
+    text = update.message.text.strip()
+    # Accept tickers, company names and typos ("tata consultancy", "relaince");
+    # a guessed symbol is named in the chat so a wrong guess is obvious
+    stock_name, note = pick_symbol(text)
+    logger.info("Received query for stock symbol: %s (%r)", stock_name, text)
+    if note:
+        await reply(update, note)
 
-    # Analyze the fetched data (using data only)
-    try:
-        analysis = analyze_stock(data)
-    except Exception as e:
-        logger.error("Error analyzing %s: %s", stock_name, e)
-        await update.message.reply_text(
-            f"⚠️ Error analyzing '{stock_name}': {e}"
+    # Fetch, analyze and render off the event loop
+    report_text, err = await build_stock_report(stock_name)
+    if err:
+        logger.error("Error building report for %s: %s", stock_name, err)
+        await reply(
+            update,
+            f"❌ Error: {err}. Please verify the symbol and try again."
         )
         return
 
-    # Generate the structured report
-    report_text = generate_structured_report(stock_name, analysis)
-    await update.message.reply_text(report_text)
+    await reply(update, report_text, parse_mode=PARSE_MODES[REPORT_FORMAT])
+
+
+async def post_init(app) -> None:
+    """Start background tasks once the bot's event loop is running."""
+    # Rate-limited delivery for every outgoing message
+    OUTBOX.start()
+    # Check price/indicator alerts after every data refresh cycle
+    app.create_task(alert_loop(app))
+    # Daily watchlist digests
+    app.create_task(digest_loop(app))
+
+
+async def post_stop(app) -> None:
+    # Drain queued messages while the bot's HTTP client is still open
+    await OUTBOX.stop()
+
+
+async def post_shutdown(app) -> None:
+    pdf_generator.shutdown_pool()
+    chart_service.shutdown_pool()
 
 
 def main() -> None:
     # Build and run the Telegram bot application
-    app = ApplicationBuilder().token(TELEGRAM_BOT_TOKEN).build()
+    # Handle several chats at once; each query awaits its own data sources
+    app = (
+        ApplicationBuilder()
+        .token(TELEGRAM_BOT_TOKEN)
+        .concurrent_updates(CONCURRENT_UPDATES)
+        .post_init(post_init)
+        .post_stop(post_stop)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
 
     # Register handlers
     app.add_handler(CommandHandler("start", start))
+    app.add_handler(CommandHandler("stats", stats))
+    app.add_handler(CommandHandler("scan", scan_command))
+    app.add_handler(CommandHandler("pdf", pdf_command))
+    app.add_handler(CommandHandler("chart", chart_command))
+    app.add_handler(CommandHandler("news", news_command))
+    app.add_handler(CommandHandler("alert", alert_command))
+    app.add_handler(CommandHandler("alerts", alerts_command))
+    app.add_handler(CommandHandler("unalert", unalert_command))
+    app.add_handler(CommandHandler("watch", watch_command))
+    app.add_handler(CommandHandler("unwatch", unwatch_command))
+    app.add_handler(CommandHandler("watchlist", watchlist_command))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_stock_query))
 
+    # Open NSE sessions (cookies + keep-alive) before the first query needs them
+    threading.Thread(target=nse_client.warm_pool, name="nse-warm-up", daemon=True).start()
+    # Start the chart workers (matplotlib import, reusable figure) before the first /chart
+    threading.Thread(target=chart_service.warm_pool, name="chart-warm-up", daemon=True).start()
+    # Keep the market-wide corporate announcements index current
+    corporate_index.start_ingester()
+
     logger.info("✅ Bot is up and running...")
-    app.run_polling()
+    if WEBHOOK_ENABLED:
+        # Telegram pushes updates to our HTTPS endpoint instead of being polled
+        asyncio.run(run_webhook(app))
+    else:
+        app.run_polling()
 
 
 if __name__ == '__main__':
@@ -2,3 +2,113 @@ import os
 
 # Telegram Bot Token
 BOT_TOKEN = os.getenv('BOT_TOKEN', '7844949436:AAGuSSKfIaxojLMCcoWT2gigrq7ofv06zyQ')
+
+# Query pipeline: worker threads shared by all blocking data-source calls,
+# per-source timeouts (seconds) and how many updates the bot handles at once
+IO_WORKERS         = int(os.getenv('IO_WORKERS', '16'))
+OHLCV_TIMEOUT      = float(os.getenv('OHLCV_TIMEOUT', '15'))
+SOURCE_TIMEOUT     = float(os.getenv('SOURCE_TIMEOUT', '10'))
+CONCURRENT_UPDATES = int(os.getenv('CONCURRENT_UPDATES', '32'))
+
+# Local data directory (OHLCV store, caches, snapshots)
+DATA_DIR = os.getenv('DATA_DIR', 'data')
+
+# OHLCV store: history downloaded on first fetch of a symbol, and how long
+# (seconds) a stored series is served before checking yfinance for new bars
+OHLCV_HISTORY_PERIOD  = os.getenv('OHLCV_HISTORY_PERIOD', '2y')
+OHLCV_REFRESH_SECONDS = int(os.getenv('OHLCV_REFRESH_SECONDS', '900'))
+
+# Bulk universe download: tickers per yfinance request, retry attempts on
+# rate limits/empty responses, and the base backoff / pause between chunks (seconds)
+BULK_CHUNK_SIZE  = int(os.getenv('BULK_CHUNK_SIZE', '50'))
+BULK_MAX_RETRIES = int(os.getenv('BULK_MAX_RETRIES', '5'))
+BULK_BACKOFF     = float(os.getenv('BULK_BACKOFF', '2'))
+BULK_PAUSE       = float(os.getenv('BULK_PAUSE', '1'))
+
+# In-process cache of analysis results / rendered reports
+REPORT_CACHE_SIZE = int(os.getenv('REPORT_CACHE_SIZE', '512'))
+REPORT_CACHE_TTL  = int(os.getenv('REPORT_CACHE_TTL', '900'))
+
+# Format of the report sent in chat: 'text', 'markdown' (MarkdownV2) or 'html'
+REPORT_FORMAT = os.getenv('REPORT_FORMAT', 'text')
+
+# Option chain snapshots are reused for this many seconds (intraday TTL)
+OPTION_CHAIN_TTL = int(os.getenv('OPTION_CHAIN_TTL', '180'))
+
+# NSE HTTP client: warmed sessions kept in the pool, request timeout (seconds)
+# and cookie age (seconds) after which a session is re-warmed in the background
+NSE_POOL_SIZE  = int(os.getenv('NSE_POOL_SIZE', '4'))
+NSE_TIMEOUT    = float(os.getenv('NSE_TIMEOUT', '5'))
+NSE_COOKIE_TTL = int(os.getenv('NSE_COOKIE_TTL', '240'))
+
+# Market-wide corporate announcements ingestion: refresh interval (seconds)
+# and how far back the first run reaches (days)
+CORP_INGEST_INTERVAL = int(os.getenv('CORP_INGEST_INTERVAL', '900'))
+CORP_LOOKBACK_DAYS   = int(os.getenv('CORP_LOOKBACK_DAYS', '120'))
+
+# Screener crawler (update_cache.py): parallel fetches, politeness limit
+# (requests per second across all workers), HTTP timeout and run time budget
+SCREENER_WORKERS     = int(os.getenv('SCREENER_WORKERS', '4'))
+SCREENER_RATE        = float(os.getenv('SCREENER_RATE', '2'))
+SCREENER_TIMEOUT     = float(os.getenv('SCREENER_TIMEOUT', '10'))
+SCREENER_MAX_MINUTES = float(os.getenv('SCREENER_MAX_MINUTES', '60'))
+
+# Earnings cache: entries kept in memory in front of the sharded disk store
+EARNINGS_CACHE_SIZE = int(os.getenv('EARNINGS_CACHE_SIZE', '1024'))
+
+# Fundamentals snapshots: parallel fetches when prefetching a watchlist/universe
+FUNDAMENTALS_WORKERS = int(os.getenv('FUNDAMENTALS_WORKERS', '4'))
+
+# Backtests (python -m services.backtest_engine): worker processes across symbols
+BACKTEST_WORKERS = int(os.getenv('BACKTEST_WORKERS', str(os.cpu_count() or 2)))
+
+# Alerts: seconds between evaluation cycles and active alerts allowed per chat
+ALERT_INTERVAL       = int(os.getenv('ALERT_INTERVAL', '300'))
+MAX_ALERTS_PER_CHAT  = int(os.getenv('MAX_ALERTS_PER_CHAT', '50'))
+
+# Watchlists: symbols allowed per chat, and the daily digest time (server
+# local time, HH:MM)
+MAX_WATCHLIST_SIZE = int(os.getenv('MAX_WATCHLIST_SIZE', '25'))
+DIGEST_TIME        = os.getenv('DIGEST_TIME', '16:00')
+
+# Outbound Telegram messages: global and per-chat send rates (messages per
+# second), per-chat burst, group-chat rate, delivery attempts per message, and
+# how long shutdown waits for queued messages to go out
+OUTBOUND_GLOBAL_RATE  = float(os.getenv('OUTBOUND_GLOBAL_RATE', '30'))
+OUTBOUND_CHAT_RATE    = float(os.getenv('OUTBOUND_CHAT_RATE', '1'))
+OUTBOUND_CHAT_BURST   = int(os.getenv('OUTBOUND_CHAT_BURST', '3'))
+OUTBOUND_GROUP_RATE   = float(os.getenv('OUTBOUND_GROUP_RATE', str(20 / 60)))
+OUTBOUND_MAX_ATTEMPTS = int(os.getenv('OUTBOUND_MAX_ATTEMPTS', '5'))
+OUTBOUND_DRAIN_TIMEOUT = float(os.getenv('OUTBOUND_DRAIN_TIMEOUT', '10'))
+
+# Webhook mode (instead of long polling). WEBHOOK_SECRET is required and is
+# checked against Telegram's X-Telegram-Bot-Api-Secret-Token header.
+# WEBHOOK_URL is the public https URL registered with Telegram (leave empty to
+# skip registration, e.g. when replaying recorded updates locally).
+# WEBHOOK_CERT / WEBHOOK_KEY terminate TLS in-process; omit them behind a proxy.
+WEBHOOK_ENABLED         = os.getenv('WEBHOOK_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+WEBHOOK_LISTEN          = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT            = int(os.getenv('WEBHOOK_PORT', '8443'))
+WEBHOOK_PATH            = os.getenv('WEBHOOK_PATH', '/telegram')
+WEBHOOK_URL             = os.getenv('WEBHOOK_URL', '')
+WEBHOOK_SECRET          = os.getenv('WEBHOOK_SECRET', '')
+WEBHOOK_CERT            = os.getenv('WEBHOOK_CERT', '')
+WEBHOOK_KEY             = os.getenv('WEBHOOK_KEY', '')
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40'))
+
+# PDF reports (/pdf): worker processes rendering them, output directory, and
+# the TrueType fonts embedded for ₹ and other non-latin-1 text (core latin-1
+# fonts are used when these files are missing)
+PDF_WORKERS   = int(os.getenv('PDF_WORKERS', '2'))
+REPORTS_DIR   = os.getenv('REPORTS_DIR', 'reports')
+PDF_FONT      = os.getenv('PDF_FONT', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf')
+PDF_FONT_BOLD = os.getenv('PDF_FONT_BOLD', '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf')
+
+# Charts (/chart): worker processes drawing them
+CHART_WORKERS = int(os.getenv('CHART_WORKERS', '2'))
+
+# News headlines: seconds a symbol's feed is reused, parallel feed requests
+# and HTTP timeout (seconds)
+NEWS_TTL     = int(os.getenv('NEWS_TTL', '900'))
+NEWS_WORKERS = int(os.getenv('NEWS_WORKERS', '8'))
+NEWS_TIMEOUT = float(os.getenv('NEWS_TIMEOUT', '5'))
@@ -1,10 +1,17 @@
 # generate_report.py
 
-from services.analysis_engine import generate_stock_report
+import sys
+import asyncio
+
+from services.query_pipeline import get_stock_analysis
 from services.telegram_formatter import format_stock_report
 
-def generate_report(stock_name):
-    result, err = generate_stock_report(stock_name)
-    if err or result is None:
+def generate_report(stock_name, parse_mode='MarkdownV2'):
+    analysis, _, err = asyncio.run(get_stock_analysis(stock_name))
+    if err or analysis is None:
         return f"❌ Error: {err or 'Failed to generate report.'}"
-    return format_stock_report(result)
+    return format_stock_report(stock_name, analysis, parse_mode)
+
+if __name__ == "__main__":
+    # python generate_report.py TCS [MarkdownV2|HTML]
+    print(generate_report(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else 'MarkdownV2'))
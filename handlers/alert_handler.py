@@ -0,0 +1,91 @@
+# stock_bot_project/handlers/alert_handler.py
+
+import asyncio
+import logging
+
+from telegram import Update
+from telegram.ext import Application, ContextTypes
+
+from config import ALERT_INTERVAL
+from services.query_pipeline import run_blocking
+from services.outbound_queue import OUTBOX, ALERT, reply
+from services.alerts_engine import ALERT_FIELDS, get_book, parse_alert, check_alerts, describe
+from symbols.generate_symbols import resolve_symbol, did_you_mean
+
+logger = logging.getLogger(__name__)
+
+ALERT_HELP = (
+    "Usage: /alert TCS > 4200  or  /alert INFY rsi<30\n"
+    f"Fields: {', '.join(ALERT_FIELDS)} (default: price)\n"
+    "List with /alerts, remove with /unalert <id> or /unalert all"
+)
+
+async def alert_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/alert <SYMBOL> [field] <op> <value>: subscribe this chat to a one-shot alert."""
+    text = " ".join(context.args)
+    if not text:
+        await reply(update, ALERT_HELP)
+        return
+    try:
+        symbol, field, op, value = parse_alert(text)
+        # Only a sure match is stored; a guess would watch the wrong stock
+        resolved, suggestions = resolve_symbol(symbol)
+        if resolved is None:
+            raise ValueError(did_you_mean(symbol, suggestions))
+        symbol = resolved
+        alert = await run_blocking(get_book().add, update.effective_chat.id, symbol, field, op, value)
+    except ValueError as e:
+        await reply(update, f"⚠️ {e}\n\n{ALERT_HELP}")
+        return
+    await reply(update, f"🔔 Alert #{alert['id']} set: {describe(alert)}")
+
+async def alerts_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/alerts: list this chat's active alerts."""
+    alerts = get_book().for_chat(update.effective_chat.id)
+    if not alerts:
+        await reply(update, "You have no active alerts.\n\n" + ALERT_HELP)
+        return
+    lines = ["🔔 Active alerts:"] + [f"• #{a['id']}: {describe(a)}" for a in alerts]
+    await reply(update, "\n".join(lines))
+
+async def unalert_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/unalert <id> | all: remove alerts."""
+    arg = context.args[0].lower() if context.args else ""
+    if arg != "all" and not arg.lstrip("#").isdigit():
+        await reply(update, "Usage: /unalert <id> or /unalert all")
+        return
+    alert_id = None if arg == "all" else int(arg.lstrip("#"))
+    removed = await run_blocking(get_book().remove, update.effective_chat.id, alert_id)
+    await reply(
+        update,
+        f"🗑 Removed {removed} alert(s)." if removed else "No matching alert found."
+    )
+
+async def alert_loop(app: Application):
+    """
+    Evaluate every alert each ALERT_INTERVAL seconds: alerted symbols are
+    refreshed once per cycle and matched in a batch (services/alerts_engine.py).
+    """
+    while True:
+        try:
+            fired = await run_blocking(check_alerts)
+            sends = []
+            for alert in fired:
+                text = f"🔔 Alert #{alert['id']}: {describe(alert)} (now {alert['current']})"
+                sends.append(OUTBOX.submit(
+                    alert['chat_id'],
+                    lambda chat_id=alert['chat_id'], text=text: app.bot.send_message(chat_id=chat_id, text=text),
+                    ALERT,
+                ))
+            # Fired alerts are already removed from the book: report any that never reached the chat
+            results = await asyncio.gather(*sends, return_exceptions=True)
+            for alert, result in zip(fired, results):
+                if isinstance(result, Exception):
+                    logger.warning("Alert #%s for chat %s was not delivered: %s",
+                                   alert['id'], alert['chat_id'], result)
+            if fired:
+                failed = sum(isinstance(r, Exception) for r in results)
+                logger.info("Fired %d alerts (%d not delivered)", len(fired), failed)
+        except Exception:
+            logger.exception("Alert evaluation failed")
+        await asyncio.sleep(ALERT_INTERVAL)
@@ -0,0 +1,75 @@
+# stock_bot_project/handlers/chart_handler.py
+
+import logging
+
+import pandas as pd
+from telegram import Update
+from telegram.error import BadRequest
+from telegram.ext import ContextTypes
+
+from config import OHLCV_HISTORY_PERIOD, OHLCV_TIMEOUT
+from services.nse_data import get_ohlcv
+from services.query_pipeline import fetch_source, run_blocking
+from services.outbound_queue import OUTBOX, INTERACTIVE, reply
+from services.ohlcv_store import bar_id
+from services.chart_service import CHART_PERIODS, DEFAULT_PERIOD, CHART_VERSION, build_chart
+from services.file_id_cache import get_file_ids
+from symbols.generate_symbols import pick_symbol
+
+logger = logging.getLogger(__name__)
+
+CHART_HELP = f"Usage: /chart TCS [{'|'.join(CHART_PERIODS)}] (default {DEFAULT_PERIOD})"
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+async def chart_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/chart <SYMBOL> [period]: candles, EMA 21/50/200, support/resistance and volume."""
+    args = list(context.args)
+    period = DEFAULT_PERIOD
+    if args and args[-1].lower() in CHART_PERIODS:
+        period = args.pop().lower()
+    if not args:
+        await reply(update, CHART_HELP)
+        return
+    text = " ".join(args)
+    symbol, note = pick_symbol(text)
+    chat_id = update.effective_chat.id
+    if note:
+        await reply(update, note)
+
+    # Full stored history, so the EMAs are settled at the left edge of the chart
+    df = await fetch_source("ohlcv", get_ohlcv, symbol, OHLCV_HISTORY_PERIOD, timeout=OHLCV_TIMEOUT)
+    if not isinstance(df, pd.DataFrame) or df.empty:
+        await reply(update, f"❌ Error: Could not fetch data for symbol '{symbol}'")
+        return
+
+    key, version = f"{symbol}:{period}", f"{bar_id(df)}:v{CHART_VERSION}"
+    caption = f"📈 {symbol} ({period})"
+
+    # Same bar already sent: resend by file_id, no bytes go over the wire
+    file_ids = get_file_ids('chart')
+    file_id = file_ids.get(key, version)
+    if file_id:
+        try:
+            await OUTBOX.send(chat_id, lambda: update.message.reply_photo(photo=file_id, caption=caption), INTERACTIVE)
+            return
+        except BadRequest as e:
+            logger.warning("Cached chart file_id for %s rejected (%s); uploading again", key, e)
+            await run_blocking(file_ids.forget, key)
+
+    try:
+        path = await build_chart(symbol, df, period)
+        data = await run_blocking(_read, path)
+    except Exception:
+        logger.exception("Chart rendering failed for %s", symbol)
+        await reply(update, f"❌ Could not draw the chart for {symbol}.")
+        return
+
+    message = await OUTBOX.send(
+        chat_id, lambda: update.message.reply_photo(photo=data, caption=caption), INTERACTIVE
+    )
+    if message.photo:
+        # The largest size is the original upload
+        await run_blocking(file_ids.put, key, version, message.photo[-1].file_id)
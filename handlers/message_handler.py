@@ -6,9 +6,11 @@ from telegram import Update
 from telegram.ext import ContextTypes
 from telegram.constants import ChatAction
 
-from services.stock_data import get_stock_data
-from services.analysis_engine import analyze_stock
-from services.structured_report import generate_structured_report
+from config import REPORT_FORMAT
+from services.query_pipeline import build_stock_report
+from services.outbound_queue import reply
+from symbols.generate_symbols import pick_symbol
+from templates.engine import PARSE_MODES
 
 logger = logging.getLogger(__name__)
 
@@ -17,37 +19,37 @@ async def handle_stock_query(update: Update, context: ContextTypes.DEFAULT_TYPE)
     Takes incoming text as a stock symbol,
     fetches data, runs analysis, and replies with the structured report.
     """
-    symbol = update.message.text.strip().upper()
+    text = update.message.text.strip()
+    symbol, note = pick_symbol(text)
     try:
+        if note:
+            await reply(update, note)
+
         # 1) Show “typing…” indicator
         await context.bot.send_chat_action(
             chat_id=update.effective_chat.id,
             action=ChatAction.TYPING
         )
 
-        # 2) Fetch OHLCV data
-        data = get_stock_data(symbol)
+        # 2) Fetch all sources concurrently, analyze and render off the event loop
+        report, err = await build_stock_report(symbol)
 
-        # 3) Properly check for missing/empty DataFrame
-        if data is None or (hasattr(data, "empty") and data.empty):
-            await update.message.reply_text(
+        # 3) Report missing data / analysis errors
+        if err:
+            await reply(
+                update,
                 f"⚠️ No data found for symbol *{symbol}*",
                 parse_mode="Markdown"
             )
             return
 
-        # 4) Run your analysis engine
-        analysis = analyze_stock(data)
-
-        # 5) Generate the formatted report
-        report = generate_structured_report(symbol, analysis)
-
-        # 6) Send it back to the user
-        await update.message.reply_text(
+        # 4) Send it back to the user
+        await reply(
+            update,
             report,
-            parse_mode="Markdown"
+            parse_mode=PARSE_MODES[REPORT_FORMAT]
         )
 
     except Exception as e:
         logger.exception("Error in handle_stock_query")
-        await update.message.reply_text(f"❌ Error: {e}")
+        await reply(update, f"❌ Error: {e}")
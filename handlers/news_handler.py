@@ -0,0 +1,44 @@
+# stock_bot_project/handlers/news_handler.py
+
+import logging
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from config import MAX_WATCHLIST_SIZE
+from services.query_pipeline import run_blocking
+from services.outbound_queue import reply
+from services.news_sentiment import get_news_sentiments
+from services.watchlist import get_watchlists
+from symbols.generate_symbols import pick_symbol
+
+logger = logging.getLogger(__name__)
+
+NEWS_HEADLINES = 3      # per symbol
+MAX_MESSAGE_CHARS = 4000  # Telegram's limit is 4096
+
+async def news_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/news [SYMBOL ...]: latest headlines with sentiment; defaults to this chat's watchlist."""
+    notes = []
+    if context.args:
+        picked = [pick_symbol(arg) for arg in context.args]
+        symbols = [symbol for symbol, _ in picked]
+        notes = [note for _, note in picked if note]
+    else:
+        symbols = get_watchlists().for_chat(update.effective_chat.id)
+    if not symbols:
+        await reply(update, "Usage: /news TCS INFY  (or add symbols with /watch and send /news)")
+        return
+
+    # One round of parallel feed requests for every symbol
+    news = await run_blocking(get_news_sentiments, symbols[:MAX_WATCHLIST_SIZE], NEWS_HEADLINES)
+    blocks = ["\n".join(notes)] if notes else []
+    blocks += [f"📰 {symbol}\n" + ("\n".join(lines) or "No recent headlines.") for symbol, lines in news.items()]
+    # A long watchlist goes out as several messages, split between symbols
+    message = ""
+    for block in blocks:
+        if message and len(message) + len(block) + 2 > MAX_MESSAGE_CHARS:
+            await reply(update, message)
+            message = ""
+        message = f"{message}\n\n{block}" if message else block[:MAX_MESSAGE_CHARS]
+    await reply(update, message)
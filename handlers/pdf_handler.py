@@ -0,0 +1,67 @@
+# stock_bot_project/handlers/pdf_handler.py
+
+import os
+import logging
+
+from telegram import Update
+from telegram.constants import ChatAction
+from telegram.error import BadRequest
+from telegram.ext import ContextTypes
+
+from services.query_pipeline import get_stock_analysis, run_blocking
+from services.outbound_queue import OUTBOX, INTERACTIVE, reply
+from services.pdf_generator import build_pdf_report
+from services.file_id_cache import get_file_ids
+from symbols.generate_symbols import pick_symbol
+
+logger = logging.getLogger(__name__)
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+async def pdf_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/pdf <SYMBOL>: the stock report as a PDF document."""
+    if not context.args:
+        await reply(update, "Usage: /pdf TCS")
+        return
+    text = " ".join(context.args)
+    symbol, note = pick_symbol(text)
+    chat_id = update.effective_chat.id
+    if note:
+        await reply(update, note)
+
+    analysis, _, err = await get_stock_analysis(symbol)
+    if err:
+        await reply(update, f"❌ Error: {err}. Please verify the symbol and try again.")
+        return
+    as_of, last_bar = analysis['as_of'], analysis['bar_id']
+    caption = f"📘 {symbol} – Technical Snapshot ({as_of})"
+
+    # Same bar already sent: resend by file_id, no bytes go over the wire
+    file_ids = get_file_ids('pdf')
+    file_id = file_ids.get(symbol, last_bar)
+    if file_id:
+        try:
+            await OUTBOX.send(
+                chat_id, lambda: update.message.reply_document(document=file_id, caption=caption), INTERACTIVE
+            )
+            return
+        except BadRequest as e:
+            logger.warning("Cached file_id for %s rejected (%s); uploading again", symbol, e)
+            await run_blocking(file_ids.forget, symbol)
+
+    await context.bot.send_chat_action(chat_id=chat_id, action=ChatAction.UPLOAD_DOCUMENT)
+    path = await build_pdf_report(symbol, analysis)
+    if path is None:
+        await reply(update, f"❌ Could not generate the PDF report for {symbol}.")
+        return
+
+    data = await run_blocking(_read, path)
+    message = await OUTBOX.send(
+        chat_id,
+        lambda: update.message.reply_document(document=data, filename=os.path.basename(path), caption=caption),
+        INTERACTIVE,
+    )
+    if message.document:
+        await run_blocking(file_ids.put, symbol, last_bar, message.document.file_id)
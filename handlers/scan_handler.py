@@ -0,0 +1,43 @@
+# stock_bot_project/handlers/scan_handler.py
+
+import logging
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from services.query_pipeline import run_blocking
+from services.outbound_queue import reply
+from services.scanner import scan, format_scan_results
+
+logger = logging.getLogger(__name__)
+
+SCAN_HELP = (
+    "Usage: /scan rsi<30 volume_surge_pct>150 percentile_52w>90 ema_50_200_cross=golden\n"
+    "Fields: cmp, rsi, ema_21, ema_50, ema_200, dist21, dist50, dist200, "
+    "percentile_52w, fifty_two_wk_high, fifty_two_wk_low, volume_today, "
+    "volume_avg, volume_surge_pct, ema_21_50_cross, ema_50_200_cross, "
+    "candle_pattern (e.g. =bullish_engulfing), daily_structure (=hh_hl, =lh_ll, "
+    "=expansion, =contraction, =mixed)"
+)
+
+async def scan_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    /scan <filters>: evaluate filters against the precomputed universe
+    snapshot and reply with the ranked matches.
+    """
+    text = " ".join(context.args)
+    if not text:
+        await reply(update, SCAN_HELP)
+        return
+
+    try:
+        hits = await run_blocking(scan, text)
+    except ValueError as e:
+        await reply(update, f"⚠️ {e}\n\n{SCAN_HELP}")
+        return
+    except Exception as e:
+        logger.exception("Error in scan_command")
+        await reply(update, f"❌ Error: {e}")
+        return
+
+    await reply(update, format_scan_results(text, hits))
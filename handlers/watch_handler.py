@@ -0,0 +1,102 @@
+# stock_bot_project/handlers/watch_handler.py
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from telegram import Update
+from telegram.ext import Application, ContextTypes
+
+from config import DIGEST_TIME
+from services.query_pipeline import run_blocking
+from services.outbound_queue import OUTBOX, reply
+from services.watchlist import get_watchlists, build_digests
+from symbols.generate_symbols import resolve_symbol, did_you_mean
+
+logger = logging.getLogger(__name__)
+
+WATCH_HELP = (
+    "Usage: /watch TCS INFY  •  /unwatch TCS (or /unwatch all)  •  /watchlist\n"
+    f"A digest of your watchlist is sent every weekday at {DIGEST_TIME}."
+)
+
+async def watch_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/watch <SYMBOL> [SYMBOL ...]: add symbols to this chat's watchlist."""
+    if not context.args:
+        await reply(update, WATCH_HELP)
+        return
+    # Only sure matches are stored; guesses are rejected with suggestions
+    symbols, rejected = [], []
+    for arg in context.args:
+        symbol, suggestions = resolve_symbol(arg)
+        if symbol:
+            symbols.append(symbol)
+        else:
+            rejected.append(f"⚠️ {did_you_mean(arg, suggestions)}")
+    lines = rejected
+    if symbols:
+        try:
+            added = await run_blocking(get_watchlists().add, update.effective_chat.id, symbols)
+        except ValueError as e:
+            await reply(update, f"⚠️ {e}")
+            return
+        lines.append(f"👀 Watching: {', '.join(added)}" if added else "Already on your watchlist.")
+    await reply(update, "\n".join(lines))
+
+async def unwatch_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/unwatch <SYMBOL> [SYMBOL ...] | all: remove symbols from this chat's watchlist."""
+    if not context.args:
+        await reply(update, WATCH_HELP)
+        return
+    if context.args[0].lower() == "all":
+        symbols = None
+    else:
+        # Never a guess: 'hello' must not remove CELLO
+        symbols = [resolve_symbol(arg)[0] or arg.upper() for arg in context.args]
+    removed = await run_blocking(get_watchlists().remove, update.effective_chat.id, symbols)
+    await reply(
+        update,
+        f"🗑 Removed: {', '.join(removed)}" if removed else "Not on your watchlist."
+    )
+
+async def watchlist_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/watchlist: show this chat's watchlist with today's digest lines."""
+    chat_id = update.effective_chat.id
+    symbols = get_watchlists().for_chat(chat_id)
+    if not symbols:
+        await reply(update, "Your watchlist is empty.\n\n" + WATCH_HELP)
+        return
+    digests = await run_blocking(build_digests, {chat_id: symbols})
+    await reply(update, digests.get(chat_id, ", ".join(symbols)))
+
+def _next_digest(now: datetime) -> datetime:
+    """Next weekday occurrence of DIGEST_TIME after `now`."""
+    hour, minute = map(int, DIGEST_TIME.split(":"))
+    run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if run <= now:
+        run += timedelta(days=1)
+    while run.weekday() >= 5:
+        run += timedelta(days=1)
+    return run
+
+async def digest_loop(app: Application):
+    """
+    Send every chat its watchlist digest once a day. Each distinct symbol is
+    computed and rendered once per run and shared by all its subscribers.
+    """
+    while True:
+        run = _next_digest(datetime.now())
+        await asyncio.sleep((run - datetime.now()).total_seconds())
+        try:
+            subscriptions = get_watchlists().subscriptions()
+            digests = await run_blocking(build_digests, subscriptions)
+            # Fan out through the outbound queue at the allowed rate, behind interactive replies
+            sends = [
+                OUTBOX.submit(chat_id, lambda chat_id=chat_id, text=text: app.bot.send_message(chat_id=chat_id, text=text))
+                for chat_id, text in digests.items()
+            ]
+            results = await asyncio.gather(*sends, return_exceptions=True)
+            failed = sum(isinstance(r, Exception) for r in results)
+            logger.info("Sent %d watchlist digests (%d failed)", len(digests) - failed, failed)
+        except Exception:
+            logger.exception("Watchlist digest failed")
@@ -0,0 +1,210 @@
+# services/alerts_engine.py
+import os
+import re
+import json
+import bisect
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from config import DATA_DIR, MAX_ALERTS_PER_CHAT
+from services.indicator_engine import refresh_latest, FULL_HISTORY
+
+ALERTS_PATH = os.path.join(DATA_DIR, "alerts.json")
+
+# Alert field -> column of compute_panel_indicators' latest frame
+ALERT_FIELDS = {
+    'price':            'cmp',
+    'rsi':              'rsi',
+    'ema_21':           'ema_21',
+    'ema_50':           'ema_50',
+    'ema_200':          'ema_200',
+    'percentile_52w':   'percentile_52w',
+    'volume_surge_pct': 'volume_surge_pct',
+    'volume':           'volume_today',
+}
+
+# '/alert TCS > 4200', '/alert INFY rsi<30', '/alert SBIN volume_surge_pct >= 150'
+ALERT_RE = re.compile(r"^([A-Za-z0-9&\-]+)\s+(?:([A-Za-z0-9_]+)\s*)?(<=|>=|<|>)\s*(-?\d+(?:\.\d+)?)$")
+
+def parse_alert(text: str) -> tuple:
+    """
+    Parse '<SYMBOL> [field] <op> <value>' into (symbol, field, op, value).
+    Raises ValueError with a user-facing message.
+    """
+    m = ALERT_RE.match(text.strip())
+    if not m:
+        raise ValueError("Can't read that alert (expected e.g. TCS > 4200 or INFY rsi<30)")
+    symbol, field, op, value = m.groups()
+    field = (field or 'price').lower()
+    if field not in ALERT_FIELDS:
+        raise ValueError(f"Unknown field '{field}'. Use one of: {', '.join(ALERT_FIELDS)}")
+    return symbol.upper(), field, op, float(value)
+
+
+class AlertBook:
+    """
+    Persistent alert subscriptions, indexed for batched evaluation.
+
+    For every (symbol, field) and operator the thresholds are kept in a
+    sorted list of (threshold, alert id), so a new value finds all the
+    alerts it crosses with one bisect instead of checking each alert.
+    Alerts are one-shot: evaluate() removes the ones it fires.
+    """
+
+    def __init__(self, path: str = ALERTS_PATH):
+        self.path    = path
+        self.alerts  = {}    # id -> alert dict
+        self.by_chat = {}    # chat_id -> set of alert ids
+        self.index   = {}    # (symbol, field) -> {op: [(threshold, id)] sorted}
+        self.next_id = 1
+        self._lock   = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except Exception:
+            return
+        for alert in stored.get('alerts', []):
+            self._insert(alert)
+        self.next_id = max(stored.get('next_id', 1), max(self.alerts, default=0) + 1)
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({'next_id': self.next_id, 'alerts': list(self.alerts.values())}, f)
+        os.replace(tmp, self.path)
+
+    def _insert(self, alert: dict):
+        self.alerts[alert['id']] = alert
+        self.by_chat.setdefault(alert['chat_id'], set()).add(alert['id'])
+        ops = self.index.setdefault((alert['symbol'], alert['field']), {})
+        bisect.insort(ops.setdefault(alert['op'], []), (alert['value'], alert['id']))
+
+    def _forget(self, alert_id: int) -> dict:
+        """Remove an alert from the id and chat maps (not from the threshold index)."""
+        alert = self.alerts.pop(alert_id)
+        chat_ids = self.by_chat[alert['chat_id']]
+        chat_ids.discard(alert_id)
+        if not chat_ids:
+            del self.by_chat[alert['chat_id']]
+        return alert
+
+    def _prune(self, key: tuple, op: str):
+        if not self.index[key][op]:
+            del self.index[key][op]
+            if not self.index[key]:
+                del self.index[key]
+
+    def _drop(self, alert_id: int) -> dict:
+        alert = self._forget(alert_id)
+        key = (alert['symbol'], alert['field'])
+        entries = self.index[key][alert['op']]
+        entries.pop(bisect.bisect_left(entries, (alert['value'], alert_id)))
+        self._prune(key, alert['op'])
+        return alert
+
+    def add(self, chat_id: int, symbol: str, field: str, op: str, value: float) -> dict:
+        with self._lock:
+            if len(self.by_chat.get(chat_id, ())) >= MAX_ALERTS_PER_CHAT:
+                raise ValueError(f"You already have {MAX_ALERTS_PER_CHAT} alerts; remove some with /unalert")
+            alert = {
+                'id': self.next_id, 'chat_id': chat_id, 'symbol': symbol.upper(),
+                'field': field, 'op': op, 'value': float(value),
+                'created': datetime.now().isoformat(timespec='seconds'),
+            }
+            self.next_id += 1
+            self._insert(alert)
+            self._save()
+            return alert
+
+    def remove(self, chat_id: int, alert_id: int = None) -> int:
+        """Remove one of the chat's alerts (or all of them when alert_id is None)."""
+        with self._lock:
+            ids = [i for i in self.by_chat.get(chat_id, ()) if alert_id in (None, i)]
+            for i in ids:
+                self._drop(i)
+            if ids:
+                self._save()
+            return len(ids)
+
+    def for_chat(self, chat_id: int) -> list:
+        with self._lock:
+            return [self.alerts[i] for i in sorted(self.by_chat.get(chat_id, ()))]
+
+    def symbols(self) -> list:
+        with self._lock:
+            return sorted({sym for sym, _ in self.index})
+
+    def __len__(self):
+        return len(self.alerts)
+
+    @staticmethod
+    def _crossed(entries: list, op: str, value: float) -> slice:
+        """Slice of the sorted (threshold, id) entries whose condition holds for `value`."""
+        inf = float('inf')
+        if op == '>':     # threshold < value
+            return slice(0, bisect.bisect_left(entries, (value, -inf)))
+        if op == '>=':    # threshold <= value
+            return slice(0, bisect.bisect_right(entries, (value, inf)))
+        if op == '<':     # threshold > value
+            return slice(bisect.bisect_right(entries, (value, inf)), len(entries))
+        return slice(bisect.bisect_left(entries, (value, -inf)), len(entries))   # '<=': threshold >= value
+
+    def evaluate(self, latest: pd.DataFrame) -> list:
+        """
+        Fire every alert whose condition holds for the symbol's latest values
+        (compute_panel_indicators' `latest`, indexed by symbol). Each
+        (symbol, field) is looked up once; matching alerts are removed and
+        returned with the 'current' value that triggered them.
+        """
+        fired = []
+        columns = {col: latest[col].to_dict() for col in set(ALERT_FIELDS.values()) if col in latest}
+        with self._lock:
+            for (symbol, field), ops in list(self.index.items()):
+                value = columns.get(ALERT_FIELDS[field], {}).get(symbol)
+                if value is None or pd.isna(value):
+                    continue
+                value = float(value)
+                for op, entries in list(ops.items()):
+                    hit = self._crossed(entries, op, value)
+                    for _, alert_id in entries[hit]:
+                        alert = self._forget(alert_id)
+                        alert['current'] = round(value, 2)
+                        fired.append(alert)
+                    del entries[hit]
+                    self._prune((symbol, field), op)
+            if fired:
+                self._save()
+        return fired
+
+
+def check_alerts(book: 'AlertBook' = None) -> list:
+    """One evaluation cycle: refresh every alerted symbol once, then fire matches."""
+    book = book or get_book()
+    symbols = book.symbols()
+    if not symbols:
+        return []
+    latest = refresh_latest(symbols, period=FULL_HISTORY)
+    return book.evaluate(latest) if not latest.empty else []
+
+
+def describe(alert: dict) -> str:
+    return f"{alert['symbol']} {alert['field']} {alert['op']} {alert['value']:g}"
+
+
+_book = None
+_book_lock = threading.Lock()
+
+
+def get_book() -> AlertBook:
+    """The process-wide AlertBook, loaded from data/alerts.json on first use."""
+    global _book
+    with _book_lock:
+        if _book is None:
+            _book = AlertBook()
+        return _book
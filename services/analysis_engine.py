@@ -1,25 +1,67 @@
 # services/analysis_engine.py
 import numpy as np
 import pandas as pd
-from utils.indicators import calculate_rsi, calculate_ema
+from utils.indicators import calculate_rsi, ema_series
 from services.candle_patterns import detect_candlestick_pattern
-from services.price_structure import detect_price_structure
-from services.options_engine import get_option_chain
+from services.price_structure import detect_price_structure, swing_levels
+from services.options_engine import get_option_snapshot
 from services.corporate_engine import get_corporate_calendar  # new import
+from services.ohlcv_store import bar_id
 
-def analyze_stock(df: pd.DataFrame) -> dict:
+def support_resistance_zones(df: pd.DataFrame, cmp_price: float):
+    """
+    20-day support and resistance zones ([low, high] each) around `cmp_price`:
+    support spans the 20-day low to the mean low, resistance the mean high to
+    the 20-day high. A bound on the wrong side of CMP is replaced by a 3% buffer.
+    """
+    lows20   = df['low'].tail(20).astype(float)
+    highs20  = df['high'].tail(20).astype(float)
+    sup_low  = round(lows20.min(), 2)
+    sup_high = round(lows20.mean(), 2)
+    res_low  = round(highs20.mean(), 2)
+    res_high = round(highs20.max(), 2)
+    buf_low  = round(cmp_price * 0.97, 2)
+    buf_res  = round(cmp_price * 1.03, 2)
+    if sup_high >= cmp_price: sup_high = buf_low
+    if sup_low  >= cmp_price: sup_low  = buf_low
+    if res_low  <= cmp_price: res_low  = buf_res
+    if res_high <= cmp_price: res_high = buf_res
+    return sorted([sup_low, sup_high]), sorted([res_low, res_high])
+
+def _matching_state(indicators, df: pd.DataFrame, cmp_price: float):
+    """`indicators` if they are for `df`'s last bar, else None."""
+    if indicators and indicators.get('date') == f"{df.index[-1]:%Y-%m-%d}" and indicators.get('cmp') == cmp_price:
+        return indicators
+    return None
+
+def analyze_stock(df: pd.DataFrame, symbol: str = None, options: dict = None, corporate: dict = None,
+                  indicators: dict = None) -> dict:
     """
     Analyze stock DataFrame and return structured dict including:
       - CMP, RSI, EMAs
       - 52-Week High/Low & Percentile
       - Distance of CMP from each EMA
-      - Dynamic 20-day Support/Resistance
-      - Candlestick Patterns & Price Structure
+      - Dynamic 20-day Support/Resistance & nearest swing levels
+      - Candlestick Patterns & swing-pivot Price Structure
       - Volume Analysis & Surge %
       - Breakout Setup
       - EMA Crossovers (21x50 & 50x200)
-      - Option Chain: Max Call/Put OI & Max Pain Strike
+      - Option Chain: Max Call/Put OI, Max Pain Strike, PCR & OI Concentration
       - Corporate & Events Calendar: Earnings, Ex-Dividend, Shareholding
+
+    `options` (compute_option_metrics output) and `corporate` may be passed
+    in when the caller has already fetched them (see services/query_pipeline.py);
+    otherwise they are fetched here for `symbol`.
+
+    `indicators` (the symbol's IndicatorState values, see
+    services/indicator_state.py) supplies RSI, EMAs, the 52-week range,
+    volume averages, EMA crossovers and the daily swing structure/levels when
+    it is for `df`'s last bar; they then cover the full stored history
+    instead of being recomputed over `df`. When it is not passed in or is
+    for another bar, the state is synced from the store for `symbol`. Only
+    if that does not match `df` either are the values computed over `df`
+    alone, and 'history_bars' then says how many bars they cover (None when
+    they cover the full history).
     """
     try:
         # Validate & normalize input
@@ -35,23 +77,34 @@ def analyze_stock(df: pd.DataFrame) -> dict:
         if not isinstance(df.index, pd.DatetimeIndex):
             df.index = pd.to_datetime(df.index)
 
-        # Indicators
-        df['rsi_val'] = calculate_rsi(df['close'])
-        df['ema_21']  = calculate_ema(df['close'], 21)
-        df['ema_50']  = calculate_ema(df['close'], 50)
-        df['ema_200'] = calculate_ema(df['close'], 200)
-
-        # 52-Week Range & Percentile
-        high_52w = round(df['high'].rolling(252, min_periods=1).max().iloc[-1], 2)
-        low_52w  = round(df['low'].rolling(252, min_periods=1).min().iloc[-1], 2)
-
-        # Snapshot
         latest     = df.iloc[-1]
         cmp_price  = round(float(latest['close']), 2)
-        rsi_val    = round(float(latest['rsi_val']), 2)
-        ema_21     = round(float(latest['ema_21']), 2)
-        ema_50     = round(float(latest['ema_50']), 2)
-        ema_200    = round(float(latest['ema_200']), 2)
+        state = _matching_state(indicators, df, cmp_price)
+        if state is None and symbol:
+            # Not passed in or for another bar: sync the state from the full store
+            from services.nse_data import get_indicator_values
+            try:
+                state = _matching_state(get_indicator_values(symbol), df, cmp_price)
+            except Exception:
+                state = None
+
+        if state:
+            # Incrementally maintained indicator state
+            rsi_val, ema_21, ema_50, ema_200 = state['rsi'], state['ema_21'], state['ema_50'], state['ema_200']
+            high_52w, low_52w = state['fifty_two_wk_high'], state['fifty_two_wk_low']
+        else:
+            # Indicators (full EMA series, needed for the crossover checks)
+            ema21_s   = ema_series(df['close'], 21)
+            ema50_s   = ema_series(df['close'], 50)
+            ema200_s  = ema_series(df['close'], 200)
+            rsi_val   = round(float(calculate_rsi(df['close'])), 2)
+            ema_21    = round(float(ema21_s.iloc[-1]), 2)
+            ema_50    = round(float(ema50_s.iloc[-1]), 2)
+            ema_200   = round(float(ema200_s.iloc[-1]), 2)
+
+            # 52-Week Range
+            high_52w = round(df['high'].rolling(252, min_periods=1).max().iloc[-1], 2)
+            low_52w  = round(df['low'].rolling(252, min_periods=1).min().iloc[-1], 2)
 
         # 52-Week Percentile
         pct_52w = None
@@ -64,20 +117,7 @@ def analyze_stock(df: pd.DataFrame) -> dict:
         dist200 = round(abs(ema_200 - cmp_price) / cmp_price * 100, 2)
 
         # 20-Day Support & Resistance
-        lows20   = df['low'].tail(20).astype(float)
-        highs20  = df['high'].tail(20).astype(float)
-        sup_low  = round(lows20.min(), 2)
-        sup_high = round(lows20.mean(), 2)
-        res_low  = round(highs20.mean(), 2)
-        res_high = round(highs20.max(), 2)
-        buf_low  = round(cmp_price * 0.97, 2)
-        buf_res  = round(cmp_price * 1.03, 2)
-        if sup_high >= cmp_price: sup_high = buf_low
-        if sup_low  >= cmp_price: sup_low  = buf_low
-        if res_low  <= cmp_price: res_low  = buf_res
-        if res_high <= cmp_price: res_high = buf_res
-        support_zone    = sorted([sup_low, sup_high])
-        resistance_zone = sorted([res_low, res_high])
+        support_zone, resistance_zone = support_resistance_zones(df, cmp_price)
 
         # Candlestick Patterns & Price Structure
         daily_pattern  = detect_candlestick_pattern(
@@ -91,17 +131,23 @@ def analyze_stock(df: pd.DataFrame) -> dict:
             detect_candlestick_pattern(weekly_df[['open','high','low','close']].iloc[-2:])
             if len(weekly_df) >= 2 else "Not Enough Data"
         )
-        daily_structure  = detect_price_structure(df[['high','low']].iloc[-5:])
-        weekly_structure = (
-            detect_price_structure(weekly_df[['high','low']].iloc[-5:])
-            if len(weekly_df) >= 5 else "Not Enough Data"
-        )
+        weekly_structure = detect_price_structure(weekly_df[['high','low','close']])
+        if state:
+            # Pivots kept incrementally with the indicator state
+            daily_structure = state['daily_structure']
+            swings = {k: state[k] for k in ('swing_support', 'swing_resistance')}
+        else:
+            daily_structure = detect_price_structure(df[['high','low','close']])
+            swings          = swing_levels(df)
 
         # Volume Analysis
         vol_today        = int(latest['volume'])
-        vol_avg50        = int(df['volume'].rolling(50).mean().iloc[-1])
+        if state:
+            vol_avg50, vol_avg20 = int(state['vol_avg50']), state['vol_avg20']
+        else:
+            vol_avg50 = int(df['volume'].rolling(50).mean().iloc[-1])
+            vol_avg20 = df['volume'].rolling(20).mean().iloc[-1]
         volume_signal    = "High Volume" if vol_today >= vol_avg50 else "Low Volume"
-        vol_avg20        = df['volume'].rolling(20).mean().iloc[-1]
         volume_surge_pct = (
             round((vol_today - vol_avg20) / vol_avg20 * 100, 2)
             if pd.notna(vol_avg20) and vol_avg20 > 0 else None
@@ -115,51 +161,37 @@ def analyze_stock(df: pd.DataFrame) -> dict:
         # EMA Crossovers
         ema_21_50_cross  = 'None'
         ema_50_200_cross = 'None'
-        if len(df) >= 2:
-            prev, curr = df.iloc[-2], df.iloc[-1]
-            if prev['ema_21'] < prev['ema_50'] and curr['ema_21'] > curr['ema_50']:
+        if state:
+            ema_21_50_cross, ema_50_200_cross = state['ema_21_50_cross'], state['ema_50_200_cross']
+        elif len(df) >= 2:
+            e21p, e21c   = ema21_s.iloc[-2], ema21_s.iloc[-1]
+            e50p, e50c   = ema50_s.iloc[-2], ema50_s.iloc[-1]
+            e200p, e200c = ema200_s.iloc[-2], ema200_s.iloc[-1]
+            if e21p < e50p and e21c > e50c:
                 ema_21_50_cross = 'Golden Cross (21x50)'
-            elif prev['ema_21'] > prev['ema_50'] and curr['ema_21'] < curr['ema_50']:
+            elif e21p > e50p and e21c < e50c:
                 ema_21_50_cross = 'Death Cross (21x50)'
-            if prev['ema_50'] < prev['ema_200'] and curr['ema_50'] > curr['ema_200']:
+            if e50p < e200p and e50c > e200c:
                 ema_50_200_cross = 'Golden Cross (50x200)'
-            elif prev['ema_50'] > prev['ema_200'] and curr['ema_50'] < curr['ema_200']:
+            elif e50p > e200p and e50c < e200c:
                 ema_50_200_cross = 'Death Cross (50x200)'
 
-        # Option Chain: Max Call/Put OI & Max Pain Strike
-        top_call_oi_strike   = None
-        top_call_oi_interest = None
-        top_put_oi_strike    = None
-        top_put_oi_interest  = None
-        max_pain_strike      = None
-        try:
-            opt_df = get_option_chain("TCS")
-            if isinstance(opt_df, pd.DataFrame):
-                opt_df.columns = [c.lower() for c in opt_df.columns]
-                if {'strike','call_open_interest','put_open_interest'}.issubset(opt_df.columns):
-                    calls = opt_df[['strike','call_open_interest']].dropna()
-                    puts  = opt_df[['strike','put_open_interest']].dropna()
-                    mc = calls.loc[calls['call_open_interest'].idxmax()]
-                    mp = puts.loc[puts['put_open_interest'].idxmax()]
-                    top_call_oi_strike   = round(float(mc['strike']), 2)
-                    top_call_oi_interest = int(mc['call_open_interest'])
-                    top_put_oi_strike    = round(float(mp['strike']), 2)
-                    top_put_oi_interest  = int(mp['put_open_interest'])
-                    opt_df['total_oi']   = (
-                        opt_df['call_open_interest'] + opt_df['put_open_interest']
-                    )
-                    mpain = opt_df.loc[opt_df['total_oi'].idxmax()]
-                    max_pain_strike = round(float(mpain['strike']), 2)
-        except Exception:
-            pass
+        # Option Chain: Max Call/Put OI, Max Pain, PCR & OI Concentration
+        if options is None:
+            options = get_option_snapshot(symbol) if symbol else {}
 
         # Corporate & Events Calendar (New Section 6)
-        corp = get_corporate_calendar("TCS")
+        corp = corporate
+        if corp is None:
+            corp = get_corporate_calendar(symbol) if symbol else {}
         earnings_date        = corp.get('earnings_date', 'N/A')
         ex_dividend_date     = corp.get('ex_dividend_date', 'N/A')
         shareholding_changes = corp.get('shareholding_changes', 'N/A')
 
         return {
+            'as_of': f"{df.index[-1]:%Y-%m-%d}",
+            'bar_id': bar_id(df),
+            'history_bars': None if state else len(df),
             'cmp': cmp_price,
             'rsi': rsi_val,
             'ema_21': ema_21,
@@ -173,6 +205,8 @@ def analyze_stock(df: pd.DataFrame) -> dict:
             'percentile_52w': pct_52w,
             'support_zone': support_zone,
             'resistance_zone': resistance_zone,
+            'swing_support': swings['swing_support'],
+            'swing_resistance': swings['swing_resistance'],
             'daily_pattern': daily_pattern,
             'weekly_pattern': weekly_pattern,
             'daily_structure': daily_structure,
@@ -185,11 +219,14 @@ def analyze_stock(df: pd.DataFrame) -> dict:
             'breakout_volume': breakout_volume,
             'ema_21_50_cross': ema_21_50_cross,
             'ema_50_200_cross': ema_50_200_cross,
-            'top_call_oi_strike': top_call_oi_strike,
-            'top_call_oi_interest': top_call_oi_interest,
-            'top_put_oi_strike': top_put_oi_strike,
-            'top_put_oi_interest': top_put_oi_interest,
-            'max_pain_strike': max_pain_strike,
+            'top_call_oi_strike': options.get('top_call_oi_strike'),
+            'top_call_oi_interest': options.get('top_call_oi_interest'),
+            'top_put_oi_strike': options.get('top_put_oi_strike'),
+            'top_put_oi_interest': options.get('top_put_oi_interest'),
+            'max_pain_strike': options.get('max_pain_strike'),
+            'option_expiry': options.get('expiry'),
+            'pcr': options.get('pcr'),
+            'oi_concentration': options.get('oi_concentration'),
             'earnings_date': earnings_date,
             'ex_dividend_date': ex_dividend_date,
             'shareholding_changes': shareholding_changes
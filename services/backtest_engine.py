@@ -0,0 +1,226 @@
+# services/backtest_engine.py
+import os
+import json
+import threading
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from config import DATA_DIR, BACKTEST_WORKERS
+from services import ohlcv_store
+from utils.indicators import ema_series
+
+SUMMARY_PATH = os.path.join(DATA_DIR, "backtest_summary.json")
+
+HORIZONS = (5, 10, 20)       # forward returns, in trading days
+HOLD     = max(HORIZONS)     # drawdown window after entry
+MIN_BARS = 60                # need the 50-day volume average and a few signals
+
+# Signal name -> direction (+1 long, -1 short) used for hit rate and drawdown
+SIGNALS = {
+    'breakout':      1,
+    'golden_21_50':  1,
+    'death_21_50':  -1,
+    'golden_50_200': 1,
+    'death_50_200': -1,
+}
+
+_summary = None
+_summary_mtime = None
+_summary_lock = threading.Lock()
+
+
+def signal_masks(df) -> dict:
+    """
+    Boolean entry mask per signal for every bar, with analyze_stock's rules:
+      - breakout: close above the breakout_level of the previous bar
+        (10-day high × 1.003) on volume above its breakout_volume
+        (1.2 × 50-day average); only the first day of a run counts
+      - EMA 21×50 / 50×200 golden and death crosses (ewm, adjust=False)
+    """
+    close, high, volume = df['close'], df['high'], df['volume']
+    level     = high.rolling(10).max().shift(1) * 1.003
+    vol_level = volume.rolling(50).mean().shift(1) * 1.2
+    triggered = ((close > level) & (volume > vol_level)).to_numpy()
+    breakout  = triggered.copy()
+    breakout[1:] = triggered[1:] & ~triggered[:-1]
+
+    masks = {'breakout': breakout}
+    ema = {n: ema_series(close, n).to_numpy() for n in (21, 50, 200)}
+    for fast, slow in ((21, 50), (50, 200)):
+        f, s = ema[fast], ema[slow]
+        golden = np.zeros(len(df), dtype=bool)
+        death  = np.zeros(len(df), dtype=bool)
+        golden[1:] = (f[:-1] < s[:-1]) & (f[1:] > s[1:])
+        death[1:]  = (f[:-1] > s[:-1]) & (f[1:] < s[1:])
+        masks[f'golden_{fast}_{slow}'] = golden
+        masks[f'death_{fast}_{slow}']  = death
+    return masks
+
+
+def forward_outcomes(df) -> dict:
+    """
+    Per-bar outcomes of entering at the close, all as fractions:
+      - ret_<h>: close h bars later / close - 1 (NaN past the end of history)
+      - low / high: worst low / best high over the next HOLD bars relative
+        to the close, for long and short drawdowns
+    """
+    close = df['close'].to_numpy(dtype=float)
+    n = len(close)
+    out = {}
+    for h in HORIZONS:
+        ret = np.full(n, np.nan)
+        ret[:n - h] = close[h:] / close[:n - h] - 1
+        out[f'ret_{h}'] = ret
+
+    future_low  = np.full(n, np.nan)
+    future_high = np.full(n, np.nan)
+    if n > HOLD:
+        lows  = sliding_window_view(df['low'].to_numpy(dtype=float)[1:], HOLD)
+        highs = sliding_window_view(df['high'].to_numpy(dtype=float)[1:], HOLD)
+        future_low[:len(lows)]   = lows.min(axis=1) / close[:len(lows)] - 1
+        future_high[:len(highs)] = highs.max(axis=1) / close[:len(highs)] - 1
+    out['low'], out['high'] = future_low, future_high
+    return out
+
+
+def backtest_symbol(symbol: str) -> dict:
+    """
+    Every historical trade of every signal for one stored symbol.
+
+    Returns:
+        dict: {signal: {'ret_5': array, ..., 'drawdown': array}} with one
+        entry per trade; returns are signed by the signal's direction and
+        drawdown is the worst adverse move within HOLD bars (<= 0).
+    """
+    df = ohlcv_store.load(symbol)
+    if len(df) < MIN_BARS:
+        return {}
+    outcomes = forward_outcomes(df)
+    trades = {}
+    for name, mask in signal_masks(df).items():
+        direction = SIGNALS[name]
+        t = {f'ret_{h}': direction * outcomes[f'ret_{h}'][mask] for h in HORIZONS}
+        adverse = outcomes['low'][mask] if direction > 0 else -outcomes['high'][mask]
+        t['drawdown'] = np.minimum(adverse, 0.0)
+        trades[name] = t
+    return trades
+
+
+def summarize(trades: list) -> dict:
+    """Hit rate, forward returns and drawdown (in %) over a list of trade dicts."""
+    if not trades:
+        return {'trades': 0}
+    merged = {k: np.concatenate([t[k] for t in trades]) for k in trades[0]}
+    count = len(merged['drawdown'])
+    if not count:
+        return {'trades': 0}
+
+    def pct(x):
+        return round(float(x) * 100, 2) if np.isfinite(x) else None
+
+    stats = {'trades': count}
+    for h in HORIZONS:
+        ret = merged[f'ret_{h}']
+        ret = ret[~np.isnan(ret)]
+        stats[f'hit_rate_{h}'] = pct(np.mean(ret > 0)) if len(ret) else None
+        stats[f'avg_ret_{h}']  = pct(ret.mean()) if len(ret) else None
+    ret = merged[f'ret_{HOLD}']
+    ret = ret[~np.isnan(ret)]
+    stats[f'median_ret_{HOLD}'] = pct(np.median(ret)) if len(ret) else None
+    dd = merged['drawdown']
+    dd = dd[~np.isnan(dd)]
+    stats['avg_drawdown']   = pct(dd.mean()) if len(dd) else None
+    stats['worst_drawdown'] = pct(dd.min()) if len(dd) else None
+    return stats
+
+
+def _run_one(symbol):
+    try:
+        return symbol, backtest_symbol(symbol)
+    except Exception as e:
+        print(f"⚠️ Backtest failed for {symbol}: {e}")
+        return symbol, {}
+
+
+def run_backtest(symbols: list = None, workers: int = BACKTEST_WORKERS) -> dict:
+    """
+    Backtest every signal over the full stored history of `symbols`
+    (default: the whole OHLCV store) across a process pool, and save the
+    per-symbol and universe-wide summary to data/backtest_summary.json.
+    """
+    if symbols is None:
+        symbols = ohlcv_store.stored_symbols()
+
+    per_symbol, pooled = {}, {name: [] for name in SIGNALS}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for sym, trades in pool.map(_run_one, symbols, chunksize=16):
+            if not trades:
+                continue
+            per_symbol[sym] = {name: summarize([t]) for name, t in trades.items()}
+            for name, t in trades.items():
+                pooled[name].append(t)
+
+    summary = {
+        'generated': date.today().isoformat(),
+        'horizons':  list(HORIZONS),
+        'universe':  {name: summarize(trades) for name, trades in pooled.items()},
+        'symbols':   per_symbol,
+    }
+    os.makedirs(DATA_DIR, exist_ok=True)
+    tmp = SUMMARY_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(summary, f)
+    os.replace(tmp, SUMMARY_PATH)
+    return summary
+
+
+def load_summary() -> dict:
+    """The saved backtest summary ({} if none), re-read only when the file changes."""
+    global _summary, _summary_mtime
+    with _summary_lock:
+        try:
+            mtime = os.path.getmtime(SUMMARY_PATH)
+        except OSError:
+            return {}
+        if mtime != _summary_mtime:
+            with open(SUMMARY_PATH, "r", encoding="utf-8") as f:
+                _summary = json.load(f)
+            _summary_mtime = mtime
+        return _summary
+
+
+def get_edge(symbol: str, signal: str = 'breakout') -> dict:
+    """
+    Historical stats of `signal` for `symbol` and for the whole universe.
+
+    Returns:
+        dict: {'symbol': stats or None, 'universe': stats or None}
+    """
+    summary = load_summary()
+    return {
+        'symbol':   summary.get('symbols', {}).get(symbol.upper(), {}).get(signal),
+        'universe': summary.get('universe', {}).get(signal),
+    }
+
+
+def format_edge(stats: dict) -> str:
+    """One-line edge summary, e.g. '58.3% hit · avg +2.1% · avg DD -3.4% (n=36)'."""
+    if not stats or not stats.get('trades'):
+        return "N/A"
+    hit, avg, dd = stats.get(f'hit_rate_{HOLD}'), stats.get(f'avg_ret_{HOLD}'), stats.get('avg_drawdown')
+    if hit is None or avg is None:
+        return f"N/A (n={stats['trades']})"
+    dd_text = "n/a" if dd is None else f"{dd}%"
+    return f"{hit}% hit · avg {avg:+.2f}% · avg DD {dd_text} (n={stats['trades']})"
+
+
+if __name__ == "__main__":
+    import time
+    start = time.time()
+    result = run_backtest()
+    print(f"✅ Backtested {len(result['symbols'])} symbols in {time.time() - start:.0f}s")
+    for name, stats in result['universe'].items():
+        print(f"  • {name:<14} {format_edge(stats)}")
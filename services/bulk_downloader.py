@@ -0,0 +1,145 @@
+# services/bulk_downloader.py
+import os
+import json
+import time
+import random
+from datetime import date
+
+import yfinance as yf
+import pandas as pd
+
+from config import (DATA_DIR, OHLCV_HISTORY_PERIOD, BULK_CHUNK_SIZE,
+                    BULK_MAX_RETRIES, BULK_BACKOFF, BULK_PAUSE)
+from services import ohlcv_store
+from services.indicator_state import sync_state
+from services.nse_data import to_yf_symbol, normalize_ohlcv
+
+SYMBOLS_FILE    = os.path.join("symbols", "nse_symbols.json")
+CHECKPOINT_PATH = os.path.join(DATA_DIR, "bulk_checkpoint.json")
+
+
+def load_universe() -> list:
+    """All NSE symbols from symbols/nse_symbols.json ({symbol: company name})."""
+    with open(SYMBOLS_FILE, "r", encoding="utf-8") as f:
+        return sorted(json.load(f).keys())
+
+
+def split_frames(raw: pd.DataFrame, symbols: list) -> dict:
+    """
+    Split a multi-ticker yf.download(group_by='ticker') frame into
+    {symbol: normalized OHLCV frame}, in the same format get_ohlcv returns.
+    Symbols with no usable rows are left out.
+    """
+    frames = {}
+    if raw is None or raw.empty:
+        return frames
+    tickers = set(raw.columns.get_level_values(0)) if isinstance(raw.columns, pd.MultiIndex) else set()
+    for sym in symbols:
+        yf_symbol = to_yf_symbol(sym)
+        if yf_symbol not in tickers:
+            continue
+        df = normalize_ohlcv(raw[yf_symbol].copy())
+        if not df.empty:
+            frames[sym] = df
+    return frames
+
+
+def _download_chunk(symbols: list, **kwargs) -> dict:
+    """
+    Download one chunk of tickers in a single request, retrying with
+    exponential backoff (plus jitter) on rate limits and empty responses.
+    """
+    tickers = [to_yf_symbol(s) for s in symbols]
+    for attempt in range(BULK_MAX_RETRIES):
+        try:
+            raw = yf.download(
+                tickers,
+                interval="1d",
+                group_by="ticker",
+                auto_adjust=False,
+                threads=True,
+                progress=False,
+                **kwargs
+            )
+            frames = split_frames(raw, symbols)
+            if frames:
+                return frames
+            reason = "empty response"
+        except Exception as e:
+            reason = str(e)
+        wait = BULK_BACKOFF * (2 ** attempt) + random.uniform(0, 1)
+        print(f"⚠️ Chunk {symbols[0]}..{symbols[-1]} failed ({reason}), retrying in {wait:.1f}s")
+        time.sleep(wait)
+    print(f"❌ Giving up on chunk {symbols[0]}..{symbols[-1]}")
+    return {}
+
+
+def _load_checkpoint() -> set:
+    """Symbols already done in today's run (a checkpoint from an earlier day is ignored)."""
+    try:
+        with open(CHECKPOINT_PATH, "r", encoding="utf-8") as f:
+            cp = json.load(f)
+        if cp.get("date") == date.today().isoformat():
+            return set(cp.get("done", []))
+    except Exception:
+        pass
+    return set()
+
+
+def _save_checkpoint(done: set) -> None:
+    os.makedirs(DATA_DIR, exist_ok=True)
+    tmp = CHECKPOINT_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"date": date.today().isoformat(), "done": sorted(done)}, f)
+    os.replace(tmp, CHECKPOINT_PATH)
+
+
+def bulk_download(symbols: list = None, chunk_size: int = BULK_CHUNK_SIZE, resume: bool = True) -> dict:
+    """
+    Fetch daily OHLCV for many symbols, `chunk_size` tickers per request,
+    and append the bars to the local OHLCV store.
+
+    Symbols with stored history only fetch bars from the oldest last-stored
+    date in their chunk; new symbols get OHLCV_HISTORY_PERIOD of history.
+    Progress is checkpointed after every chunk so an interrupted run resumes
+    where it stopped (same day only).
+
+    Returns:
+        dict: {symbol: stored OHLCV DataFrame} for every symbol fetched in this run.
+    """
+    symbols = [s.upper() for s in (symbols or load_universe())]
+    done = _load_checkpoint() if resume else set()
+    pending = [s for s in symbols if s not in done]
+    print(f"📦 {len(pending)} symbols to fetch ({len(done)} already done)")
+
+    results = {}
+    for i in range(0, len(pending), chunk_size):
+        chunk = pending[i:i + chunk_size]
+        last_dates = [ohlcv_store.last_date(s) for s in chunk]
+        if all(d is not None for d in last_dates):
+            frames = _download_chunk(chunk, start=min(last_dates).strftime('%Y-%m-%d'))
+        else:
+            frames = _download_chunk(chunk, period=OHLCV_HISTORY_PERIOD)
+
+        for sym, df in frames.items():
+            with ohlcv_store.symbol_lock(sym):
+                results[sym] = ohlcv_store.append(sym, df)
+                sync_state(sym, results[sym])
+
+        # Only symbols that came back are done; the rest of the chunk (or a
+        # chunk that failed outright) is retried on the next (resumed) run
+        if frames:
+            done.update(frames)
+            _save_checkpoint(done)
+        print(f"✅ {min(i + chunk_size, len(pending))}/{len(pending)} symbols")
+        time.sleep(BULK_PAUSE)
+
+    # Finished: next run starts from scratch
+    if done.issuperset(symbols) and os.path.exists(CHECKPOINT_PATH):
+        os.remove(CHECKPOINT_PATH)
+    return results
+
+
+if __name__ == "__main__":
+    fetched = bulk_download()
+    print(f"\n✅ OHLCV store warmed for {len(fetched)} symbols")
@@ -1,81 +1,106 @@
+# services/candle_patterns.py
+import numpy as np
+import pandas as pd
+
+# Pattern names in precedence order: when several match on the same bar the
+# first one wins, exactly as in the original if-chain.
+PATTERNS = [
+    "Doji",
+    "Spinning Top",
+    "Hammer",
+    "Shooting Star",
+    "Hanging Man",
+    "Inverted Hammer",
+    "Bearish Engulfing",
+    "Bullish Engulfing",
+    "Dark Cloud Cover",
+    "Piercing Line",
+    "Bearish Harami",
+    "Bullish Harami",
+]
+
+
+def _previous(a: np.ndarray) -> np.ndarray:
+    """`a` shifted one bar forward along the time axis; the first bar has no previous."""
+    prev = np.empty_like(a)
+    prev[0] = np.nan
+    prev[1:] = a[:-1]
+    return prev
+
+
+def candle_pattern_masks(open_, high, low, close) -> tuple:
+    """
+    Boolean mask of every pattern for every bar, in one NumPy pass.
+
+    Inputs are arrays with time on axis 0: one symbol's history (n,) or a
+    dates × symbols panel (n, k). Each bar is compared with the bar before it.
+
+    Returns:
+        (masks, neutral):
+          - masks:   {pattern: bool array}, not mutually exclusive
+          - neutral: bars where either candle has zero range (never labelled)
+    """
+    o, h, l, c = (np.asarray(x, dtype=float) for x in (open_, high, low, close))
+    po, ph, pl, pc = _previous(o), _previous(h), _previous(l), _previous(c)
+
+    body       = np.abs(c - o)
+    curr_range = h - l
+    prev_range = ph - pl
+    upper      = h - np.maximum(c, o)
+    lower      = np.minimum(c, o) - l
+    bullish, bearish           = c > o, o > c
+    prev_bullish, prev_bearish = pc > po, po > pc
+
+    neutral = (curr_range == 0) | (prev_range == 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        body_ratio = body / curr_range
+
+    masks = {
+        "Doji":              body_ratio < 0.1,
+        "Spinning Top":      (body_ratio < 0.3) & (upper > body) & (lower > body),
+        "Hammer":            (lower > 2 * body) & (upper < 0.3 * body) & bullish,
+        "Shooting Star":     (upper > 2 * body) & (lower < 0.3 * body) & bearish,
+        "Hanging Man":       bearish & (lower > 2 * body),
+        "Inverted Hammer":   bullish & (upper > 2 * body),
+        "Bearish Engulfing": bearish & prev_bullish & (o > pc) & (c < po),
+        "Bullish Engulfing": bullish & prev_bearish & (o < pc) & (c > po),
+        "Dark Cloud Cover":  bearish & prev_bullish & (o > pc) & (c < (po + pc) / 2),
+        "Piercing Line":     bullish & prev_bearish & (c > (po + pc) / 2) & (o < pc),
+        "Bearish Harami":    prev_bullish & bearish & (o < pc) & (c > po),
+        "Bullish Harami":    prev_bearish & bullish & (o > pc) & (c < po),
+    }
+    return masks, neutral
+
+
+def label_candles(open_, high, low, close) -> np.ndarray:
+    """
+    Pattern label for every bar (same shape as the inputs), with the same
+    thresholds and precedence as detect_candlestick_pattern. The first bar
+    is "Not Enough Data".
+    """
+    masks, neutral = candle_pattern_masks(open_, high, low, close)
+    labels = np.select(
+        [neutral] + [masks[p] for p in PATTERNS],
+        ["Neutral"] + PATTERNS,
+        default="Neutral",
+    ).astype(object)
+    if len(labels):
+        labels[0] = "Not Enough Data"
+    return labels
+
+
+def detect_candlestick_patterns(df: pd.DataFrame) -> pd.Series:
+    """Pattern label for every bar of an OHLC DataFrame, indexed like `df`."""
+    labels = label_candles(df['open'], df['high'], df['low'], df['close'])
+    return pd.Series(labels, index=df.index, name='pattern')
+
+
 def detect_candlestick_pattern(df):
+    """Pattern of the last bar of `df` (compared with the bar before it)."""
     try:
         if df.shape[0] < 2:
             return "Not Enough Data"
-
-        prev = df.iloc[-2]
-        curr = df.iloc[-1]
-
-        def body(candle):
-            return abs(candle['close'] - candle['open'])
-
-        def is_bullish(candle):
-            return candle['close'] > candle['open']
-
-        def is_bearish(candle):
-            return candle['open'] > candle['close']
-
-        def upper_shadow(candle):
-            return candle['high'] - max(candle['close'], candle['open'])
-
-        def lower_shadow(candle):
-            return min(candle['close'], candle['open']) - candle['low']
-
-        curr_body = body(curr)
-        prev_body = body(prev)
-        curr_range = curr['high'] - curr['low']
-        prev_range = prev['high'] - prev['low']
-
-        # Avoid divide by zero
-        if curr_range == 0 or prev_range == 0:
-            return "Neutral"
-
-        # --- Single Candle Patterns ---
-        if curr_body / curr_range < 0.1:
-            return "Doji"
-
-        if curr_body / curr_range < 0.3 and upper_shadow(curr) > curr_body and lower_shadow(curr) > curr_body:
-            return "Spinning Top"
-
-        if lower_shadow(curr) > 2 * curr_body and upper_shadow(curr) < 0.3 * curr_body and is_bullish(curr):
-            return "Hammer"
-
-        if upper_shadow(curr) > 2 * curr_body and lower_shadow(curr) < 0.3 * curr_body and is_bearish(curr):
-            return "Shooting Star"
-
-        if is_bearish(curr) and lower_shadow(curr) > 2 * curr_body:
-            return "Hanging Man"
-
-        if is_bullish(curr) and upper_shadow(curr) > 2 * curr_body:
-            return "Inverted Hammer"
-
-        # --- Two Candle Patterns ---
-        if is_bearish(curr) and is_bullish(prev):
-            if curr['open'] > prev['close'] and curr['close'] < prev['open']:
-                return "Bearish Engulfing"
-
-        if is_bullish(curr) and is_bearish(prev):
-            if curr['open'] < prev['close'] and curr['close'] > prev['open']:
-                return "Bullish Engulfing"
-
-        if is_bearish(curr) and is_bullish(prev):
-            if curr['open'] > prev['close'] and curr['close'] < (prev['open'] + prev['close']) / 2:
-                return "Dark Cloud Cover"
-
-        if is_bullish(curr) and is_bearish(prev):
-            if curr['close'] > (prev['open'] + prev['close']) / 2 and curr['open'] < prev['close']:
-                return "Piercing Line"
-
-        # Harami
-        if is_bullish(prev) and is_bearish(curr):
-            if curr['open'] < prev['close'] and curr['close'] > prev['open']:
-                return "Bearish Harami"
-
-        if is_bearish(prev) and is_bullish(curr):
-            if curr['open'] > prev['close'] and curr['close'] < prev['open']:
-                return "Bullish Harami"
-
-        return "Neutral"
+        return detect_candlestick_patterns(df.iloc[-2:]).iloc[-1]
 
     except:
         return "Not Available"
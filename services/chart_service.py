@@ -0,0 +1,187 @@
+# services/chart_service.py
+import os
+import re
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_DIR, REPORT_CACHE_SIZE, CHART_WORKERS
+from services.result_cache import ResultCache
+from services.ohlcv_store import bar_id
+
+CHART_DIR     = os.path.join(DATA_DIR, "charts")
+CHART_VERSION = 1          # bump when the drawing changes; part of every cache key
+EMA_PERIODS   = (21, 50, 200)
+EMA_COLORS    = {21: '#1f77b4', 50: '#ff7f0e', 200: '#9467bd'}
+UP_COLOR      = '#26a69a'
+DOWN_COLOR    = '#ef5350'
+FIGSIZE       = (10, 6)
+DPI           = 100
+
+# Bars shown per period (trading days)
+CHART_PERIODS  = {'1m': 21, '3m': 63, '6m': 126, '1y': 252, '2y': 504}
+DEFAULT_PERIOD = '6m'
+
+CHART_FILE_RE = re.compile(r"\d{8}-[0-9a-f]{8}_\w+_v\d+\.png")
+
+
+def chart_path(symbol: str, last_bar: str, period: str) -> str:
+    return os.path.join(CHART_DIR, f"{symbol.upper()}_{last_bar}_{period}_v{CHART_VERSION}.png")
+
+
+# ── drawing (runs in the chart worker processes) ───────────────────────
+_figure = None   # (fig, price axes, volume axes), reused by every render in this process
+
+
+def init_worker():
+    """Pool initializer: import matplotlib headless and build the figure once per process."""
+    global _figure
+    if _figure is None:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        fig, (ax_price, ax_vol) = plt.subplots(
+            2, 1, figsize=FIGSIZE, dpi=DPI, sharex=True,
+            gridspec_kw={'height_ratios': [3, 1], 'hspace': 0.05},
+        )
+        # Fixed margins: no tight-bbox pass (a second full draw) on save
+        fig.subplots_adjust(left=0.07, right=0.96, top=0.94, bottom=0.07)
+        _figure = (fig, ax_price, ax_vol)
+    return _figure
+
+
+def render_chart(symbol: str, df: pd.DataFrame, period: str, path: str) -> str:
+    """
+    Draw candles, EMA 21/50/200, the 20-day support/resistance zones and
+    volume for the last CHART_PERIODS[period] bars of `df` to `path` (PNG).
+    EMAs are computed over the whole of `df` so they are settled at the left
+    edge. Returns the path.
+    """
+    from services.analysis_engine import support_resistance_zones
+    from utils.indicators import ema_series
+
+    fig, ax_price, ax_vol = init_worker()
+    ax_price.cla()
+    ax_vol.cla()
+
+    bars = CHART_PERIODS[period]
+    emas = {p: ema_series(df['close'], p).to_numpy()[-bars:] for p in EMA_PERIODS}
+    view = df.iloc[-bars:]
+    o, h, l, c, v = (view[f].to_numpy(dtype='f8') for f in ('open', 'high', 'low', 'close', 'volume'))
+    x = np.arange(len(view))
+    colors = np.where(c >= o, UP_COLOR, DOWN_COLOR)
+
+    # Candles and volume as line collections (one artist each, not one patch
+    # per bar); a body is a thick line ~70% of the bar spacing wide
+    body_width = max(1.0, 0.7 * FIGSIZE[0] * 0.91 * 72 / len(view))
+    ax_price.vlines(x, l, h, colors=colors, linewidth=0.8)
+    ax_price.vlines(x, np.minimum(o, c), np.maximum(np.maximum(o, c), np.minimum(o, c) + 1e-9),
+                    colors=colors, linewidth=body_width)
+    for p, values in emas.items():
+        ax_price.plot(x, values, color=EMA_COLORS[p], linewidth=1.1, label=f"EMA {p}")
+
+    support, resistance = support_resistance_zones(df, float(df['close'].iloc[-1]))
+    ax_price.axhspan(support[0], support[1], color=UP_COLOR, alpha=0.12, label="Support zone")
+    ax_price.axhspan(resistance[0], resistance[1], color=DOWN_COLOR, alpha=0.12, label="Resistance zone")
+
+    ax_price.set_title(f"{symbol.upper()} – Daily ({period}) · {view.index[-1]:%Y-%m-%d}", fontsize=11)
+    ax_price.legend(loc='upper left', fontsize=8, ncol=5, frameon=False)
+    ax_price.grid(alpha=0.25)
+    ax_price.set_xlim(-1, len(view))
+
+    ax_vol.vlines(x, 0, v / 1e5, colors=colors, linewidth=body_width)
+    ax_vol.set_ylim(bottom=0)
+    ax_vol.set_ylabel("Vol (Lakh)", fontsize=8)
+    ax_vol.grid(alpha=0.25)
+
+    # Date ticks at about 8 evenly spaced bars (no gaps for weekends/holidays)
+    ticks = np.linspace(0, len(view) - 1, num=min(8, len(view)), dtype=int)
+    ax_vol.set_xticks(ticks)
+    ax_vol.set_xticklabels([f"{d:%d %b %y}" for d in view.index[ticks]], fontsize=8)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    fig.savefig(tmp, format='png', dpi=DPI)
+    os.replace(tmp, path)
+    return path
+
+
+def _noop():
+    return os.getpid()
+
+
+# ── pooled, cached rendering ───────────────────────────────────────────
+_pool = None
+_pool_lock = threading.Lock()
+
+# (symbol, last bar, period, version) -> PNG path; concurrent requests share a render
+CHART_CACHE = ResultCache(max_entries=REPORT_CACHE_SIZE, ttl=24 * 3600)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Fresh workers from a clean server process: forking the bot would copy
+            # its threads' locks and the event loop into every worker
+            _pool = ProcessPoolExecutor(max_workers=CHART_WORKERS, initializer=init_worker,
+                                        mp_context=multiprocessing.get_context("forkserver"))
+        return _pool
+
+
+def warm_pool():
+    """Start every chart worker now (matplotlib import, figure) instead of on the first /chart."""
+    pool = _get_pool()
+    for future in [pool.submit(_noop) for _ in range(CHART_WORKERS)]:
+        future.result()
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _remove_stale(symbol: str, last_bar: str):
+    """Delete the symbol's charts drawn from any bar other than `last_bar` (or an older CHART_VERSION)."""
+    prefix = f"{symbol.upper()}_"
+    try:
+        names = os.listdir(CHART_DIR)
+    except FileNotFoundError:
+        return
+    for name in names:
+        rest = name[len(prefix):]
+        current = rest.startswith(f"{last_bar}_") and rest.endswith(f"_v{CHART_VERSION}.png")
+        if name.startswith(prefix) and CHART_FILE_RE.fullmatch(rest) and not current:
+            try:
+                os.remove(os.path.join(CHART_DIR, name))
+            except OSError:
+                pass
+
+
+async def build_chart(symbol: str, df: pd.DataFrame, period: str = DEFAULT_PERIOD) -> str:
+    """
+    Path of the chart PNG for `symbol`'s OHLCV `df`, rendered at most once
+    per (symbol, last bar, period, chart version): an existing file is
+    reused, concurrent requests share one render, and drawing runs in the
+    chart process pool off the event loop.
+    """
+    symbol = symbol.upper()
+    last_bar = bar_id(df)
+    path = chart_path(symbol, last_bar, period)
+
+    async def render():
+        if os.path.exists(path):
+            return path
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(_get_pool(), render_chart, symbol, df, period, path)
+        await loop.run_in_executor(None, _remove_stale, symbol, last_bar)
+        return result
+
+    return await CHART_CACHE.get_or_compute((symbol, last_bar, period, CHART_VERSION), render)
@@ -1,8 +1,19 @@
 # services/corporate_engine.py
-import requests
-from datetime import datetime
+from services import nse_client
+from services import corporate_index
 
 def get_corporate_calendar(symbol: str) -> dict:
+    """
+    Corporate & events calendar for an NSE equity, looked up in the
+    market-wide announcements index (services/corporate_index.py).
+    Falls back to a per-symbol fetch only if the index has never been built.
+    """
+    cal = corporate_index.lookup(symbol)
+    if cal is not None:
+        return cal
+    return fetch_corporate_calendar(symbol)
+
+def fetch_corporate_calendar(symbol: str) -> dict:
     """
     Fetch upcoming corporate events for an NSE equity:
       - Earnings Date (first “Results” announcement)
@@ -10,41 +21,35 @@ def get_corporate_calendar(symbol: str) -> dict:
     Shareholding Changes remains 'N/A' until a reliable data source is added.
     """
     sym = symbol.upper()
-    ann_url = f"https://www.nseindia.com/api/corporate-announcements?symbol={sym}"
-    headers = {
-        "User-Agent": "Mozilla/5.0",
-        "Accept": "application/json, text/plain, */*",
-        "Referer": f"https://www.nseindia.com/get-quotes/equity?symbol={sym}",
-    }
 
     earnings_date       = "N/A"
     ex_dividend_date    = "N/A"
     shareholding_changes = "N/A"
 
-    sess = requests.Session()
     try:
-        # Warm up session & cookies
-        sess.get("https://www.nseindia.com", headers=headers, timeout=5)
-        sess.get(ann_url, headers=headers, timeout=5)
-        # Fetch announcements JSON
-        resp = sess.get(ann_url, headers=headers, timeout=5)
-        resp.raise_for_status()
-        data = resp.json()
+        # Fetch announcements JSON on a pooled session that already has cookies
+        data = nse_client.get_json(
+            "/api/corporate-announcements",
+            params={"index": "equities", "symbol": sym},
+            referer=f"https://www.nseindia.com/get-quotes/equity?symbol={sym}",
+        )
+        if isinstance(data, list):
+            data = {"data": data}
 
         # Data may sit under 'records'->'data' or directly under 'data'
         items = data.get("records", {}).get("data", []) or data.get("data", [])
         for item in items:
-            title    = item.get("title", "").lower()
-            date_str = item.get("announcementDate", "")
+            title    = item.get("desc") or item.get("title") or ""
+            date_str = item.get("an_dt") or item.get("announcementDate") or ""
             # Convert '10-May-2025' → '2025-05-10'
-            try:
-                dt = datetime.strptime(date_str, "%d-%b-%Y").strftime("%Y-%m-%d")
-            except Exception:
+            dt = corporate_index.parse_announcement_date(date_str)
+            if not dt:
                 continue
 
-            if "results" in title and earnings_date == "N/A":
+            events = corporate_index.classify_announcement(title)
+            if "results" in events and earnings_date == "N/A":
                 earnings_date = dt
-            if "ex-dividend" in title and ex_dividend_date == "N/A":
+            if "ex_dividend" in events and ex_dividend_date == "N/A":
                 ex_dividend_date = dt
 
     except Exception:
@@ -0,0 +1,161 @@
+# services/corporate_index.py
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from config import DATA_DIR, CORP_INGEST_INTERVAL, CORP_LOOKBACK_DAYS
+from services import nse_client
+
+logger = logging.getLogger(__name__)
+
+INDEX_PATH = os.path.join(DATA_DIR, "corporate_index.json")
+
+# Event type -> calendar field returned by get_corporate_calendar
+EVENT_FIELDS = {
+    "results":      "earnings_date",
+    "ex_dividend":  "ex_dividend_date",
+    "shareholding": "shareholding_changes",
+}
+
+_DATE_FORMATS = ("%d-%b-%Y %H:%M:%S", "%d-%b-%Y", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d")
+
+_state = None            # {"last_seen": "YYYY-MM-DD", "updated_at": ..., "symbols": {sym: {event: date}}}
+_state_lock = threading.Lock()
+_ingester_started = False
+
+
+def parse_announcement_date(date_str: str):
+    """'10-May-2025 18:30:00' / '10-May-2025' / ISO → '2025-05-10', or None."""
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str.strip(), fmt).strftime("%Y-%m-%d")
+        except (ValueError, AttributeError):
+            continue
+    return None
+
+
+def classify_announcement(title: str) -> list:
+    """Event types an announcement title/description belongs to."""
+    title = title.lower()
+    events = []
+    if "results" in title:
+        events.append("results")
+    if "ex-dividend" in title:
+        events.append("ex_dividend")
+    if "shareholding" in title:
+        events.append("shareholding")
+    return events
+
+
+def _load():
+    global _state
+    with _state_lock:
+        if _state is None:
+            try:
+                with open(INDEX_PATH, "r", encoding="utf-8") as f:
+                    _state = json.load(f)
+            except Exception:
+                _state = {"last_seen": None, "updated_at": None, "symbols": {}}
+        return _state
+
+
+def _save(state: dict) -> None:
+    os.makedirs(DATA_DIR, exist_ok=True)
+    tmp = INDEX_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, INDEX_PATH)
+
+
+def index_announcements(items: list, symbols: dict) -> str:
+    """
+    Merge announcement items into the {symbol: {event: latest date}} index.
+    Keeps the most recent date per event, so re-reading overlapping
+    windows is harmless. Returns the newest announcement date seen.
+    """
+    newest = None
+    for item in items:
+        sym      = (item.get("symbol") or "").upper()
+        title    = item.get("desc") or item.get("title") or ""
+        date_str = item.get("an_dt") or item.get("announcementDate") or item.get("sort_date") or ""
+        dt = parse_announcement_date(date_str)
+        if not sym or not dt:
+            continue
+        newest = max(newest or dt, dt)
+        events = symbols.setdefault(sym, {})
+        for event in classify_announcement(title):
+            if dt > events.get(event, ""):
+                events[event] = dt
+    return newest
+
+
+def ingest_announcements() -> int:
+    """
+    Pull the market-wide announcements feed from the last-seen date to
+    today, merge it into the index and persist it.
+    Returns the number of announcements read.
+    """
+    state = _load()
+    today = datetime.now().date()
+    if state["last_seen"]:
+        start = datetime.strptime(state["last_seen"], "%Y-%m-%d").date()
+    else:
+        start = today - timedelta(days=CORP_LOOKBACK_DAYS)
+
+    data = nse_client.get_json(
+        "/api/corporate-announcements",
+        params={
+            "index": "equities",
+            "from_date": start.strftime("%d-%m-%Y"),
+            "to_date": today.strftime("%d-%m-%Y"),
+        },
+        referer="https://www.nseindia.com/companies-listing/corporate-filings-announcements",
+    )
+    items = data if isinstance(data, list) else data.get("data", [])
+
+    with _state_lock:
+        newest = index_announcements(items, state["symbols"])
+        if newest:
+            state["last_seen"] = max(state["last_seen"] or newest, newest)
+        state["updated_at"] = datetime.now().isoformat(timespec="seconds")
+        _save(state)
+    return len(items)
+
+
+def lookup(symbol: str):
+    """
+    Calendar fields for `symbol` from the index, or None if the index has
+    never been built (callers may then fall back to a per-symbol fetch).
+    """
+    state = _load()
+    if not state["updated_at"]:
+        return None
+    events = state["symbols"].get(symbol.upper(), {})
+    return {field: events.get(event, "N/A") for event, field in EVENT_FIELDS.items()}
+
+
+def _ingest_loop(interval: int) -> None:
+    while True:
+        try:
+            n = ingest_announcements()
+            logger.info("Corporate index refreshed (%d announcements)", n)
+        except Exception as e:
+            logger.warning("Corporate announcements ingest failed: %s", e)
+        time.sleep(interval)
+
+
+def start_ingester(interval: int = CORP_INGEST_INTERVAL) -> None:
+    """Refresh the index every `interval` seconds on a daemon thread (idempotent)."""
+    global _ingester_started
+    with _state_lock:
+        if _ingester_started:
+            return
+        _ingester_started = True
+    threading.Thread(target=_ingest_loop, args=(interval,), name="corp-ingest", daemon=True).start()
+
+
+if __name__ == "__main__":
+    print(f"✅ Indexed {ingest_announcements()} announcements")
@@ -0,0 +1,61 @@
+# services/file_id_cache.py
+import os
+import json
+import threading
+
+from config import DATA_DIR
+
+
+class FileIdBook:
+    """
+    Telegram file_id of the last upload per key ({key: [version, file_id]}),
+    persisted to data/<name>_file_ids.json. `version` identifies the content
+    (e.g. the trading date of a report); a file_id is only reused for the same
+    version, so an upload is resent by file_id instead of uploading the bytes
+    again until the content changes.
+    """
+
+    def __init__(self, path: str):
+        self.path  = path
+        self.ids   = {}
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.ids = json.load(f)
+        except Exception:
+            pass
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.ids, f)
+        os.replace(tmp, self.path)
+
+    def get(self, key: str, version: str):
+        with self._lock:
+            entry = self.ids.get(key)
+            return entry[1] if entry and entry[0] == version else None
+
+    def put(self, key: str, version: str, file_id: str):
+        with self._lock:
+            self.ids[key] = [version, file_id]
+            self._save()
+
+    def forget(self, key: str):
+        with self._lock:
+            if self.ids.pop(key, None) is not None:
+                self._save()
+
+
+_books = {}
+_books_lock = threading.Lock()
+
+
+def get_file_ids(name: str) -> FileIdBook:
+    """The process-wide FileIdBook for `name` ('pdf', 'chart'), loaded on first use."""
+    with _books_lock:
+        book = _books.get(name)
+        if book is None:
+            book = _books[name] = FileIdBook(os.path.join(DATA_DIR, f"{name}_file_ids.json"))
+        return book
@@ -1,17 +1,30 @@
+import os
+import json
+import threading
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+
 import yfinance as yf
 
+from config import DATA_DIR, FUNDAMENTALS_WORKERS
 
-def get_fundamentals(symbol: str) -> dict:
-    """
-    Fetches key fundamental metrics for a given stock symbol using yfinance.
-    Automatically appends '.NS' if no exchange suffix is present.
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "fundamentals")
+ANNUAL_YEARS = 4
 
-    Returns:
-        dict: Fundamental metrics including market cap, P/E ratios, P/B, dividend yield, ROE, EPS.
-    """
-    yf_symbol = symbol if "." in symbol else f"{symbol}.NS"
-    ticker = yf.Ticker(yf_symbol)
-    info = ticker.info or {}
+_snapshots = {}      # symbol -> snapshot dict
+_snapshot_lock = threading.Lock()
+
+
+def _yf_symbol(symbol: str) -> str:
+    return symbol if "." in symbol else f"{symbol}.NS"
+
+
+def _plain(value):
+    """numpy / pandas scalars → plain Python so snapshots serialize to JSON."""
+    return value.item() if hasattr(value, "item") else value
+
+
+def _fundamentals_from_info(info: dict) -> dict:
     return {
         'market_cap':       info.get('marketCap'),
         'trailing_pe':      info.get('trailingPE'),
@@ -24,27 +37,12 @@ def get_fundamentals(symbol: str) -> dict:
     }
 
 
-def get_annual_fundamentals(symbol: str, num_years: int = 4) -> dict:
-    """
-    Fetches the last `num_years` of Revenue and PAT for a given symbol.
-    Tries yfinance's earnings first; if not available or insufficient, falls back to financials.
-
-    Args:
-        symbol (str): Stock symbol (e.g., 'TCS' or 'TCS.NS').
-        num_years (int): Number of years of data to fetch (default 4).
-
-    Returns:
-        dict: {
-            'years': [Y1, Y2, ...],
-            'revenue': [R1, R2, ...],
-            'pat': [P1, P2, ...]
-        } or {} if insufficient data.
-    """
-    yf_symbol = symbol if "." in symbol else f"{symbol}.NS"
-    ticker = yf.Ticker(yf_symbol)
-
-    # Attempt to use the earnings DataFrame
-    df_earn = ticker.earnings
+def _annual_from_ticker(ticker, num_years: int) -> dict:
+    # Attempt to use the earnings DataFrame (no longer served by newer yfinance)
+    try:
+        df_earn = ticker.earnings
+    except Exception:
+        df_earn = None
     if df_earn is not None and not df_earn.empty:
         df_sel = df_earn.tail(num_years)
         years   = df_sel.index.tolist()
@@ -64,7 +62,124 @@ def get_annual_fundamentals(symbol: str, num_years: int = 4) -> dict:
         return {}
 
     return {
-        'years': years,
-        'revenue': revenue,
-        'pat': pat,
+        'years': [_plain(y) for y in years],
+        'revenue': [_plain(r) for r in revenue],
+        'pat': [_plain(p) for p in pat],
     }
+
+
+def fetch_fundamental_snapshot(symbol: str) -> dict:
+    """
+    Fetch all fundamental data for `symbol` through a single yf.Ticker:
+    `.info` for the key metrics and `.earnings` / `.financials` for the
+    annual Revenue and PAT.
+
+    Returns:
+        dict: {'date': 'YYYY-MM-DD', 'fundamentals': {...}, 'annual': {...}}
+    """
+    ticker = yf.Ticker(_yf_symbol(symbol))
+    info = ticker.info or {}
+    return {
+        'date': date.today().isoformat(),
+        'fundamentals': {k: _plain(v) for k, v in _fundamentals_from_info(info).items()},
+        'annual': _annual_from_ticker(ticker, ANNUAL_YEARS),
+    }
+
+
+def _is_empty(snap: dict) -> bool:
+    """True when yfinance returned nothing usable (empty .info and no annual figures)."""
+    return not snap['annual'] and all(v is None for v in snap['fundamentals'].values())
+
+
+def _path(symbol: str) -> str:
+    return os.path.join(SNAPSHOT_DIR, f"{symbol.upper()}.json")
+
+
+def get_fundamental_snapshot(symbol: str) -> dict:
+    """
+    Today's fundamentals snapshot for `symbol`, from memory, then disk,
+    then yfinance. Fundamentals change at most daily, so a snapshot dated
+    today is reused for every later request. An empty fetch (yfinance
+    returned nothing) is returned but not kept, so the next request retries.
+    """
+    sym, today = symbol.upper(), date.today().isoformat()
+    with _snapshot_lock:
+        snap = _snapshots.get(sym)
+    if snap and snap['date'] == today:
+        return snap
+
+    try:
+        with open(_path(sym), "r", encoding="utf-8") as f:
+            snap = json.load(f)
+    except Exception:
+        snap = None
+
+    if not snap or snap.get('date') != today:
+        snap = fetch_fundamental_snapshot(sym)
+        if _is_empty(snap):
+            return snap
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        tmp = _path(sym) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snap, f)
+        os.replace(tmp, _path(sym))
+
+    with _snapshot_lock:
+        _snapshots[sym] = snap
+    return snap
+
+
+def prefetch_fundamentals(symbols, workers: int = FUNDAMENTALS_WORKERS) -> dict:
+    """
+    Warm today's snapshots for a watchlist or the whole universe in parallel.
+    Returns {symbol: snapshot} for the symbols that succeeded.
+    """
+    def fetch(sym):
+        try:
+            return sym, get_fundamental_snapshot(sym)
+        except Exception as e:
+            print(f"⚠️ Fundamentals prefetch failed for {sym}: {e}")
+            return sym, None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return {sym: snap for sym, snap in pool.map(fetch, [s.upper() for s in symbols]) if snap}
+
+
+def get_fundamentals(symbol: str) -> dict:
+    """
+    Fetches key fundamental metrics for a given stock symbol using yfinance.
+    Automatically appends '.NS' if no exchange suffix is present.
+    Served from today's snapshot (see get_fundamental_snapshot).
+
+    Returns:
+        dict: Fundamental metrics including market cap, P/E ratios, P/B, dividend yield, ROE, EPS.
+    """
+    return get_fundamental_snapshot(symbol)['fundamentals']
+
+
+def get_annual_fundamentals(symbol: str, num_years: int = ANNUAL_YEARS) -> dict:
+    """
+    Fetches the last `num_years` of Revenue and PAT for a given symbol.
+    Tries yfinance's earnings first; if not available or insufficient, falls back to financials.
+    The default `num_years` is served from today's snapshot.
+
+    Args:
+        symbol (str): Stock symbol (e.g., 'TCS' or 'TCS.NS').
+        num_years (int): Number of years of data to fetch (default 4).
+
+    Returns:
+        dict: {
+            'years': [Y1, Y2, ...],
+            'revenue': [R1, R2, ...],
+            'pat': [P1, P2, ...]
+        } or {} if insufficient data.
+    """
+    if num_years == ANNUAL_YEARS:
+        return get_fundamental_snapshot(symbol)['annual']
+    return _annual_from_ticker(yf.Ticker(_yf_symbol(symbol)), num_years)
+
+
+if __name__ == "__main__":
+    from services.bulk_downloader import load_universe
+    done = prefetch_fundamentals(load_universe())
+    print(f"✅ Fundamentals snapshots ready for {len(done)} symbols")
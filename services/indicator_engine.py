@@ -0,0 +1,203 @@
+# services/indicator_engine.py
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from config import IO_WORKERS
+from services import ohlcv_store
+from services.nse_data import get_ohlcv
+from services.candle_patterns import label_candles
+from services.price_structure import structure_series
+
+FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+# The whole stored history: what IndicatorState, and so analyze_stock, compute
+# EMA-200 and the 52-week range over. Use it where values must match /report.
+FULL_HISTORY = "max"
+
+
+def build_panel(frames: dict) -> dict:
+    """
+    Align per-symbol OHLCV frames into a symbol × time panel.
+
+    Args:
+        frames (dict): {symbol: OHLCV DataFrame as returned by get_ohlcv}.
+
+    Returns:
+        dict: {field: DataFrame} for open/high/low/close/volume, each indexed
+        by the union of all dates with one column per symbol (NaN where a
+        symbol has no bar).
+    """
+    frames = {s: df for s, df in frames.items() if df is not None and not df.empty}
+    return {
+        f: pd.DataFrame({s: df[f] for s, df in frames.items()}).sort_index()
+        for f in FIELDS
+    }
+
+
+def load_panel(symbols: list) -> dict:
+    """Build a panel straight from the local OHLCV store."""
+    return build_panel({s: ohlcv_store.load(s) for s in symbols})
+
+
+def refresh_latest(symbols: list, period: str = "1y", workers: int = IO_WORKERS) -> pd.DataFrame:
+    """
+    Refresh OHLCV for `symbols` through get_ohlcv (incremental, store-backed)
+    and return their latest values from compute_panel_indicators, one row per
+    symbol. Symbols whose fetch fails are left out.
+    """
+    def fetch(sym):
+        try:
+            return sym, get_ohlcv(sym, period=period)
+        except Exception as e:
+            print(f"⚠️ OHLCV refresh failed for {sym}: {e}")
+            return sym, None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        frames = dict(pool.map(fetch, symbols))
+    panel = build_panel(frames)
+    if panel['close'].empty:
+        return pd.DataFrame()
+    _, latest = compute_panel_indicators(panel)
+    return latest
+
+
+def _pack(panel: dict) -> tuple:
+    """
+    Move each symbol's bars to the bottom rows of the panel, in date order.
+
+    On the union-of-dates panel a symbol has NaN on dates it did not trade
+    (listed later, suspended); rolling windows, ewm and diff would count or
+    bridge those gaps and drift from the per-symbol series. Packed, every
+    column is exactly the symbol's own series (leading NaN padding only) and
+    row -1 is every symbol's last bar.
+
+    Returns:
+        (packed, order, mask): packed {field: DataFrame}, the row permutation
+        used, and the mask of real bars in packed order (for _unpack).
+    """
+    valid = panel['close'].notna().to_numpy()
+    # Stable sort puts the no-bar rows first and keeps the bars in date order
+    order = np.argsort(valid, axis=0, kind='stable')
+    mask = np.take_along_axis(valid, order, axis=0)
+    packed = {}
+    for f, df in panel.items():
+        values = np.take_along_axis(df.to_numpy(dtype='f8'), order, axis=0)
+        values[~mask] = np.nan
+        packed[f] = pd.DataFrame(values, columns=df.columns)
+    return packed, order, mask
+
+
+def _unpack(df: pd.DataFrame, order: np.ndarray, mask: np.ndarray, index: pd.Index) -> pd.DataFrame:
+    """Inverse of _pack for one computed frame: back onto the dates, NaN where a symbol has no bar."""
+    values = np.where(mask, df.to_numpy(dtype='f8'), np.nan)
+    out = np.empty_like(values)
+    np.put_along_axis(out, order, values, axis=0)
+    return pd.DataFrame(out, index=index, columns=df.columns)
+
+
+def _cross(fast: np.ndarray, slow: np.ndarray, label: str) -> np.ndarray:
+    """Vectorized form of the crossover check in analyze_stock; inputs are (prev, curr) row pairs."""
+    (fp, fc), (sp, sc) = fast, slow
+    out = np.full(fc.shape, 'None', dtype=object)
+    out[(fp < sp) & (fc > sc)] = f'Golden Cross ({label})'
+    out[(fp > sp) & (fc < sc)] = f'Death Cross ({label})'
+    return out
+
+
+def compute_panel_indicators(panel: dict, rsi_period: int = 14) -> tuple:
+    """
+    Compute analyze_stock's indicators for every symbol in one pass over the panel.
+
+    Uses the same definitions as utils/indicators.py and analyze_stock:
+    rolling-mean RSI, EMA(adjust=False), 252-day high/low, 20/50-day volume
+    means. Each symbol is computed over its own bars only (see _pack), so the
+    values equal the per-symbol ones even when symbols trade on different dates.
+
+    Returns:
+        (series, latest):
+          - series: {name: dates × symbols DataFrame} with full-precision history
+            (NaN on dates a symbol has no bar)
+          - latest: DataFrame indexed by symbol with the analyze_stock keys
+            (cmp, change_pct, rsi, ema_21, ..., volume_surge_pct, ema_50_200_cross,
+            candle_pattern, daily_structure)
+    """
+    dates = panel['close'].index
+    packed, order, mask = _pack(panel)
+    close, high, low, volume = packed['close'], packed['high'], packed['low'], packed['volume']
+
+    delta    = close.diff()
+    avg_gain = delta.clip(lower=0).rolling(rsi_period, min_periods=rsi_period).mean()
+    avg_loss = (-delta.clip(upper=0)).rolling(rsi_period, min_periods=rsi_period).mean()
+    rsi      = 100 - (100 / (1 + avg_gain / avg_loss))
+
+    packed_series = {
+        'rsi':      rsi,
+        'ema_21':   close.ewm(span=21, adjust=False).mean(),
+        'ema_50':   close.ewm(span=50, adjust=False).mean(),
+        'ema_200':  close.ewm(span=200, adjust=False).mean(),
+        'high_52w': high.rolling(252, min_periods=1).max(),
+        'low_52w':  low.rolling(252, min_periods=1).min(),
+        'vol_avg20': volume.rolling(20).mean(),
+        'vol_avg50': volume.rolling(50).mean(),
+    }
+    packed_series['volume_surge_pct'] = (volume - packed_series['vol_avg20']) / packed_series['vol_avg20'] * 100
+    series = {name: _unpack(df, order, mask, dates) for name, df in packed_series.items()}
+
+    # Latest values: the last packed row is each symbol's last bar, the one
+    # above it the symbol's previous bar (for change and crossovers)
+    bars = mask.sum(axis=0)
+    has_prev = bars > 1
+    last_rows = order[-1]
+
+    def at(df, r=-1):
+        return df.to_numpy()[r]
+
+    # CMP, EMAs and the 52-week range are rounded before the percentile and
+    # EMA distances are derived from them, as in analyze_stock
+    cmp_price = at(close)
+    cmp_2dp   = np.round(cmp_price, 2)
+    high_52w  = np.round(at(packed_series['high_52w']), 2)
+    low_52w   = np.round(at(packed_series['low_52w']), 2)
+    rng       = high_52w - low_52w
+    vol_today = at(volume)
+    vol_avg20 = at(packed_series['vol_avg20'])
+    vol_avg50 = at(packed_series['vol_avg50'])
+
+    latest = pd.DataFrame({
+        'date':              dates[last_rows],
+        'cmp':               cmp_price,
+        'change_pct':        np.where(has_prev, (cmp_price / at(close, -2) - 1) * 100, np.nan)
+                             if len(close) > 1 else np.nan,
+        'rsi':               np.nan_to_num(at(rsi), nan=0.0),
+        'ema_21':            at(packed_series['ema_21']),
+        'ema_50':            at(packed_series['ema_50']),
+        'ema_200':           at(packed_series['ema_200']),
+        'fifty_two_wk_high': high_52w,
+        'fifty_two_wk_low':  low_52w,
+        'percentile_52w':    np.where(rng > 0, (cmp_2dp - low_52w) / np.where(rng > 0, rng, 1) * 100, np.nan),
+        'volume_today':      vol_today / 100000,
+        'volume_avg':        vol_avg50 / 100000,
+        'volume_surge_pct':  np.where(vol_avg20 > 0, (vol_today - vol_avg20) / np.where(vol_avg20 > 0, vol_avg20, 1) * 100, np.nan),
+    }, index=close.columns)
+    for n in (21, 50, 200):
+        latest[f'dist{n}'] = (latest[f'ema_{n}'].round(2) - cmp_2dp).abs() / cmp_2dp * 100
+    latest['volume_signal'] = np.where(vol_today >= vol_avg50, 'High Volume', 'Low Volume')
+
+    e21, e50, e200 = packed_series['ema_21'], packed_series['ema_50'], packed_series['ema_200']
+    if len(close) > 1:
+        latest['ema_21_50_cross'] = np.where(
+            has_prev, _cross((at(e21, -2), at(e21)), (at(e50, -2), at(e50)), '21x50'), 'None')
+        latest['ema_50_200_cross'] = np.where(
+            has_prev, _cross((at(e50, -2), at(e50)), (at(e200, -2), at(e200)), '50x200'), 'None')
+        candles = label_candles(packed['open'].to_numpy(), high.to_numpy(), low.to_numpy(), close.to_numpy())[-1]
+    else:
+        latest['ema_21_50_cross'] = latest['ema_50_200_cross'] = 'None'
+        candles = 'Not Enough Data'
+    latest['candle_pattern'] = np.where(has_prev, candles, 'Not Enough Data')
+    latest['daily_structure'] = structure_series(high.to_numpy(), low.to_numpy())[-1]
+
+    numeric = latest.select_dtypes('number').columns
+    latest[numeric] = latest[numeric].round(2)
+    return series, latest
@@ -0,0 +1,293 @@
+# services/indicator_state.py
+import os
+import json
+import copy
+from collections import deque
+
+import pandas as pd
+
+from config import DATA_DIR
+from services.price_structure import StructureState
+
+STATE_DIR   = os.path.join(DATA_DIR, "indicator_state")
+STATE_VERSION = 2     # bump when the persisted fields change; older files are rebuilt
+EMA_SPANS   = (21, 50, 200)
+RSI_PERIOD  = 14
+VOL_WINDOWS = (20, 50)
+RANGE_WINDOW = 252
+
+
+class IndicatorState:
+    """
+    Streaming per-symbol indicator state; update(bar) is O(1) per bar.
+
+    Keeps exactly what utils/indicators.py and analyze_stock compute in batch:
+      - EMA 21/50/200 (pandas ewm, adjust=False)
+      - RSI(14) over rolling-mean gains/losses (the repo's calculate_rsi)
+      - 20/50-day volume means and the 20-day volume surge
+      - 252-day high/low via monotonic deques
+      - swing pivots, daily structure and swing levels (StructureState)
+    Feeding the same bars gives the same values as the batch functions.
+
+    The last bar may be an intraday snapshot that the OHLCV store later
+    rewrites, so the state before it is kept and extend() rolls it back and
+    re-applies the bar when its values change.
+    """
+
+    def __init__(self):
+        self.last_date  = None
+        self.last_close = None
+        self.count      = 0
+        self.ema        = {n: None for n in EMA_SPANS}
+        self.prev_ema   = {n: None for n in EMA_SPANS}
+        self.gains      = deque(maxlen=RSI_PERIOD)
+        self.losses     = deque(maxlen=RSI_PERIOD)
+        self.volumes    = deque(maxlen=max(VOL_WINDOWS))
+        self.vol_sums   = {n: 0.0 for n in VOL_WINDOWS}
+        self.last_volume = None
+        self.highs      = deque()   # (bar index, high), decreasing highs
+        self.lows       = deque()   # (bar index, low), increasing lows
+        self.structure  = StructureState()
+        self.last_bar   = None      # [high, low, close, volume] of the last bar
+        self.before_last = None     # to_dict() of the state before the last bar
+
+    def update(self, bar: dict, undo: bool = True) -> dict:
+        """
+        Apply one daily bar ({'date', 'high', 'low', 'close', 'volume'}) and
+        return the current values(). With `undo`, the state before the bar is
+        kept so rollback() can take it back out.
+        """
+        self.push(bar, undo)
+        return self.values()
+
+    def push(self, bar: dict, undo: bool = True) -> None:
+        """update() without building values(), for streaming many bars."""
+        close, volume = float(bar['close']), float(bar['volume'])
+        i = self.count
+        self.before_last = self._fields() if undo else None
+
+        # EMA: first value seeds the average, as in ewm(adjust=False)
+        for n in EMA_SPANS:
+            alpha = 2 / (n + 1)
+            self.prev_ema[n] = self.ema[n]
+            self.ema[n] = close if self.ema[n] is None else alpha * close + (1 - alpha) * self.ema[n]
+
+        # RSI gains/losses start from the second bar (first diff is NaN)
+        if self.last_close is not None:
+            delta = close - self.last_close
+            self.gains.append(max(delta, 0.0))
+            self.losses.append(max(-delta, 0.0))
+
+        # Running volume sums; volumes are whole numbers so float sums stay exact
+        for n in VOL_WINDOWS:
+            if len(self.volumes) >= n:
+                self.vol_sums[n] -= self.volumes[-n]
+            self.vol_sums[n] += volume
+        self.volumes.append(volume)
+
+        # 52-week high/low: drop dominated values, then expired ones
+        while self.highs and self.highs[-1][1] <= bar['high']:
+            self.highs.pop()
+        self.highs.append((i, float(bar['high'])))
+        while self.lows and self.lows[-1][1] >= bar['low']:
+            self.lows.pop()
+        self.lows.append((i, float(bar['low'])))
+        while self.highs[0][0] <= i - RANGE_WINDOW:
+            self.highs.popleft()
+        while self.lows[0][0] <= i - RANGE_WINDOW:
+            self.lows.popleft()
+
+        self.structure.push(bar)
+
+        self.last_close  = close
+        self.last_volume = volume
+        self.last_date   = pd.Timestamp(bar['date']).strftime('%Y-%m-%d')
+        self.last_bar    = [float(bar['high']), float(bar['low']), close, volume]
+        self.count += 1
+
+    def rollback(self) -> bool:
+        """Take the last bar back out; False if its prior state was not kept."""
+        if self.before_last is None:
+            return False
+        self._restore(self.before_last)
+        self.before_last = None
+        return True
+
+    def preview(self, bar: dict) -> dict:
+        """Values for a provisional (intraday) bar without committing it."""
+        return copy.deepcopy(self).update(bar)
+
+    def _rsi(self):
+        if len(self.gains) < RSI_PERIOD:
+            return 0.0
+        gain, loss = sum(self.gains) / RSI_PERIOD, sum(self.losses) / RSI_PERIOD
+        if loss == 0:
+            return 100.0 if gain > 0 else 0.0
+        return round(100 - 100 / (1 + gain / loss), 2)
+
+    def _vol_avg(self, n):
+        return self.vol_sums[n] / n if len(self.volumes) >= n else None
+
+    def _cross(self, fast, slow, label):
+        fp, fc, sp, sc = self.prev_ema[fast], self.ema[fast], self.prev_ema[slow], self.ema[slow]
+        if fp is None:
+            return 'None'
+        if fp < sp and fc > sc:
+            return f'Golden Cross ({label})'
+        if fp > sp and fc < sc:
+            return f'Death Cross ({label})'
+        return 'None'
+
+    def values(self) -> dict:
+        """Latest indicator values, keyed like analyze_stock's output."""
+        if not self.count:
+            return {}
+        vol_avg20, vol_avg50 = self._vol_avg(20), self._vol_avg(50)
+        swings = self.structure.values()
+        return {
+            'date':              self.last_date,
+            'cmp':               round(self.last_close, 2),
+            'rsi':               self._rsi(),
+            'ema_21':            round(self.ema[21], 2),
+            'ema_50':            round(self.ema[50], 2),
+            'ema_200':           round(self.ema[200], 2),
+            'fifty_two_wk_high': round(self.highs[0][1], 2),
+            'fifty_two_wk_low':  round(self.lows[0][1], 2),
+            'vol_avg20':         vol_avg20,
+            'vol_avg50':         vol_avg50,
+            'volume_surge_pct': (
+                round((self.last_volume - vol_avg20) / vol_avg20 * 100, 2)
+                if vol_avg20 else None
+            ),
+            'ema_21_50_cross':   self._cross(21, 50, '21x50'),
+            'ema_50_200_cross':  self._cross(50, 200, '50x200'),
+            'daily_structure':   swings['structure'],
+            'swing_support':     swings['swing_support'],
+            'swing_resistance':  swings['swing_resistance'],
+        }
+
+    def _fields(self) -> dict:
+        return {
+            'last_date': self.last_date, 'last_close': self.last_close,
+            'count': self.count, 'last_volume': self.last_volume,
+            'last_bar': self.last_bar,
+            'ema': dict(self.ema), 'prev_ema': dict(self.prev_ema),
+            'gains': list(self.gains), 'losses': list(self.losses),
+            'volumes': list(self.volumes), 'vol_sums': dict(self.vol_sums),
+            'highs': list(self.highs), 'lows': list(self.lows),
+            'structure': self.structure.to_dict(),
+        }
+
+    def _restore(self, d: dict) -> None:
+        self.last_date, self.last_close = d['last_date'], d['last_close']
+        self.count, self.last_volume = d['count'], d['last_volume']
+        self.last_bar = d.get('last_bar')
+        # JSON turns int keys into strings
+        self.ema      = {int(k): v for k, v in d['ema'].items()}
+        self.prev_ema = {int(k): v for k, v in d['prev_ema'].items()}
+        self.vol_sums = {int(k): v for k, v in d['vol_sums'].items()}
+        for name in ('gains', 'losses', 'volumes', 'highs', 'lows'):
+            getattr(self, name).clear()
+        self.gains.extend(d['gains'])
+        self.losses.extend(d['losses'])
+        self.volumes.extend(d['volumes'])
+        self.highs.extend(tuple(x) for x in d['highs'])
+        self.lows.extend(tuple(x) for x in d['lows'])
+        self.structure = StructureState.from_dict(d['structure'])
+
+    def to_dict(self) -> dict:
+        return dict(self._fields(), version=STATE_VERSION, before_last=self.before_last)
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'IndicatorState':
+        st = cls()
+        st._restore(d)
+        st.before_last = d.get('before_last')
+        return st
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'IndicatorState':
+        """Seed a state by streaming every bar of an OHLCV frame."""
+        st = cls()
+        st.extend(df)
+        return st
+
+    def extend(self, df: pd.DataFrame) -> dict:
+        """
+        Apply every bar of `df` dated after last_date. If `df` has a different
+        bar for last_date (an intraday snapshot since rewritten), that bar is
+        rolled back and applied again first.
+        """
+        if self.last_date is not None and pd.Timestamp(self.last_date) in df.index:
+            bar = df.loc[pd.Timestamp(self.last_date), ['high', 'low', 'close', 'volume']]
+            if bar.to_numpy(dtype='f8').tolist() != self.last_bar:
+                self.rollback()
+        if self.last_date is not None:
+            df = df[df.index > self.last_date]
+        # Only the final bar can still change, so only it keeps an undo snapshot
+        rows = list(df[['high', 'low', 'close', 'volume']].itertuples())
+        for n, row in enumerate(rows, 1):
+            self.push({'date': row.Index, 'high': row.high, 'low': row.low,
+                         'close': row.close, 'volume': row.volume}, undo=n == len(rows))
+        return self.values()
+
+
+def _path(symbol: str) -> str:
+    return os.path.join(STATE_DIR, f"{symbol.upper()}.json")
+
+
+def load_state(symbol: str):
+    """Persisted IndicatorState for `symbol`, or None (also for an older STATE_VERSION)."""
+    try:
+        with open(_path(symbol), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return IndicatorState.from_dict(data) if data.get('version') == STATE_VERSION else None
+    except Exception:
+        return None
+
+
+def save_state(symbol: str, state: IndicatorState) -> None:
+    os.makedirs(STATE_DIR, exist_ok=True)
+    path = _path(symbol)
+    tmp  = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state.to_dict(), f)
+    os.replace(tmp, path)
+
+
+def _matches(state: IndicatorState, df: pd.DataFrame) -> bool:
+    """True if `df` still holds the history `state` was built from, up to its last bar."""
+    if state is None or state.last_date is None:
+        return False
+    last = pd.Timestamp(state.last_date)
+    if last not in df.index:
+        return False
+    # Same number of bars up to and including it: nothing earlier was added or dropped
+    if int(df.index.searchsorted(last, side='right')) != state.count:
+        return False
+    # A rewritten last bar can only be re-applied if the state before it was kept
+    bar = df.loc[last, ['high', 'low', 'close', 'volume']].to_numpy(dtype='f8').tolist()
+    return bar == state.last_bar or state.before_last is not None
+
+
+def sync_state(symbol: str, df: pd.DataFrame) -> dict:
+    """
+    Bring the persisted state for `symbol` up to date with `df` (the full
+    stored OHLCV history), applying only the bars it hasn't seen and
+    re-applying a last bar that has changed since. The state is rebuilt from
+    `df` if it is missing or `df` no longer holds the bars it was built from
+    (history was replaced). It is saved only when something changed.
+
+    Returns:
+        dict: the latest values() ({} for an empty `df`).
+    """
+    if df is None or df.empty:
+        return {}
+    state = load_state(symbol)
+    if not _matches(state, df):
+        state = IndicatorState()
+    before = (state.count, state.last_date, state.last_bar)
+    values = state.extend(df)
+    if (state.count, state.last_date, state.last_bar) != before:
+        save_state(symbol, state)
+    return values
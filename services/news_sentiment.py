@@ -1,35 +1,169 @@
+# services/news_sentiment.py
+import io
+import re
+import time
+import threading
+import xml.etree.ElementTree as ET
+from urllib.parse import quote_plus
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from config import NEWS_TTL, NEWS_WORKERS, NEWS_TIMEOUT
 
 # Basic keyword-based sentiment tags
 POSITIVE_KEYWORDS = ["growth", "profit", "expansion", "surge", "record", "beats", "upgrade"]
 NEGATIVE_KEYWORDS = ["loss", "decline", "fall", "drop", "cut", "downgrade", "crash", "fraud"]
 
+POSITIVE, NEGATIVE, NEUTRAL = "✅ Positive", "⚠️ Negative", "ℹ️ Neutral"
+
+FEED_URL = "https://news.google.com/rss/search?q={query}"
+HEADERS  = {"User-Agent": "Mozilla/5.0"}
+
+
+# ── classifier ─────────────────────────────────────────────────────────
+def _forms(word: str) -> set:
+    """The keyword and its common inflections (profits, surged, dropping, ...)."""
+    forms = {word, word + "s", word + "es", word + "ed", word + "ing"}
+    if word.endswith("e"):
+        forms |= {word + "d", word[:-1] + "ing"}
+    if len(word) <= 4 and word[-1] not in "aeiouwy":
+        # cut -> cutting, drop -> dropped
+        forms |= {word + word[-1] + "ed", word + word[-1] + "ing"}
+    return forms
+
+
+_POSITIVE_FORMS = frozenset(form for word in POSITIVE_KEYWORDS for form in _forms(word))
+_NEGATIVE_FORMS = frozenset(form for word in NEGATIVE_KEYWORDS for form in _forms(word))
+
+# Whole words only: "cut" no longer matches "execute". Each word of a
+# headline is one hash lookup, so the cost does not grow with the keyword lists.
+_WORD = re.compile(r"[a-z]+")
+
+
+def classify_batch(texts: list) -> list:
+    """Sentiment label for each text; the batch is lower-cased and split in one go."""
+    batch = "\n".join(t.replace("\n", " ") for t in texts).lower().split("\n") if texts else []
+    labels = []
+    for words in map(_WORD.findall, batch):
+        # Positive wins when a headline has both (as before)
+        if not _POSITIVE_FORMS.isdisjoint(words):
+            labels.append(POSITIVE)
+        elif not _NEGATIVE_FORMS.isdisjoint(words):
+            labels.append(NEGATIVE)
+        else:
+            labels.append(NEUTRAL)
+    return labels
+
+
 def classify_sentiment(text: str) -> str:
-    text = text.lower()
-    if any(word in text for word in POSITIVE_KEYWORDS):
-        return "✅ Positive"
-    elif any(word in text for word in NEGATIVE_KEYWORDS):
-        return "⚠️ Negative"
-    else:
-        return "ℹ️ Neutral"
+    return classify_batch([text])[0]
 
-def get_news_sentiment(stock_name: str, max_headlines: int = 5):
-    try:
-        query = stock_name + " stock"
-        url = f"https://news.google.com/rss/search?q={query.replace(' ', '+')}"
 
-        response = requests.get(url, timeout=5)
-        soup = BeautifulSoup(response.content, features="xml")
-        items = soup.findAll("item")[:max_headlines]
+# ── feeds ──────────────────────────────────────────────────────────────
+_session = requests.Session()
+_session.headers.update(HEADERS)
+_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=NEWS_WORKERS))
+_executor = ThreadPoolExecutor(max_workers=NEWS_WORKERS, thread_name_prefix="news")
 
-        headlines = []
-        for item in items:
-            title = item.title.text
-            sentiment = classify_sentiment(title)
-            headlines.append(f"• {title} – {sentiment}")
+# symbol -> {'fetched': monotonic time, 'etag', 'modified', 'items': [...]}
+_feeds = {}
+_feeds_lock = threading.Lock()
 
-        return headlines
 
-    except Exception as e:
-        return [f"⚠️ Error fetching news: {e}"]
+def parse_feed(content: bytes, limit: int) -> list:
+    """Up to `limit` items ({title, link, published, source}) streamed from RSS bytes."""
+    items = []
+    for _, elem in ET.iterparse(io.BytesIO(content), events=("end",)):
+        if elem.tag != "item":
+            continue
+        items.append({
+            'title':     (elem.findtext("title") or "").strip(),
+            'link':      elem.findtext("link") or "",
+            'published': elem.findtext("pubDate") or "",
+            'source':    elem.findtext("source") or "",
+        })
+        elem.clear()
+        if len(items) >= limit:
+            break
+    return items
+
+
+def _fetch(symbol: str, limit: int) -> list:
+    """Fetch one feed with a conditional GET; a 304 keeps the cached items."""
+    with _feeds_lock:
+        entry = dict(_feeds.get(symbol, {}))
+    headers = {}
+    if entry.get('limit', 0) < limit:
+        # Cached items are too few to answer a 304 with
+        entry = {}
+    if entry.get('etag'):
+        headers["If-None-Match"] = entry['etag']
+    if entry.get('modified'):
+        headers["If-Modified-Since"] = entry['modified']
+
+    url = FEED_URL.format(query=quote_plus(f"{symbol} stock"))
+    response = _session.get(url, headers=headers, timeout=NEWS_TIMEOUT)
+    if response.status_code != 304 or 'items' not in entry:
+        response.raise_for_status()
+        entry.update(
+            items=parse_feed(response.content, limit), limit=limit,
+            etag=response.headers.get("ETag"), modified=response.headers.get("Last-Modified"),
+        )
+    # A 304 keeps the cached items, which may be more than this request asked for
+    entry['fetched'] = time.monotonic()
+    with _feeds_lock:
+        _feeds[symbol] = entry
+    return entry['items'][:limit]
+
+
+def get_headlines(symbols, max_headlines: int = 5) -> dict:
+    """
+    {symbol: [items]} for every symbol. Feeds fetched less than NEWS_TTL
+    seconds ago are served from memory; the rest are fetched in one round of
+    parallel conditional requests. A symbol whose fetch fails maps to an
+    Exception instead.
+    """
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    now = time.monotonic()
+    result, stale = {}, []
+    with _feeds_lock:
+        for sym in symbols:
+            entry = _feeds.get(sym)
+            if entry and now - entry['fetched'] < NEWS_TTL and entry['limit'] >= max_headlines:
+                result[sym] = entry['items'][:max_headlines]
+            else:
+                stale.append(sym)
+
+    futures = {sym: _executor.submit(_fetch, sym, max_headlines) for sym in stale}
+    for sym, future in futures.items():
+        try:
+            result[sym] = future.result()
+        except Exception as e:
+            result[sym] = e
+    return {sym: result[sym] for sym in symbols}
+
+
+def get_news_sentiments(symbols, max_headlines: int = 5) -> dict:
+    """
+    {symbol: ["• headline – sentiment", ...]} for a list of symbols (e.g. a
+    watchlist): one round of feed requests, one classification batch.
+    """
+    headlines = get_headlines(symbols, max_headlines)
+    titles = [item['title'] for items in headlines.values()
+              if not isinstance(items, Exception) for item in items]
+    labels = iter(classify_batch(titles))
+
+    lines = {}
+    for sym, items in headlines.items():
+        if isinstance(items, Exception):
+            lines[sym] = [f"⚠️ Error fetching news: {items}"]
+        else:
+            lines[sym] = [f"• {item['title']} – {next(labels)}" for item in items]
+    return lines
+
+
+def get_news_sentiment(stock_name: str, max_headlines: int = 5):
+    """Headline lines for one symbol (see get_news_sentiments)."""
+    return get_news_sentiments([stock_name], max_headlines)[stock_name.upper()]
@@ -0,0 +1,125 @@
+# services/nse_client.py
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import NSE_POOL_SIZE, NSE_TIMEOUT, NSE_COOKIE_TTL
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = "https://www.nseindia.com"
+HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+_idle = deque()                  # warmed sessions not currently in use
+_idle_lock = threading.Lock()
+_refresher_started = False
+
+
+def _warm(sess: requests.Session) -> None:
+    """Load the homepage so NSE sets the cookies its API endpoints require."""
+    sess.cookies.clear()
+    sess.get(BASE_URL, timeout=NSE_TIMEOUT)
+    sess.warmed_at = time.monotonic()
+
+
+def _new_session() -> requests.Session:
+    sess = requests.Session()
+    sess.headers.update(HEADERS)
+    sess.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+    _warm(sess)
+    return sess
+
+
+def _is_stale(sess: requests.Session, max_age: float = NSE_COOKIE_TTL) -> bool:
+    return time.monotonic() - getattr(sess, "warmed_at", 0) > max_age
+
+
+@contextmanager
+def _session():
+    """Borrow a warmed session from the pool (or open one) and return it afterwards."""
+    _ensure_refresher()
+    with _idle_lock:
+        sess = _idle.popleft() if _idle else None
+    if sess is None:
+        sess = _new_session()
+    elif _is_stale(sess):
+        _warm(sess)
+    try:
+        yield sess
+    finally:
+        with _idle_lock:
+            if len(_idle) < NSE_POOL_SIZE:
+                _idle.append(sess)
+                sess = None
+        if sess is not None:
+            sess.close()
+
+
+def get_json(path: str, params: dict = None, referer: str = None):
+    """
+    GET an NSE API path (e.g. '/api/corporate-announcements') on a pooled,
+    pre-warmed keep-alive session and return the decoded JSON.
+    A 401/403 (expired cookies) re-warms the session and retries once.
+    Raises requests.HTTPError on other failures.
+    """
+    headers = {"Referer": referer or f"{BASE_URL}/"}
+    with _session() as sess:
+        resp = sess.get(BASE_URL + path, params=params, headers=headers, timeout=NSE_TIMEOUT)
+        if resp.status_code in (401, 403):
+            _warm(sess)
+            resp = sess.get(BASE_URL + path, params=params, headers=headers, timeout=NSE_TIMEOUT)
+        resp.raise_for_status()
+        return resp.json()
+
+
+def _refresh_loop() -> None:
+    """Re-warm idle sessions before their cookies expire so requests never pay for it."""
+    while True:
+        time.sleep(NSE_COOKIE_TTL / 4)
+        with _idle_lock:
+            stale = [s for s in _idle if _is_stale(s, NSE_COOKIE_TTL * 0.75)]
+            for s in stale:
+                _idle.remove(s)
+        for sess in stale:
+            try:
+                _warm(sess)
+            except Exception as e:
+                logger.warning("NSE session refresh failed: %s", e)
+                sess.close()
+                continue
+            with _idle_lock:
+                _idle.append(sess)
+
+
+def _ensure_refresher() -> None:
+    global _refresher_started
+    with _idle_lock:
+        if _refresher_started:
+            return
+        _refresher_started = True
+    threading.Thread(target=_refresh_loop, name="nse-cookie-refresh", daemon=True).start()
+
+
+def warm_pool(size: int = NSE_POOL_SIZE) -> None:
+    """Open and warm `size` sessions up front (e.g. at bot start-up)."""
+    _ensure_refresher()
+    for _ in range(size):
+        try:
+            sess = _new_session()
+        except Exception as e:
+            logger.warning("NSE session warm-up failed: %s", e)
+            return
+        with _idle_lock:
+            if len(_idle) >= NSE_POOL_SIZE:
+                sess.close()
+                return
+            _idle.append(sess)
@@ -1,25 +1,26 @@
 import yfinance as yf
 import pandas as pd
 
-def get_ohlcv(symbol: str) -> pd.DataFrame:
+from config import OHLCV_HISTORY_PERIOD
+from services import ohlcv_store
+from services.indicator_state import sync_state
+
+NEEDED = ['open', 'high', 'low', 'close', 'volume']
+
+
+def to_yf_symbol(symbol: str) -> str:
+    """Ensure NSE suffix."""
+    return symbol if symbol.upper().endswith('.NS') else symbol.upper() + '.NS'
+
+
+def normalize_ohlcv(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Fetches the OHLCV data for a given symbol from Yahoo Finance (NSE).
-    Returns a DataFrame with lowercase columns: open, high, low, close, volume.
+    Normalize a raw yfinance frame to lowercase columns: open, high, low, close, volume.
     Handles MultiIndex columns from yfinance and strips ticker suffix.
+    Returns an empty DataFrame if the frame is unusable.
     """
-    # Ensure NSE suffix
-    yf_symbol = symbol if symbol.upper().endswith('.NS') else symbol.upper() + '.NS'
-    # Download raw data without auto-adjust to keep OHLCV
-    df = yf.download(
-        yf_symbol,
-        period="6mo",
-        interval="1d",
-        progress=False,
-        auto_adjust=False
-    )
-
     # Validate
-    if df is None or df.empty or not isinstance(df, pd.DataFrame):
+    if df is None or not isinstance(df, pd.DataFrame) or df.empty:
         return pd.DataFrame()
 
     # Flatten MultiIndex columns if present
@@ -32,13 +33,85 @@ def get_ohlcv(symbol: str) -> pd.DataFrame:
     df.columns = [col.split('_')[0].lower() for col in df.columns]
 
     # Select only needed columns
-    needed = ['open', 'high', 'low', 'close', 'volume']
-    if not all(col in df.columns for col in needed):
+    if not all(col in df.columns for col in NEEDED):
         print(f"❌ Missing expected OHLCV columns. Available: {list(df.columns)}")
         return pd.DataFrame()
-    df = df[needed]
+    df = df[NEEDED].dropna(subset=['close'])
 
-    # Ensure datetime index
+    # Ensure tz-naive datetime index
     df.index = pd.to_datetime(df.index)
+    if df.index.tz is not None:
+        df.index = df.index.tz_localize(None)
 
     return df
+
+
+def _download(yf_symbol: str, **kwargs) -> pd.DataFrame:
+    # Download raw data without auto-adjust to keep OHLCV
+    df = yf.download(
+        yf_symbol,
+        interval="1d",
+        progress=False,
+        auto_adjust=False,
+        **kwargs
+    )
+    return normalize_ohlcv(df)
+
+
+def _period_start(end: pd.Timestamp, period: str):
+    """Translate a yfinance-style period ('5d', '6mo', '2y', 'max') into a start date."""
+    if period == 'max':
+        return None
+    if period.endswith('mo'):
+        return end - pd.DateOffset(months=int(period[:-2]))
+    if period.endswith('y'):
+        return end - pd.DateOffset(years=int(period[:-1]))
+    if period.endswith('d'):
+        return end - pd.DateOffset(days=int(period[:-1]))
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def get_ohlcv(symbol: str, period: str = "6mo") -> pd.DataFrame:
+    """
+    Returns the last `period` of daily OHLCV for a given NSE symbol as a
+    DataFrame with lowercase columns: open, high, low, close, volume.
+
+    Bars are served from the local store (services/ohlcv_store.py). The
+    first request downloads OHLCV_HISTORY_PERIOD of history; afterwards only
+    bars from the last stored date onwards are fetched and appended, and not
+    more often than every OHLCV_REFRESH_SECONDS. The symbol's persisted
+    indicator state (services/indicator_state.py) follows every refresh.
+    """
+    yf_symbol = to_yf_symbol(symbol)
+    key = yf_symbol[:-3]
+
+    with ohlcv_store.symbol_lock(key):
+        df = ohlcv_store.load(key)
+        if df.empty:
+            df = ohlcv_store.append(key, _download(yf_symbol, period=OHLCV_HISTORY_PERIOD))
+            sync_state(key, df)
+        elif not ohlcv_store.is_fresh(key):
+            # Re-fetch the last stored bar too, it may have been an intraday snapshot
+            start = df.index[-1].strftime('%Y-%m-%d')
+            try:
+                df = ohlcv_store.append(key, _download(yf_symbol, start=start))
+                sync_state(key, df)
+            except Exception as e:
+                print(f"⚠️ Incremental OHLCV fetch failed for {key}: {e}")
+
+    if df.empty:
+        return pd.DataFrame()
+
+    start = _period_start(df.index[-1], period)
+    return df if start is None else df[df.index > start]
+
+
+def get_indicator_values(symbol: str) -> dict:
+    """
+    Latest indicator values for `symbol` from its persisted IndicatorState,
+    brought up to date with the full stored history first (a no-op when the
+    last refresh already synced it). {} if nothing is stored.
+    """
+    key = to_yf_symbol(symbol)[:-3]
+    with ohlcv_store.symbol_lock(key):
+        return sync_state(key, ohlcv_store.load(key))
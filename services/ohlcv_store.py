@@ -0,0 +1,119 @@
+# services/ohlcv_store.py
+import os
+import time
+import zlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_DIR, OHLCV_REFRESH_SECONDS
+
+STORE_DIR = os.path.join(DATA_DIR, "ohlcv")
+FIELDS    = ['open', 'high', 'low', 'close', 'volume']
+
+# One record per daily bar; saved as a plain .npy so it can be memory-mapped
+BAR_DTYPE = np.dtype([('date', 'M8[D]')] + [(f, 'f8') for f in FIELDS])
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _path(symbol: str) -> str:
+    return os.path.join(STORE_DIR, f"{symbol.upper()}.npy")
+
+
+def symbol_lock(symbol: str) -> threading.Lock:
+    """Per-symbol lock so concurrent queries don't fetch/write the same file twice."""
+    with _locks_guard:
+        return _locks.setdefault(symbol.upper(), threading.Lock())
+
+
+def load(symbol: str) -> pd.DataFrame:
+    """
+    Load the stored daily bars for `symbol`.
+    Returns a DataFrame with a DatetimeIndex and lowercase OHLCV columns,
+    or an empty DataFrame if nothing is stored yet.
+    """
+    path = _path(symbol)
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    try:
+        bars = np.load(path, mmap_mode='r')
+    except Exception:
+        return pd.DataFrame()
+    if len(bars) == 0:
+        return pd.DataFrame()
+    df = pd.DataFrame({f: np.asarray(bars[f]) for f in FIELDS},
+                      index=pd.DatetimeIndex(np.asarray(bars['date']).astype('M8[ns]')))
+    return df
+
+
+def save(symbol: str, df: pd.DataFrame) -> None:
+    """Write `df` (sorted, de-duplicated by date) atomically: temp file then rename."""
+    os.makedirs(STORE_DIR, exist_ok=True)
+    bars = np.empty(len(df), dtype=BAR_DTYPE)
+    bars['date'] = df.index.values.astype('M8[D]')
+    for f in FIELDS:
+        bars[f] = df[f].to_numpy(dtype='f8')
+    path = _path(symbol)
+    tmp  = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as fh:
+        np.save(fh, bars)
+    os.replace(tmp, path)
+
+
+def append(symbol: str, new_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merge `new_df` into the stored series and save it.
+    Bars dated on or after an existing bar replace it, so re-fetching the
+    last (possibly intraday) bar keeps it current.
+    """
+    old = load(symbol)
+    if new_df is None or new_df.empty:
+        touch(symbol)
+        return old
+    new_df = new_df[FIELDS].copy()
+    new_df.index = pd.DatetimeIndex(new_df.index).normalize()
+    if old.empty:
+        merged = new_df
+    else:
+        merged = pd.concat([old[old.index < new_df.index.min()], new_df])
+    merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+    save(symbol, merged)
+    return merged
+
+
+def last_date(symbol: str):
+    """Date of the last stored bar, or None."""
+    df = load(symbol)
+    return None if df.empty else df.index[-1]
+
+
+def touch(symbol: str) -> None:
+    """Mark the stored series as checked now, even when no new bars arrived."""
+    path = _path(symbol)
+    if os.path.exists(path):
+        os.utime(path, None)
+
+
+def is_fresh(symbol: str, max_age: int = OHLCV_REFRESH_SECONDS) -> bool:
+    """True if the stored series was written or checked within `max_age` seconds."""
+    path = _path(symbol)
+    return os.path.exists(path) and (time.time() - os.path.getmtime(path)) < max_age
+
+
+def bar_id(df: pd.DataFrame) -> str:
+    """
+    Identity of the last bar: its date plus a checksum of its values, since
+    the last bar may be an intraday snapshot that changes during the day.
+    """
+    last = df[FIELDS].iloc[-1].to_numpy(dtype='f8')
+    return f"{df.index[-1]:%Y%m%d}-{zlib.crc32(last.tobytes()):08x}"
+
+
+def stored_symbols() -> list:
+    """Every symbol with a stored series, sorted."""
+    if not os.path.isdir(STORE_DIR):
+        return []
+    return sorted(f[:-4] for f in os.listdir(STORE_DIR) if f.endswith('.npy'))
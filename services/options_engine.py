@@ -1,24 +1,142 @@
 # services/options_engine.py
+import time
+import threading
+
+import numpy as np
 import pandas as pd
-from nsepython import nse_optionchain_scrapper
+from config import OPTION_CHAIN_TTL
+from services import nse_client
+
+# Index symbols use a different NSE option chain endpoint
+INDEX_SYMBOLS = {"NIFTY", "BANKNIFTY", "FINNIFTY", "MIDCPNIFTY", "NIFTYNXT50"}
+
+_snapshots = {}      # symbol -> (expires_at, metrics)
+_snapshot_lock = threading.Lock()
+
 
 def get_option_chain(symbol: str) -> pd.DataFrame:
     """
-    Fetch option chain data for an NSE equity symbol via nsepython.
+    Fetch option chain data for an NSE equity (or index) symbol through the
+    pooled NSE client.
     Returns a DataFrame with columns:
       - strike
+      - expiry
       - call_open_interest
       - put_open_interest
     """
-    data = nse_optionchain_scrapper(symbol.upper())
+    sym = symbol.upper()
+    kind = "indices" if sym in INDEX_SYMBOLS else "equities"
+    data = nse_client.get_json(
+        f"/api/option-chain-{kind}",
+        params={"symbol": sym},
+        referer="https://www.nseindia.com/option-chain",
+    )
     records = []
     for itm in data.get("records", {}).get("data", []):
         strike = itm.get("strikePrice")
-        ce     = itm.get("CE", {})
-        pe     = itm.get("PE", {})
+        ce     = itm.get("CE") or {}
+        pe     = itm.get("PE") or {}
         records.append({
             "strike": strike,
+            "expiry": itm.get("expiryDate"),
             "call_open_interest": ce.get("openInterest", 0),
             "put_open_interest":  pe.get("openInterest", 0),
         })
     return pd.DataFrame(records)
+
+
+def _nearest_expiry(opt_df: pd.DataFrame):
+    """Rows of the nearest expiry ('28-Nov-2024' style dates); all rows if unknown."""
+    if 'expiry' not in opt_df.columns or opt_df['expiry'].isna().all():
+        return opt_df, None
+    expiries = pd.to_datetime(opt_df['expiry'], format='%d-%b-%Y', errors='coerce')
+    if expiries.isna().all():
+        return opt_df, None
+    nearest = expiries.min()
+    return opt_df[expiries == nearest], nearest.strftime('%Y-%m-%d')
+
+
+def max_pain(strikes: np.ndarray, call_oi: np.ndarray, put_oi: np.ndarray) -> float:
+    """
+    True max pain: the settlement strike that minimizes total option-writer payout.
+
+    For settlement at K_j (strikes sorted ascending):
+      calls pay  sum_{i<=j} C_i (K_j - K_i) = K_j * cumC_j - cumCK_j
+      puts  pay  sum_{i>=j} P_i (K_i - K_j) = sufPK_j - K_j * sufP_j
+    so every candidate is evaluated with prefix/suffix sums in O(n).
+    """
+    order = np.argsort(strikes)
+    k, c, p = strikes[order], call_oi[order], put_oi[order]
+    call_pay = k * np.cumsum(c) - np.cumsum(c * k)
+    put_pay  = np.cumsum((p * k)[::-1])[::-1] - k * np.cumsum(p[::-1])[::-1]
+    return float(k[np.argmin(call_pay + put_pay)])
+
+
+def compute_option_metrics(opt_df: pd.DataFrame, top_n: int = 3) -> dict:
+    """
+    Option chain analytics for the nearest expiry:
+      - Max Call/Put OI strike and interest
+      - Max pain strike (see max_pain)
+      - PCR (total put OI / total call OI)
+      - OI concentration: % of total OI sitting in the `top_n` strikes
+    Returns {} if the chain is empty or malformed.
+    """
+    if not isinstance(opt_df, pd.DataFrame) or opt_df.empty:
+        return {}
+    opt_df = opt_df.rename(columns=str.lower)
+    if not {'strike', 'call_open_interest', 'put_open_interest'}.issubset(opt_df.columns):
+        return {}
+
+    rows, expiry = _nearest_expiry(opt_df)
+    chain = (
+        rows[['strike', 'call_open_interest', 'put_open_interest']]
+        .apply(pd.to_numeric, errors='coerce')
+        .dropna(subset=['strike'])
+        .fillna(0)
+        .groupby('strike', as_index=False).sum()
+    )
+    if chain.empty:
+        return {}
+
+    strikes = chain['strike'].to_numpy(dtype=float)
+    calls   = chain['call_open_interest'].to_numpy(dtype=float)
+    puts    = chain['put_open_interest'].to_numpy(dtype=float)
+    total   = calls + puts
+
+    total_calls, total_puts = calls.sum(), puts.sum()
+    mc, mp = int(np.argmax(calls)), int(np.argmax(puts))
+    top = np.sort(total)[-top_n:]
+
+    return {
+        'expiry':               expiry,
+        'top_call_oi_strike':   round(float(strikes[mc]), 2),
+        'top_call_oi_interest': int(calls[mc]),
+        'top_put_oi_strike':    round(float(strikes[mp]), 2),
+        'top_put_oi_interest':  int(puts[mp]),
+        'max_pain_strike':      round(max_pain(strikes, calls, puts), 2),
+        'pcr':                  round(float(total_puts / total_calls), 2) if total_calls else None,
+        'oi_concentration':     round(float(top.sum() / total.sum() * 100), 2) if total.sum() else None,
+    }
+
+
+def get_option_snapshot(symbol: str, ttl: int = OPTION_CHAIN_TTL) -> dict:
+    """
+    Option chain metrics for `symbol`, cached for `ttl` seconds.
+    Symbols without F&O (or failed fetches) cache an empty dict for the same
+    TTL so they aren't re-scraped on every query.
+    """
+    sym = symbol.upper()
+    now = time.monotonic()
+    with _snapshot_lock:
+        cached = _snapshots.get(sym)
+        if cached and cached[0] > now:
+            return cached[1]
+
+    try:
+        metrics = compute_option_metrics(get_option_chain(sym))
+    except Exception:
+        metrics = {}
+
+    with _snapshot_lock:
+        _snapshots[sym] = (now + ttl, metrics)
+    return metrics
@@ -0,0 +1,266 @@
+# services/outbound_queue.py
+import time
+import random
+import asyncio
+import logging
+import itertools
+
+from telegram.error import RetryAfter, BadRequest, NetworkError
+
+from config import (
+    OUTBOUND_GLOBAL_RATE, OUTBOUND_CHAT_RATE, OUTBOUND_CHAT_BURST,
+    OUTBOUND_GROUP_RATE, OUTBOUND_MAX_ATTEMPTS, OUTBOUND_DRAIN_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+# Priorities: lower goes first
+INTERACTIVE = 0    # replies to a user's own command or query
+ALERT       = 1    # triggered alerts
+BROADCAST   = 2    # digests and other fan-outs
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', ALERT: 'alert', BROADCAST: 'broadcast'}
+
+MAX_IDLE_BUCKETS = 10000   # per-chat buckets kept before idle ones are dropped
+
+
+class TokenBucket:
+    """`rate` tokens per second up to `capacity`; block() empties it for a while (flood control)."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate          = rate
+        self.capacity      = capacity
+        self.tokens        = capacity
+        self.stamp         = time.monotonic()
+        self.blocked_until = 0.0
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def block(self, seconds: float, now: float):
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = 0.0
+
+    def idle(self, now: float) -> bool:
+        return self.wait_time(now) == 0 and self.tokens >= self.capacity
+
+
+class _Job:
+    __slots__ = ('chat_id', 'factory', 'priority', 'future', 'attempts', 'enqueued')
+
+    def __init__(self, chat_id, factory, priority, future):
+        self.chat_id  = chat_id
+        self.factory  = factory
+        self.priority = priority
+        self.future   = future
+        self.attempts = 0
+        self.enqueued = time.monotonic()
+
+
+class OutboundQueue:
+    """
+    Rate-limited delivery of outgoing Telegram calls.
+
+    Every send goes through a global token bucket (Telegram's ~30 msg/s
+    bot limit) and a per-chat bucket (~1 msg/s, 20/min for groups). Jobs
+    wait in one priority queue, so interactive replies overtake queued
+    broadcasts. A job whose chat is still rate-limited is set aside until
+    its chat has a token, and does not hold up other chats. RetryAfter
+    pauses the chat and the global bucket for the requested time before
+    the job is retried, and network errors back off exponentially.
+    """
+
+    def __init__(self):
+        self._queue    = None
+        self._task     = None
+        self._seq      = itertools.count()
+        # Small global burst so sends stay evenly spread within each second
+        self._global   = TokenBucket(OUTBOUND_GLOBAL_RATE, max(1.0, OUTBOUND_GLOBAL_RATE / 10))
+        self._chats    = {}
+        self._deferred = 0
+        self._depth    = {p: 0 for p in PRIORITY_NAMES}
+        self._sending  = set()
+        self._timers   = set()      # call_later handles of deferred jobs
+        self._pending  = set()      # futures of jobs not yet delivered or failed
+        self.metrics   = {'sent': 0, 'failed': 0, 'retried': 0, 'retry_after': 0, 'wait_total': 0.0}
+
+    # ── lifecycle ──────────────────────────────────────────────────────
+    def start(self):
+        """Start the dispatcher on the running event loop (e.g. from post_init)."""
+        if self._task is None:
+            self._queue = asyncio.PriorityQueue()
+            self._task = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def stop(self, timeout: float = OUTBOUND_DRAIN_TIMEOUT):
+        """
+        Drain the queue: keep dispatching until every queued, deferred and
+        in-flight message is delivered or failed, for at most `timeout`
+        seconds. Then stop the dispatcher and fail whatever is left, so no
+        caller awaiting a send hangs. Call it while the bot can still send
+        (post_stop, before the application shuts down).
+        """
+        if self._task is None:
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self._pending and loop.time() < deadline:
+            await asyncio.wait(list(self._pending), timeout=deadline - loop.time())
+
+        self._task.cancel()
+        for handle in self._timers:
+            handle.cancel()
+        self._timers.clear()
+        for task in self._sending:
+            task.cancel()
+        await asyncio.gather(self._task, *self._sending, return_exceptions=True)
+        self._task = None
+
+        left = [f for f in self._pending if not f.done()]
+        for future in left:
+            future.set_exception(RuntimeError("Outbound queue stopped before the message was sent"))
+        if left:
+            logger.warning("Outbound queue stopped with %d undelivered messages", len(left))
+        self._pending.clear()
+        self._queue = None
+        self._depth = {p: 0 for p in PRIORITY_NAMES}
+        self._deferred = 0
+
+    # ── producers ──────────────────────────────────────────────────────
+    def submit(self, chat_id: int, factory, priority: int = BROADCAST) -> asyncio.Future:
+        """
+        Queue `factory` (a no-argument callable returning the Telegram API
+        coroutine, e.g. lambda: bot.send_message(chat_id, text)) and return
+        a future for its result.
+        """
+        future = asyncio.get_running_loop().create_future()
+        job = _Job(chat_id, factory, priority, future)
+        if self._task is None:
+            # Dispatcher not running (scripts, tests): send directly
+            asyncio.ensure_future(self._deliver(job))
+        else:
+            self._pending.add(future)
+            future.add_done_callback(self._pending.discard)
+            self._put(job)
+        return future
+
+    async def send(self, chat_id: int, factory, priority: int = INTERACTIVE):
+        return await self.submit(chat_id, factory, priority)
+
+    def _put(self, job: _Job, seq: int = None):
+        self._depth[job.priority] += 1
+        self._queue.put_nowait((job.priority, next(self._seq) if seq is None else seq, job))
+
+    def _requeue_later(self, job: _Job, delay: float):
+        self._deferred += 1
+
+        def put():
+            self._timers.discard(handle)
+            self._deferred -= 1
+            self._put(job)
+        handle = asyncio.get_running_loop().call_later(delay, put)
+        self._timers.add(handle)
+
+    # ── dispatcher ─────────────────────────────────────────────────────
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= MAX_IDLE_BUCKETS:
+                now = time.monotonic()
+                self._chats = {c: b for c, b in self._chats.items() if not b.idle(now)}
+            # Negative chat ids are groups and channels
+            rate = OUTBOUND_GROUP_RATE if chat_id < 0 else OUTBOUND_CHAT_RATE
+            bucket = self._chats[chat_id] = TokenBucket(rate, OUTBOUND_CHAT_BURST)
+        return bucket
+
+    async def _dispatch(self):
+        while True:
+            priority, seq, job = await self._queue.get()
+            self._depth[priority] -= 1
+            now = time.monotonic()
+
+            chat_wait = self._chat_bucket(job.chat_id).wait_time(now)
+            if chat_wait > 0:
+                self._requeue_later(job, chat_wait)
+                continue
+
+            global_wait = self._global.wait_time(now)
+            if global_wait > 0:
+                # Put it back and wait: anything more urgent that arrives meanwhile goes first
+                self._put(job, seq)
+                await asyncio.sleep(global_wait)
+                continue
+
+            self._chat_bucket(job.chat_id).take()
+            self._global.take()
+            self.metrics['wait_total'] += now - job.enqueued
+            task = asyncio.get_running_loop().create_task(self._deliver(job))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _deliver(self, job: _Job):
+        job.attempts += 1
+        try:
+            result = await job.factory()
+        except RetryAfter as e:
+            self.metrics['retry_after'] += 1
+            delay = float(e.retry_after)
+            now = time.monotonic()
+            self._chat_bucket(job.chat_id).block(delay, now)
+            self._global.block(delay, now)
+            logger.warning("Flood control for chat %s: retry in %ss", job.chat_id, delay)
+            self._retry(job, delay + random.uniform(0, 1), e)
+        except BadRequest as e:
+            self._fail(job, e)
+        except NetworkError as e:
+            self._retry(job, min(2 ** job.attempts, 30) + random.uniform(0, 1), e)
+        except Exception as e:
+            self._fail(job, e)
+        else:
+            self.metrics['sent'] += 1
+            if not job.future.done():
+                job.future.set_result(result)
+
+    def _retry(self, job: _Job, delay: float, error: Exception):
+        if job.attempts >= OUTBOUND_MAX_ATTEMPTS or self._task is None:
+            self._fail(job, error)
+            return
+        self.metrics['retried'] += 1
+        self._requeue_later(job, delay)
+
+    def _fail(self, job: _Job, error: Exception):
+        self.metrics['failed'] += 1
+        logger.warning("Delivery to chat %s failed: %s", job.chat_id, error)
+        if not job.future.done():
+            job.future.set_exception(error)
+
+    # ── metrics ────────────────────────────────────────────────────────
+    def stats(self) -> dict:
+        """Queue depth by priority plus delivery counters."""
+        sent = self.metrics['sent']
+        return {
+            'queued':      {PRIORITY_NAMES[p]: n for p, n in self._depth.items()},
+            'deferred':    self._deferred,
+            'sending':     len(self._sending),
+            'sent':        sent,
+            'failed':      self.metrics['failed'],
+            'retried':     self.metrics['retried'],
+            'retry_after': self.metrics['retry_after'],
+            'avg_wait_ms': round(self.metrics['wait_total'] / sent * 1000, 1) if sent else 0.0,
+        }
+
+
+OUTBOX = OutboundQueue()
+
+
+async def reply(update, text: str, **kwargs):
+    """Interactive reply to `update` through the outbound queue."""
+    return await OUTBOX.send(
+        update.effective_chat.id, lambda: update.message.reply_text(text, **kwargs), INTERACTIVE
+    )
@@ -1,74 +1,180 @@
+# services/pdf_generator.py
 import os
+import re
+import asyncio
 import datetime
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import fpdf
 from fpdf import FPDF
 
+from config import REPORTS_DIR, REPORT_CACHE_SIZE, PDF_WORKERS, PDF_FONT, PDF_FONT_BOLD
+from services.result_cache import ResultCache
+from services.structured_report import generate_report_sections
+
+# Fonts are parsed once per process (load_fonts); don't write .pkl metric files next to the TTFs
+fpdf.set_global("FPDF_CACHE_MODE", 1)
+
+# <bar_id>.pdf; <YYYY-MM-DD>.pdf names from before reports were keyed on the full bar
+PDF_FILE_RE = re.compile(r"(\d{8}-[0-9a-f]{8}|\d{4}-\d{2}-\d{2})\.pdf")
+
+_fonts = None   # (fonts, font_files) of the parsed TrueType fonts, per process
+
+
+def load_fonts():
+    """
+    Parse the report's TrueType fonts once per process (the PDF pool's
+    worker initializer). Returns None when the font files are missing, in
+    which case reports fall back to the latin-1 core fonts.
+    """
+    global _fonts
+    if _fonts is None:
+        _fonts = ()
+        if os.path.exists(PDF_FONT) and os.path.exists(PDF_FONT_BOLD):
+            pdf = FPDF()
+            pdf.add_font("DejaVu", "", PDF_FONT, uni=True)
+            pdf.add_font("DejaVu", "B", PDF_FONT_BOLD, uni=True)
+            _fonts = (pdf.fonts, pdf.font_files)
+    return _fonts or None
+
+
 class PDFReport(FPDF):
+    def __init__(self):
+        super().__init__()
+        fonts = load_fonts()
+        self.unicode = fonts is not None
+        self.family  = "DejaVu" if self.unicode else "Arial"
+        if self.unicode:
+            # Reuse the parsed metrics; per-document state (index, glyph subset) is copied
+            for key, font in fonts[0].items():
+                self.fonts[key] = dict(font, i=len(self.fonts) + 1, subset=list(font['subset']))
+            self.font_files.update({name: dict(entry) for name, entry in fonts[1].items()})
+
     def header(self):
-        self.set_font("Arial", "B", 12)
-        self.cell(0, 10, "📘 Stock Technical & Fundamental Snapshot", ln=True, align="C")
+        self.set_font(self.family, "B", 12)
+        self.cell(0, 10, "Stock Technical & Fundamental Snapshot", ln=True, align="C")
         self.ln(10)
 
     def section_title(self, title):
-        self.set_font("Arial", "B", 10)
+        self.set_font(self.family, "B", 10)
         self.set_text_color(30, 30, 30)
         self.cell(0, 8, title, ln=True)
 
     def section_body(self, body):
-        self.set_font("Arial", "", 9)
+        self.set_font(self.family, "", 9)
         self.set_text_color(50, 50, 50)
         self.multi_cell(0, 6, body)
         self.ln()
 
-def generate_pdf_report(symbol, report_data):
+
+def _last_bar(analysis: dict) -> str:
+    """bar_id of the bar the analysis was computed from (today's date if unknown)."""
+    return analysis.get('bar_id') or f"{datetime.date.today():%Y%m%d}-00000000"
+
+
+def report_path(symbol: str, last_bar: str) -> str:
+    return os.path.join(REPORTS_DIR, f"{symbol.upper()}_{last_bar}.pdf")
+
+
+def generate_pdf_report(symbol, analysis, fund=None, af=None, path=None):
+    """
+    Write the stock report for `analysis` (an analyze_stock result) to
+    `path` (default reports/<SYMBOL>_<bar_id>.pdf) and return the path,
+    or None on failure. Sections come from the same templates as the chat
+    report.
+    """
     try:
-        today = datetime.datetime.today().strftime('%Y-%m-%d')
+        output_path = path or report_path(symbol, _last_bar(analysis))
         pdf = PDFReport()
         pdf.add_page()
 
-        # Title
-        pdf.set_font("Arial", "B", 12)
-        pdf.cell(0, 10, f"📘 {symbol.upper()} – TECHNICAL & FUNDAMENTAL SNAPSHOT", ln=True)
-        pdf.cell(0, 10, f"🗓️ {today}", ln=True)
-        pdf.ln(5)
-
-        # Add sections from report_data
-        section_map = {
-            "price": "Price",
-            "support_zone": "Support Zone",
-            "resistance_zone": "Resistance Zone",
-            "trend": "Trend",
-            "rsi": "RSI",
-            "ema_21": "EMA 21",
-            "ema_50": "EMA 50",
-            "ema_200": "EMA 200",
-            "volume": "Volume",
-            "volume_avg": "Volume Avg",
-            "volume_signal": "Volume Signal",
-            "breakout_signal": "Breakout Signal",
-            "candlestick": "Candlestick Pattern",
-            "structure_daily": "Structure – Daily",
-            "structure_weekly": "Structure – Weekly"
-        }
-
-        for key, title in section_map.items():
-            if key in report_data:
-                value = report_data[key]
-                pdf.section_title(f"📌 {title}")
-                pdf.section_body(str(value))
-
-        # Disclaimer
-        pdf.set_text_color(150, 0, 0)
-        pdf.set_font("Arial", "I", 8)
-        pdf.multi_cell(0, 6, "\n⚠️ Disclaimer: This is an auto-generated report for informational purposes only. Please consult your financial advisor before making any investment decisions.")
-
-        # Save file
-        filename = f"{symbol.upper()}_{today}.pdf"
-        output_path = os.path.join("reports", filename)
-        os.makedirs("reports", exist_ok=True)
-        pdf.output(output_path.encode('latin-1'))  # Avoid unicode errors in filename
+        target = 'pdf_unicode' if pdf.unicode else 'pdf'
+        for title, body in generate_report_sections(symbol, analysis, fund, af, target=target):
+            if title:
+                pdf.section_title(title)
+                pdf.section_body(body)
+            else:
+                # Untitled sections: report heading and disclaimer
+                pdf.set_font(pdf.family, "B", 11)
+                pdf.set_text_color(0, 0, 0)
+                pdf.multi_cell(0, 7, body)
+                pdf.ln(3)
+
+        # Write atomically so a half-written file is never served from the cache
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        tmp = f"{output_path}.{os.getpid()}.tmp"
+        pdf.output(tmp)
+        os.replace(tmp, output_path)
         return output_path
 
     except Exception as e:
         print("❌ PDF GENERATION FAILED:")
         print(e)
         return None
+
+
+# ── pooled rendering ───────────────────────────────────────────────────
+_pool = None
+_pool_lock = threading.Lock()
+
+# (symbol, last bar) -> PDF path; concurrent requests for one report share a render
+PDF_CACHE = ResultCache(max_entries=REPORT_CACHE_SIZE, ttl=24 * 3600)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Not forked from the bot process (its threads and event loop); see chart_service
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, initializer=load_fonts,
+                                        mp_context=multiprocessing.get_context("forkserver"))
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _remove_stale(symbol: str, last_bar: str):
+    """Delete the symbol's PDFs drawn from any bar other than `last_bar`."""
+    prefix = f"{symbol}_"
+    keep = os.path.basename(report_path(symbol, last_bar))
+    try:
+        names = os.listdir(REPORTS_DIR)
+    except FileNotFoundError:
+        return
+    for name in names:
+        if name.startswith(prefix) and PDF_FILE_RE.fullmatch(name[len(prefix):]) and name != keep:
+            try:
+                os.remove(os.path.join(REPORTS_DIR, name))
+            except OSError:
+                pass
+
+
+async def build_pdf_report(symbol: str, analysis: dict):
+    """
+    Path of the PDF report for `analysis`, rendered at most once per
+    (symbol, last bar): an existing file for that bar is reused,
+    concurrent requests share one render, and rendering runs in the PDF
+    process pool so it never blocks the event loop. None on failure.
+    """
+    symbol = symbol.upper()
+    last_bar = _last_bar(analysis)
+    path = report_path(symbol, last_bar)
+
+    async def render():
+        if os.path.exists(path):
+            return path
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(_get_pool(), generate_pdf_report, symbol, analysis, None, None, path)
+        if result:
+            await loop.run_in_executor(None, _remove_stale, symbol, last_bar)
+        return result
+
+    return await PDF_CACHE.get_or_compute((symbol, last_bar), render, should_cache=lambda p: p is not None)
@@ -1,23 +1,216 @@
-def detect_price_structure(df):
-    try:
-        if df.shape[0] < 4:
-            return "Not Enough Data"
+# services/price_structure.py
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+SWING_BARS = 2     # bars on each side a pivot must dominate
+MAX_PIVOTS = 10    # pivots kept per side by StructureState
+
+HH_HL = "Higher High – Higher Low"
+LH_LL = "Lower High – Lower Low"
+
+
+def find_swings(high, low, k: int = SWING_BARS) -> tuple:
+    """
+    Confirmed swing highs/lows over the full series in one vectorized pass.
+
+    Bar i is a swing high when its high is above the k bars before it and
+    not below the k bars after it (ties go to the earlier bar); swing lows
+    mirror this. A pivot is only known k bars later, at bar i + k.
+    Inputs have time on axis 0 (one symbol, or a dates × symbols panel).
+
+    Returns:
+        (is_swing_high, is_swing_low): bool arrays shaped like the inputs.
+    """
+    h, l = np.asarray(high, dtype=float), np.asarray(low, dtype=float)
+    is_high, is_low = np.zeros(h.shape, dtype=bool), np.zeros(l.shape, dtype=bool)
+    if len(h) < 2 * k + 1:
+        return is_high, is_low
+
+    def windows(a):
+        return sliding_window_view(a, 2 * k + 1, axis=0)   # (..., 2k+1) per center bar
+
+    wh, wl = windows(h), windows(l)
+    ch, cl = wh[..., k], wl[..., k]
+    is_high[k:-k] = (ch > wh[..., :k].max(axis=-1)) & (ch >= wh[..., k + 1:].max(axis=-1))
+    is_low[k:-k]  = (cl < wl[..., :k].min(axis=-1)) & (cl <= wl[..., k + 1:].min(axis=-1))
+    return is_high, is_low
+
+
+def classify_structure(last_high, prev_high, last_low, prev_low):
+    """
+    Label the structure from the last two swing highs and lows
+    (scalars or arrays; NaN means the pivot doesn't exist yet).
+    """
+    last_high, prev_high, last_low, prev_low = (
+        np.asarray(x, dtype=float) for x in (last_high, prev_high, last_low, prev_low))
+    hh, lh = last_high > prev_high, last_high < prev_high
+    hl, ll = last_low > prev_low, last_low < prev_low
+    missing = np.isnan(prev_high) | np.isnan(prev_low)
+    out = np.select(
+        [missing, hh & hl, lh & ll, hh & ll, lh & hl],
+        ["Not Enough Data", HH_HL, LH_LL, "Expansion", "Contraction"],
+        default="Mixed Trend",
+    ).astype(object)
+    return out if out.ndim else out.item()
+
+
+def _ffill(a: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs along axis 0."""
+    idx = np.where(np.isnan(a), 0, np.arange(len(a)).reshape((-1,) + (1,) * (a.ndim - 1)))
+    idx = np.maximum.accumulate(idx, axis=0)
+    if a.ndim == 1:
+        return a[idx]
+    return np.take_along_axis(a, idx, axis=0)
+
+
+def _last_two_pivots(values: np.ndarray, is_pivot: np.ndarray, k: int) -> tuple:
+    """Latest and previous pivot price known at each bar (pivots confirm k bars late)."""
+    confirmed = np.full(values.shape, np.nan)
+    confirmed[k:] = np.where(is_pivot[:len(values) - k], values[:len(values) - k], np.nan)
+    last = _ffill(confirmed)
+    before = np.full(values.shape, np.nan)
+    before[1:] = last[:-1]
+    prev = _ffill(np.where(np.isnan(confirmed), np.nan, before))
+    return last, prev
 
-        highs = df['high'].values[-4:]
-        lows = df['low'].values[-4:]
 
-        if highs[3] > highs[2] > highs[1] > highs[0] and lows[3] > lows[2] > lows[1] > lows[0]:
-            return "Higher High – Higher Low"
+def structure_series(high, low, k: int = SWING_BARS) -> np.ndarray:
+    """
+    Structure label at every bar, using only pivots confirmed by that bar,
+    so it can be used across history (scans, backtests) without look-ahead.
+    Linear in the number of bars; works on 1-D series and 2-D panels.
+    """
+    h, l = np.asarray(high, dtype=float), np.asarray(low, dtype=float)
+    is_high, is_low = find_swings(h, l, k)
+    last_h, prev_h = _last_two_pivots(h, is_high, k)
+    last_l, prev_l = _last_two_pivots(l, is_low, k)
+    return classify_structure(last_h, prev_h, last_l, prev_l)
 
-        if highs[3] < highs[2] < highs[1] < highs[0] and lows[3] < lows[2] < lows[1] < lows[0]:
-            return "Lower High – Lower Low"
 
-        if highs[3] > highs[2] and lows[3] < lows[2]:
-            return "Expansion"
+def swing_levels(df: pd.DataFrame, k: int = SWING_BARS) -> dict:
+    """
+    Confirmed pivots of an OHLC frame plus the swing levels around the last close.
 
-        if highs[3] < highs[2] and lows[3] > lows[2]:
-            return "Contraction"
+    Returns:
+        dict: {
+            'swing_highs': [(date, price), ...], 'swing_lows': [...],
+            'structure': label,
+            'swing_support':    nearest recent swing low below the close (or None),
+            'swing_resistance': nearest recent swing high above the close (or None)
+        }
+    """
+    is_high, is_low = find_swings(df['high'], df['low'], k)
+    highs = list(zip(df.index[is_high], df['high'].to_numpy()[is_high]))
+    lows  = list(zip(df.index[is_low], df['low'].to_numpy()[is_low]))
+    return _levels(highs, lows, float(df['close'].iloc[-1]))
 
-        return "Mixed Trend"
+
+def _levels(highs: list, lows: list, close: float) -> dict:
+    # Levels come from the recent pivots only, the same ones StructureState keeps
+    below = [p for _, p in lows[-MAX_PIVOTS:] if p < close]
+    above = [p for _, p in highs[-MAX_PIVOTS:] if p > close]
+    return {
+        'swing_highs': highs,
+        'swing_lows': lows,
+        'structure': classify_structure(
+            highs[-1][1] if highs else np.nan, highs[-2][1] if len(highs) > 1 else np.nan,
+            lows[-1][1] if lows else np.nan, lows[-2][1] if len(lows) > 1 else np.nan),
+        'swing_support': round(float(max(below)), 2) if below else None,
+        'swing_resistance': round(float(min(above)), 2) if above else None,
+    }
+
+
+class StructureState:
+    """
+    Incremental swing tracker: update(bar) confirms at most one pivot per
+    side from the trailing 2k+1 bars, so new bars cost O(k). Keeps the last
+    MAX_PIVOTS pivots, which is all the structure and swing levels need.
+    """
+
+    def __init__(self, k: int = SWING_BARS):
+        self.k          = k
+        self.window     = deque(maxlen=2 * k + 1)   # (date, high, low)
+        self.highs      = deque(maxlen=MAX_PIVOTS)  # (date, price)
+        self.lows       = deque(maxlen=MAX_PIVOTS)
+        self.last_close = None
+
+    @property
+    def last_date(self):
+        return self.window[-1][0] if self.window else None
+
+    def update(self, bar: dict) -> dict:
+        """Apply one closed bar ({'date', 'high', 'low', 'close'}) and return values()."""
+        self.push(bar)
+        return self.values()
+
+    def push(self, bar: dict) -> None:
+        """update() without building values(), for streaming many bars."""
+        date = pd.Timestamp(bar['date']).strftime('%Y-%m-%d')
+        self.window.append((date, float(bar['high']), float(bar['low'])))
+        self.last_close = float(bar['close'])
+
+        if len(self.window) == self.window.maxlen:
+            k = self.k
+            d, h, l = self.window[k]
+            hs = [b[1] for b in self.window]
+            ls = [b[2] for b in self.window]
+            if h > max(hs[:k]) and h >= max(hs[k + 1:]):
+                self.highs.append((d, h))
+            if l < min(ls[:k]) and l <= min(ls[k + 1:]):
+                self.lows.append((d, l))
+
+    def values(self) -> dict:
+        if self.last_close is None:
+            return {}
+        return _levels(list(self.highs), list(self.lows), self.last_close)
+
+    def to_dict(self) -> dict:
+        return {
+            'k': self.k, 'last_close': self.last_close,
+            'window': list(self.window), 'highs': list(self.highs), 'lows': list(self.lows),
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'StructureState':
+        st = cls(d['k'])
+        st.last_close = d['last_close']
+        st.window.extend(tuple(x) for x in d['window'])
+        st.highs.extend(tuple(x) for x in d['highs'])
+        st.lows.extend(tuple(x) for x in d['lows'])
+        return st
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, k: int = SWING_BARS) -> 'StructureState':
+        """Seed from a full history with the vectorized pass (no per-bar loop)."""
+        st = cls(k)
+        if df.empty:
+            return st
+        is_high, is_low = find_swings(df['high'], df['low'], k)
+        dates = df.index.strftime('%Y-%m-%d')
+        st.highs.extend(zip(dates[is_high], df['high'].to_numpy(dtype=float)[is_high]))
+        st.lows.extend(zip(dates[is_low], df['low'].to_numpy(dtype=float)[is_low]))
+        tail = df.iloc[-(2 * k + 1):]
+        st.window.extend(zip(dates[-len(tail):], tail['high'].astype(float), tail['low'].astype(float)))
+        st.last_close = float(df['close'].iloc[-1])
+        return st
+
+    def extend(self, df: pd.DataFrame) -> dict:
+        """Apply every bar of `df` dated after last_date."""
+        if self.last_date is not None:
+            df = df[df.index > self.last_date]
+        for row in df[['high', 'low', 'close']].itertuples():
+            self.push({'date': row.Index, 'high': row.high, 'low': row.low, 'close': row.close})
+        return self.values()
+
+
+def detect_price_structure(df):
+    """Structure (HH/HL, LH/LL, Expansion, Contraction) from the last confirmed swing pivots of `df`."""
+    try:
+        if df.shape[0] < 2 * SWING_BARS + 1:
+            return "Not Enough Data"
+        return swing_levels(df)['structure']
     except:
         return "Not Available"
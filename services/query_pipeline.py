@@ -0,0 +1,114 @@
+# services/query_pipeline.py
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from config import (
+    IO_WORKERS, OHLCV_TIMEOUT, SOURCE_TIMEOUT, REPORT_CACHE_SIZE, REPORT_CACHE_TTL, REPORT_FORMAT,
+)
+from services.result_cache import ResultCache
+from services.stock_data import get_stock_data
+from services.nse_data import get_indicator_values
+from services.options_engine import get_option_snapshot
+from services.corporate_engine import get_corporate_calendar
+from services.fundamental_engine import get_fundamental_snapshot
+from services.screener_cache import load_from_cache
+from services.analysis_engine import analyze_stock
+from services.ohlcv_store import bar_id
+from services.structured_report import generate_structured_report
+
+logger = logging.getLogger(__name__)
+
+# One bounded pool for every blocking call (yfinance, NSE, Screener)
+# so a burst of queries cannot spawn an unbounded number of threads.
+_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="stock-io")
+
+# (analysis, report) per (symbol, last bar timestamp); concurrent misses coalesce
+REPORT_CACHE = ResultCache(max_entries=REPORT_CACHE_SIZE, ttl=REPORT_CACHE_TTL)
+
+
+async def run_blocking(func, *args):
+    """Run a blocking call on the shared I/O executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, func, *args)
+
+
+async def fetch_source(name: str, func, *args, timeout: float = SOURCE_TIMEOUT, default=None):
+    """
+    Run one data source on the executor with its own timeout.
+    A timeout or error is logged and `default` is returned instead, so one
+    slow source only blanks its own section of the report.
+    The worker thread itself cannot be interrupted; it finishes in the
+    background and its result is discarded.
+    """
+    try:
+        return await asyncio.wait_for(run_blocking(func, *args), timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.warning("%s timed out after %ss for %s", name, timeout, args)
+    except Exception as e:
+        logger.warning("%s failed for %s: %s", name, args, e)
+    return default
+
+
+async def _analyze_and_render(symbol: str, data: pd.DataFrame):
+    """Fetch the remaining sources concurrently, then analyze and render."""
+    options, corp, snap, indicators, earnings = await asyncio.gather(
+        fetch_source("option_chain", get_option_snapshot, symbol, default={}),
+        fetch_source("corporate", get_corporate_calendar, symbol, default={}),
+        fetch_source("fundamentals", get_fundamental_snapshot, symbol, default={}),
+        # Persisted incremental state; analyze_stock recomputes if it is missing or behind
+        fetch_source("indicators", get_indicator_values, symbol, default={}),
+        # Screener earnings as refreshed by update_cache.py / weekly_scheduler.py (cache only)
+        fetch_source("earnings", load_from_cache, symbol),
+    )
+    fund, af = snap.get('fundamentals', {}), snap.get('annual', {})
+
+    analysis = await run_blocking(analyze_stock, data, symbol, options, corp, indicators)
+    if 'error' in analysis:
+        return None, None, analysis['error']
+    # Kept with the analysis so other outputs (PDF, other formats) render the same data
+    analysis['fundamentals'], analysis['annual'] = fund, af
+    analysis['earnings'] = earnings
+
+    report = await run_blocking(generate_structured_report, symbol, analysis, fund, af, REPORT_FORMAT)
+    return analysis, report, None
+
+
+async def get_stock_analysis(symbol: str):
+    """
+    Analysis dict and rendered report for `symbol`, computed without
+    blocking the event loop.
+
+    OHLCV comes first (served from the local store, so usually without a
+    network call); its last bar (bar_id: date plus values) keys REPORT_CACHE. On a miss the
+    other sources are fetched concurrently, and concurrent requests for the
+    same symbol share one computation. Errors are not cached.
+
+    Returns:
+        (analysis, report, None) on success or (None, None, error message).
+    """
+    symbol = symbol.strip().upper()
+
+    data = await fetch_source("ohlcv", get_stock_data, symbol, timeout=OHLCV_TIMEOUT)
+    if not isinstance(data, pd.DataFrame) or data.empty:
+        return None, None, f"Could not fetch data for symbol '{symbol}'"
+
+    key = (symbol, bar_id(data))
+    return await REPORT_CACHE.get_or_compute(
+        key,
+        lambda: _analyze_and_render(symbol, data),
+        should_cache=lambda result: result[2] is None,
+    )
+
+
+async def build_stock_report(symbol: str):
+    """
+    Structured report for `symbol`.
+
+    Returns:
+        (report, None) on success or (None, error message) on failure.
+    """
+    _, report, err = await get_stock_analysis(symbol)
+    return report, err
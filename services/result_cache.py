@@ -0,0 +1,89 @@
+# services/result_cache.py
+import time
+import asyncio
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    In-process LRU + TTL cache for async computations with single-flight
+    coalescing: while a key is being computed, other callers asking for the
+    same key await the same result instead of starting their own run.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 900):
+        self.max_entries = max_entries
+        self.ttl         = ttl
+        self._entries    = OrderedDict()   # key -> (expires_at, value)
+        self._inflight   = {}              # key -> asyncio.Future
+        self.hits      = 0
+        self.misses    = 0
+        self.coalesced = 0
+
+    def get(self, key):
+        """Cached value for `key` or None (counts as neither hit nor miss)."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key, value) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(self, key, factory, should_cache=None):
+        """
+        Return the cached value for `key`, or await `factory()` once and
+        share its result with every concurrent caller of the same key.
+
+        Args:
+            factory: zero-argument callable returning an awaitable.
+            should_cache: optional predicate; results it rejects (e.g. errors)
+                are handed to current waiters but not stored.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            value = await factory()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                fut.cancel()
+            else:
+                fut.set_exception(e)
+                fut.exception()   # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        if should_cache is None or should_cache(value):
+            self.put(key, value)
+        fut.set_result(value)
+        return value
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'entries':   len(self._entries),
+            'inflight':  len(self._inflight),
+            'hits':      self.hits,
+            'misses':    self.misses,
+            'coalesced': self.coalesced,
+            'hit_rate':  round((self.hits + self.coalesced) / lookups * 100, 2) if lookups else 0.0,
+        }
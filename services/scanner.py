@@ -0,0 +1,150 @@
+# services/scanner.py
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_DIR
+from services import ohlcv_store
+from services.indicator_engine import load_panel, compute_panel_indicators
+from services.candle_patterns import PATTERNS
+from services.price_structure import HH_HL, LH_LL
+
+SNAPSHOT_PATH = os.path.join(DATA_DIR, "universe_snapshot.pkl")
+
+# Label columns: filter tokens map to (a prefix of) the analyze_stock labels,
+# e.g. ema_50_200_cross=golden, candle_pattern=bullish_engulfing, daily_structure=hh_hl
+CROSS_VALUES = {'golden': 'Golden Cross', 'death': 'Death Cross', 'none': 'None'}
+LABEL_FIELDS = {
+    'ema_21_50_cross':  CROSS_VALUES,
+    'ema_50_200_cross': CROSS_VALUES,
+    'candle_pattern':   {p.lower().replace(' ', '_'): p for p in PATTERNS + ['Neutral']},
+    'daily_structure':  {'hh_hl': HH_HL, 'lh_ll': LH_LL, 'expansion': 'Expansion',
+                         'contraction': 'Contraction', 'mixed': 'Mixed Trend'},
+}
+
+FILTER_RE = re.compile(r"^([a-z0-9_]+)(<=|>=|!=|<|>|=)([^\s]+)$")
+OPS = {
+    '<':  np.less,
+    '<=': np.less_equal,
+    '>':  np.greater,
+    '>=': np.greater_equal,
+    '=':  np.equal,
+    '!=': np.not_equal,
+}
+
+_snapshot = None
+_snapshot_mtime = None
+_snapshot_lock = threading.Lock()
+
+
+def build_universe_snapshot(symbols: list = None) -> pd.DataFrame:
+    """
+    Compute the latest analyze_stock metrics for every stored symbol in one
+    vectorized pass (services/indicator_engine.py) and save them as a
+    columnar snapshot (one row per symbol) for /scan.
+    Run nightly after the bulk OHLCV download.
+    """
+    if symbols is None:
+        symbols = ohlcv_store.stored_symbols()
+    _, latest = compute_panel_indicators(load_panel(symbols))
+    os.makedirs(DATA_DIR, exist_ok=True)
+    tmp = SNAPSHOT_PATH + ".tmp"
+    latest.to_pickle(tmp)
+    os.replace(tmp, SNAPSHOT_PATH)
+    return latest
+
+
+def load_snapshot() -> pd.DataFrame:
+    """The saved universe snapshot, re-read only when the file changes."""
+    global _snapshot, _snapshot_mtime
+    with _snapshot_lock:
+        mtime = os.path.getmtime(SNAPSHOT_PATH) if os.path.exists(SNAPSHOT_PATH) else None
+        if mtime is None:
+            return pd.DataFrame()
+        if mtime != _snapshot_mtime:
+            _snapshot = pd.read_pickle(SNAPSHOT_PATH)
+            _snapshot_mtime = mtime
+        return _snapshot
+
+
+def parse_filters(text: str, columns) -> list:
+    """
+    Parse 'rsi<30 volume_surge_pct>150 ema_50_200_cross=golden' into
+    [(field, op, value)]. Raises ValueError with a user-facing message.
+    """
+    filters = []
+    for token in text.lower().split():
+        m = FILTER_RE.match(token)
+        if not m:
+            raise ValueError(f"Can't read filter '{token}' (expected e.g. rsi<30)")
+        field, op, raw = m.groups()
+        if field not in columns:
+            raise ValueError(f"Unknown field '{field}'")
+        if field in LABEL_FIELDS:
+            values = LABEL_FIELDS[field]
+            if op not in ('=', '!=') or raw not in values:
+                raise ValueError(f"{field} takes = or != one of: {', '.join(values)}")
+            value = values[raw]
+        else:
+            try:
+                value = float(raw)
+            except ValueError:
+                raise ValueError(f"'{raw}' is not a number for {field}")
+        filters.append((field, op, value))
+    if not filters:
+        raise ValueError("No filters given")
+    return filters
+
+
+def scan(text: str, limit: int = 20) -> pd.DataFrame:
+    """
+    Evaluate text filters against the universe snapshot with one boolean
+    mask per filter. Matches are ranked by the first numeric filter
+    (ascending for < / <=, descending otherwise), or by volume surge when
+    only label filters (crossovers, patterns, structure) are given.
+    """
+    snap = load_snapshot()
+    if snap.empty:
+        raise ValueError("Universe snapshot not built yet")
+    filters = parse_filters(text, snap.columns)
+
+    mask = np.ones(len(snap), dtype=bool)
+    for field, op, value in filters:
+        col = snap[field]
+        if field in LABEL_FIELDS:
+            hit = col.str.startswith(value).to_numpy()
+            mask &= hit if op == '=' else ~hit
+        else:
+            mask &= OPS[op](col.to_numpy(dtype=float), value)
+
+    hits = snap[mask]
+    numeric = [(f, op) for f, op, _ in filters if f not in LABEL_FIELDS]
+    if numeric:
+        field, op = numeric[0]
+        hits = hits.sort_values(field, ascending=op in ('<', '<='))
+    else:
+        hits = hits.sort_values('volume_surge_pct', ascending=False)
+    return hits.head(limit)
+
+
+def format_scan_results(text: str, hits: pd.DataFrame) -> str:
+    if hits.empty:
+        return f"🔎 No stocks match: {text}"
+    lines = [f"🔎 Scan: {text}", f"Top {len(hits)} matches:", ""]
+    for sym, row in hits.iterrows():
+        lines.append(
+            f"• {sym}: ₹{row['cmp']} | RSI {row['rsi']} | "
+            f"Vol surge {row['volume_surge_pct']}% | 52W pct {row['percentile_52w']}"
+        )
+    lines.append(f"\nData as of {hits['date'].max():%Y-%m-%d}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    from services.bulk_downloader import bulk_download, load_universe
+    bulk_download(load_universe())
+    snap = build_universe_snapshot()
+    print(f"✅ Universe snapshot built for {len(snap)} symbols")
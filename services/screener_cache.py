@@ -1,42 +1,125 @@
 # services/screener_cache.py
 
-import requests
 import json
 import os
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
 
-CACHE_DIR = "services/earnings_cache"
-
-def get_cached_earnings(symbol):
-    os.makedirs(CACHE_DIR, exist_ok=True)
-    file_path = os.path.join(CACHE_DIR, f"{symbol.upper()}.json")
-
-    if os.path.exists(file_path):
-        with open(file_path, "r") as f:
-            return json.load(f)
-
-    data = fetch_earnings_from_screener(symbol)
-    if data:
-        with open(file_path, "w") as f:
-            json.dump(data, f)
-    return data
-
-def fetch_earnings_from_screener(symbol):
-    try:
-        url = f"https://www.screener.in/company/{symbol.upper()}/consolidated/"
-        headers = {
-            "User-Agent": "Mozilla/5.0"
-        }
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
+from config import DATA_DIR, EARNINGS_CACHE_SIZE
+
+CACHE_DIR = os.path.join(DATA_DIR, "earnings_cache")
+
+# Listing deadlines for quarterly results: 45 days after Jun/Sep/Dec quarter
+# ends, 60 days after the March (annual) quarter
+RESULT_DEADLINES = [(2, 14), (5, 30), (8, 14), (11, 14)]
+
+
+def next_results_expiry(now: datetime = None) -> datetime:
+    """Day after the next quarterly results deadline: cached earnings stay valid until then."""
+    now = now or datetime.now()
+    for year in (now.year, now.year + 1):
+        for month, day in RESULT_DEADLINES:
+            expiry = datetime(year, month, day) + timedelta(days=1)
+            if expiry > now:
+                return expiry
+
+
+class TieredCache:
+    """
+    In-memory LRU in front of a sharded on-disk JSON store.
+
+    Disk entries live in <root>/<2 hex chars>/<KEY>.json and carry their own
+    expiry; writes go to a temp file that is renamed into place, so readers
+    never see a half-written entry.
+    """
+
+    def __init__(self, root: str, max_entries: int = EARNINGS_CACHE_SIZE):
+        self.root        = root
+        self.max_entries = max_entries
+        self._memory     = OrderedDict()   # key -> (expires_at, value)
+        self._lock       = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        shard = hashlib.md5(key.encode()).hexdigest()[:2]
+        return os.path.join(self.root, shard, f"{key}.json")
+
+    def _remember(self, key, expires_at, value):
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        """Cached value for `key`, or None if missing or expired."""
+        key = key.upper()
+        now = datetime.now()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    return entry[1]
+                del self._memory[key]
+
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            expires_at = datetime.fromisoformat(stored["expires_at"])
+        except Exception:
+            return None
+        if expires_at <= now:
             return None
+        self._remember(key, expires_at, stored["data"])
+        return stored["data"]
+
+    def put(self, key: str, value, expires_at: datetime = None) -> None:
+        """Store `value` until `expires_at` (default: the next results deadline)."""
+        key = key.upper()
+        expires_at = expires_at or next_results_expiry()
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "data": value,
+                "stored_at": datetime.now().isoformat(timespec="seconds"),
+                "expires_at": expires_at.isoformat(timespec="seconds"),
+            }, f)
+        os.replace(tmp, path)
+        self._remember(key, expires_at, value)
+
+    def get_many(self, keys) -> dict:
+        """{key: value} for every key that has a live entry."""
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key.upper()] = value
+        return found
+
+    def put_many(self, items: dict, expires_at: datetime = None) -> None:
+        expires_at = expires_at or next_results_expiry()
+        for key, value in items.items():
+            self.put(key, value, expires_at)
+
+    def invalidate(self, key: str) -> None:
+        key = key.upper()
+        with self._lock:
+            self._memory.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+EARNINGS_CACHE = TieredCache(CACHE_DIR)
+
 
-        # Placeholder dummy response (replace with your real logic to parse Screener page if needed)
-        # For now, return dummy 3-year earnings
-        return {
-            "year_1": {"revenue": "12,000 Cr", "pat": "1,000 Cr", "growth": "15%"},
-            "year_2": {"revenue": "13,800 Cr", "pat": "1,300 Cr", "growth": "30%"},
-            "year_3": {"revenue": "15,200 Cr", "pat": "1,600 Cr", "growth": "23%"},
-        }
+def load_from_cache(symbol):
+    return EARNINGS_CACHE.get(symbol)
 
-    except Exception as e:
-        return None
+def save_to_cache(symbol, data):
+    EARNINGS_CACHE.put(symbol, data)
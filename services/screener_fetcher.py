@@ -1,19 +1,35 @@
 import requests
 import json
-from services.screener_cache import load_from_cache, save_to_cache
+from concurrent.futures import ThreadPoolExecutor
+from services.screener_cache import load_from_cache, save_to_cache, EARNINGS_CACHE
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0"
 }
 
-def get_earnings_data(symbol: str):
+def get_earnings_data(symbol: str, use_cache: bool = True):
     """
-    Fetch last 3 years of earnings (Revenue, PAT) from Screener.in
+    Fetch last 3 years of earnings (Revenue, PAT) from Screener.in.
+    Only a non-empty result is cached; a failed or empty scrape is retried
+    on the next call.
     """
-    cached = load_from_cache(symbol)
-    if cached:
-        return cached
+    if use_cache:
+        cached = load_from_cache(symbol)
+        if cached:
+            return cached
 
+    earnings = _scrape(symbol)
+    if _usable(earnings):
+        save_to_cache(symbol, earnings)
+    return earnings
+
+
+def _usable(data) -> bool:
+    return isinstance(data, list) and bool(data) and "error" not in data[0]
+
+
+def _scrape(symbol: str):
+    """Earnings parsed from the symbol's Screener page, or an error value."""
     try:
         url = f"https://www.screener.in/company/{symbol}/consolidated/"
         response = requests.get(url, headers=HEADERS, timeout=10)
@@ -45,8 +61,22 @@ def get_earnings_data(symbol: str):
                 "growth": round(((pat_values[-(i+1)] / pat_values[-(i+2)]) - 1) * 100, 2) if i < len(pat_values) - 1 else None
             })
 
-        save_to_cache(symbol, earnings)
         return earnings
 
     except Exception as e:
         return [{"error": str(e)}]
+
+
+def batch_update_stocks(symbols, workers: int = 4) -> dict:
+    """
+    Re-fetch earnings for `symbols` from Screener, bypassing the cache, and
+    store the successful results in one put_many call.
+    Returns {symbol: earnings} for the symbols that were refreshed.
+    """
+    symbols = [s.upper() for s in symbols]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = dict(zip(symbols, pool.map(_scrape, symbols)))
+
+    fresh = {sym: data for sym, data in results.items() if _usable(data)}
+    EARNINGS_CACHE.put_many(fresh)
+    return fresh
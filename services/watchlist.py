@@ -0,0 +1,128 @@
+# services/watchlist.py
+import os
+import json
+import threading
+
+import pandas as pd
+
+from config import DATA_DIR, MAX_WATCHLIST_SIZE
+from services.indicator_engine import refresh_latest, FULL_HISTORY
+
+WATCHLIST_PATH = os.path.join(DATA_DIR, "watchlists.json")
+
+
+class WatchlistBook:
+    """Per-chat watchlists ({chat_id: [symbols]}), persisted to data/watchlists.json."""
+
+    def __init__(self, path: str = WATCHLIST_PATH):
+        self.path  = path
+        self.lists = {}    # chat_id -> list of symbols, in the order added
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                # JSON object keys are strings
+                self.lists = {int(chat): syms for chat, syms in json.load(f).items()}
+        except Exception:
+            pass
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.lists, f)
+        os.replace(tmp, self.path)
+
+    def add(self, chat_id: int, symbols: list) -> list:
+        """Add symbols to the chat's watchlist; returns the ones newly added."""
+        with self._lock:
+            current = self.lists.setdefault(chat_id, [])
+            added = [s for s in dict.fromkeys(s.upper() for s in symbols) if s not in current]
+            if len(current) + len(added) > MAX_WATCHLIST_SIZE:
+                if not current:
+                    del self.lists[chat_id]
+                raise ValueError(f"A watchlist holds at most {MAX_WATCHLIST_SIZE} symbols")
+            current.extend(added)
+            if added:
+                self._save()
+            return added
+
+    def remove(self, chat_id: int, symbols: list = None) -> list:
+        """Remove symbols (or the whole list when symbols is None); returns the ones removed."""
+        with self._lock:
+            current = self.lists.get(chat_id, [])
+            drop = set(current) if symbols is None else {s.upper() for s in symbols}
+            removed = [s for s in current if s in drop]
+            if removed:
+                kept = [s for s in current if s not in drop]
+                if kept:
+                    self.lists[chat_id] = kept
+                else:
+                    del self.lists[chat_id]
+                self._save()
+            return removed
+
+    def for_chat(self, chat_id: int) -> list:
+        with self._lock:
+            return list(self.lists.get(chat_id, []))
+
+    def subscriptions(self) -> dict:
+        """{chat_id: [symbols]} snapshot of every non-empty watchlist."""
+        with self._lock:
+            return {chat: list(syms) for chat, syms in self.lists.items() if syms}
+
+    def union(self) -> list:
+        """Every distinct symbol on any watchlist."""
+        with self._lock:
+            return sorted({s for syms in self.lists.values() for s in syms})
+
+
+def format_digest_line(symbol: str, row: pd.Series) -> str:
+    """One watchlist line, e.g. '• TCS: ₹4215.3 (+1.2%) | RSI 55.1 | Vol surge 20.0%'."""
+    change = row.get('change_pct')
+    line = f"• {symbol}: ₹{row['cmp']}"
+    if pd.notna(change):
+        line += f" ({change:+.2f}%)"
+    line += f" | RSI {row['rsi']}"
+    if pd.notna(row.get('volume_surge_pct')):
+        line += f" | Vol surge {row['volume_surge_pct']}%"
+    for key in ('ema_21_50_cross', 'ema_50_200_cross'):
+        if row.get(key, 'None') != 'None':
+            line += f" | {row[key]}"
+    return line
+
+
+def build_digests(subscriptions: dict) -> dict:
+    """
+    Digest text per chat for {chat_id: [symbols]}.
+
+    The union of all symbols is refreshed and analysed once (one
+    refresh_latest pass), each symbol's line is rendered once, and every
+    chat's message is assembled from those shared lines, so the work grows
+    with the number of distinct symbols rather than chats × symbols.
+    """
+    symbols = sorted({s for syms in subscriptions.values() for s in syms})
+    if not symbols:
+        return {}
+    # Full history, so EMA and crossover lines match the symbol's /report
+    latest = refresh_latest(symbols, period=FULL_HISTORY)
+    lines = {sym: format_digest_line(sym, row) for sym, row in latest.iterrows()}
+    as_of = f"{latest['date'].max():%Y-%m-%d}" if not latest.empty else "N/A"
+
+    digests = {}
+    for chat_id, syms in subscriptions.items():
+        body = [lines.get(s, f"• {s}: no data") for s in syms]
+        digests[chat_id] = "\n".join([f"📋 Watchlist digest ({as_of})", ""] + body)
+    return digests
+
+
+_book = None
+_book_lock = threading.Lock()
+
+
+def get_watchlists() -> WatchlistBook:
+    """The process-wide WatchlistBook, loaded on first use."""
+    global _book
+    with _book_lock:
+        if _book is None:
+            _book = WatchlistBook()
+        return _book
@@ -0,0 +1,224 @@
+# services/webhook_server.py
+import ssl
+import hmac
+import json
+import signal
+import asyncio
+import logging
+from pathlib import Path
+
+from telegram import Update
+
+from config import (
+    WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_URL, WEBHOOK_SECRET,
+    WEBHOOK_CERT, WEBHOOK_KEY, WEBHOOK_MAX_CONNECTIONS,
+)
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER  = "x-telegram-bot-api-secret-token"
+MAX_BODY_BYTES = 1 << 20     # Telegram updates are far smaller
+READ_TIMEOUT   = 30          # seconds an idle keep-alive connection is kept
+
+REASONS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+class WebhookServer:
+    """
+    Minimal asyncio HTTP(S) server for Telegram webhooks.
+
+    Every POST to `path` carrying the right secret token is decoded into an
+    Update and put on the application's update_queue, where the running
+    Application dispatches it to the normal handlers (concurrently, see
+    CONCURRENT_UPDATES). The request is acknowledged straight away so
+    Telegram can keep sending. Connections are kept alive.
+    """
+
+    def __init__(self, app, listen: str = WEBHOOK_LISTEN, port: int = WEBHOOK_PORT,
+                 path: str = WEBHOOK_PATH, secret: str = WEBHOOK_SECRET, ssl_context=None):
+        if not secret:
+            raise RuntimeError("WEBHOOK_SECRET must be set for webhook mode")
+        self.app         = app
+        self.listen      = listen
+        self.port        = port
+        self.path        = path
+        self.secret      = secret.encode()
+        self.ssl_context = ssl_context
+        self.server      = None
+        self.received    = 0
+        self.rejected    = 0
+
+    async def start(self):
+        self.server = await asyncio.start_server(
+            self._handle_connection, self.listen, self.port, ssl=self.ssl_context
+        )
+        scheme = "https" if self.ssl_context else "http"
+        logger.info("Webhook server listening on %s://%s:%s%s", scheme, self.listen, self.port, self.path)
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), READ_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                status = await self._dispatch(method, target, headers, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self._respond(writer, status, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except Exception:
+            logger.exception("Webhook connection failed")
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        """(method, target, headers, body), None on a closed connection, or an error status."""
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return ("BAD", "", {}, b"")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", "0") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # The body can't be framed, so the connection can't be reused either
+            return ("BAD", target, {"connection": "close"}, b"")
+        if length > MAX_BODY_BYTES:
+            return ("TOO_LARGE", target, {"connection": "close"}, b"")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    async def _dispatch(self, method, target, headers, body) -> int:
+        if method == "BAD":
+            return 400
+        if method == "TOO_LARGE":
+            return 413
+        if target.split("?", 1)[0] != self.path:
+            return 404
+        if method != "POST":
+            return 405
+        if not hmac.compare_digest(headers.get(SECRET_HEADER, "").encode(), self.secret):
+            self.rejected += 1
+            return 403
+        try:
+            update = Update.de_json(json.loads(body), self.app.bot)
+        except Exception:
+            return 400
+        self.received += 1
+        await self.app.update_queue.put(update)
+        return 200
+
+    @staticmethod
+    def _respond(writer, status: int, keep_alive: bool):
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            "Content-Length: 0\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+        )
+
+
+def _ssl_context():
+    if not (WEBHOOK_CERT and WEBHOOK_KEY):
+        return None
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(WEBHOOK_CERT, WEBHOOK_KEY)
+    return context
+
+
+async def run_webhook(app):
+    """
+    Run `app` in webhook mode until SIGINT/SIGTERM: start the Application
+    (with its post_init / post_shutdown hooks, as run_polling would), serve
+    updates, register the webhook with Telegram if WEBHOOK_URL is set, and
+    on shutdown stop accepting requests before stopping the Application so
+    queued updates are still handled.
+    """
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:   # Windows
+            pass
+
+    server = WebhookServer(app, ssl_context=_ssl_context())
+    await app.initialize()
+    if app.post_init:
+        await app.post_init(app)
+    await app.start()
+    await server.start()
+    try:
+        if WEBHOOK_URL:
+            await app.bot.set_webhook(
+                url=WEBHOOK_URL,
+                secret_token=WEBHOOK_SECRET,
+                max_connections=WEBHOOK_MAX_CONNECTIONS,
+                allowed_updates=Update.ALL_TYPES,
+                # Upload the certificate so Telegram accepts a self-signed one
+                certificate=Path(WEBHOOK_CERT).read_bytes() if WEBHOOK_CERT and WEBHOOK_KEY else None,
+            )
+            logger.info("Webhook registered at %s", WEBHOOK_URL)
+        await stop.wait()
+    finally:
+        logger.info("Shutting down webhook server...")
+        await server.stop()
+        await app.stop()
+        if app.post_stop:
+            await app.post_stop(app)
+        await app.shutdown()
+        if app.post_shutdown:
+            await app.post_shutdown(app)
+
+
+def replay(path: str, url: str, secret: str = WEBHOOK_SECRET) -> None:
+    """
+    POST recorded updates (a JSON file holding one update or a list, or a
+    .jsonl file with one per line) to a running webhook server, for local
+    testing: python -m services.webhook_server updates.jsonl
+    """
+    import urllib.request
+
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if path.endswith(".jsonl"):
+        updates = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        data = json.loads(text)
+        updates = data if isinstance(data, list) else [data]
+
+    for update in updates:
+        request = urllib.request.Request(
+            url, data=json.dumps(update).encode(), method="POST",
+            headers={"Content-Type": "application/json", "X-Telegram-Bot-Api-Secret-Token": secret},
+        )
+        with urllib.request.urlopen(request) as response:
+            print(f"update {update.get('update_id')}: HTTP {response.status}")
+
+
+if __name__ == "__main__":
+    import sys
+    scheme = "https" if WEBHOOK_CERT and WEBHOOK_KEY else "http"
+    replay(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else f"{scheme}://127.0.0.1:{WEBHOOK_PORT}{WEBHOOK_PATH}")
@@ -1,30 +1,70 @@
-import pandas as pd
 import json
 import os
-from difflib import get_close_matches
 
-# Load CSV and save JSON (run once)
+from symbols.symbol_index import JSON_PATH, build_index, save_index, resolve, match
+
 csv_path = os.path.join(os.path.dirname(__file__), "../EQUITY_L.csv")
-df = pd.read_csv(csv_path)
-df = df[["SYMBOL", "NAME OF COMPANY"]].dropna()
 
-symbol_dict = dict(zip(df["SYMBOL"], df["NAME OF COMPANY"]))
 
-# Save JSON for use in the bot
-json_path = os.path.join(os.path.dirname(__file__), "nse_symbols.json")
-with open(json_path, "w") as f:
-    json.dump(symbol_dict, f, indent=2)
+def generate_symbols():
+    """Load EQUITY_L.csv, save nse_symbols.json and compile the search index (run once)."""
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    df = df[["SYMBOL", "NAME OF COMPANY"]].dropna()
+
+    symbol_dict = dict(zip(df["SYMBOL"], df["NAME OF COMPANY"]))
 
-print("✅ NSE symbols saved to nse_symbols.json")
+    # Save JSON for use in the bot
+    with open(JSON_PATH, "w") as f:
+        json.dump(symbol_dict, f, indent=2)
+    print("✅ NSE symbols saved to nse_symbols.json")
+
+    # Precompile the symbol / company-name index the bot loads at run time
+    save_index(build_index(symbol_dict))
+    print("✅ Symbol search index saved to symbol_index.pickle")
 
 
 # 🧠 This function is used by the bot for fuzzy matching user inputs
 def get_best_match_symbol(user_input):
-    user_input = user_input.strip().upper()
+    """Exact, prefix (ticker or company name) or typo-tolerant match; None if nothing is close."""
+    return resolve(user_input)
+
+
+def resolve_symbol(user_input):
+    """
+    (symbol, suggestions) for user input. `symbol` is set only for a sure
+    match: exact ticker or company name, a known alias, or a prefix of one
+    company's ticker/name. Otherwise it is None and `suggestions` lists the
+    closest symbols (typos, shared prefixes), best first.
+    """
+    ranked, confident = match(user_input, limit=3)
+    symbols = [sym for sym, _ in ranked]
+    return (symbols[0], []) if confident else (None, symbols)
+
+
+def pick_symbol(user_input):
+    """
+    (symbol, note) for commands that only show data: the sure match, else
+    the closest suggestion with a note saying which symbol is shown for the
+    input, else the input itself upper-cased. `note` is None unless guessed.
+    """
+    symbol, suggestions = resolve_symbol(user_input)
+    if symbol:
+        return symbol, None
+    if not suggestions:
+        return user_input.strip().upper(), None
+    note = f"🔎 Showing {suggestions[0]} for '{user_input.strip()}'"
+    if len(suggestions) > 1:
+        note += f" (also: {', '.join(suggestions[1:])})"
+    return suggestions[0], note
+
+
+def did_you_mean(user_input, suggestions) -> str:
+    """Rejection message for commands that store a symbol (alerts, watchlists)."""
+    hint = f" Did you mean {' or '.join(suggestions)}?" if suggestions else ""
+    return f"'{user_input.strip()}' is not a known NSE symbol.{hint}"
 
-    if user_input in symbol_dict:
-        return user_input  # perfect match
 
-    # Try fuzzy match
-    possible_matches = get_close_matches(user_input, symbol_dict.keys(), n=1, cutoff=0.6)
-    return possible_matches[0] if possible_matches else None
+if __name__ == "__main__":
+    generate_symbols()
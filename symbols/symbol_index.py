@@ -0,0 +1,202 @@
+# symbols/symbol_index.py
+import os
+import re
+import json
+import heapq
+import pickle
+import threading
+from difflib import SequenceMatcher
+
+BASE_DIR   = os.path.dirname(__file__)
+JSON_PATH  = os.path.join(BASE_DIR, "nse_symbols.json")
+INDEX_PATH = os.path.join(BASE_DIR, "symbol_index.pickle")
+
+NGRAM        = 3
+MAX_PREFIXED = 16     # keys taken from the trie walk
+MAX_SCORED   = 6      # best n-gram candidates re-ranked with SequenceMatcher
+PREFIX_SCORE = 0.95   # a query that is a clean prefix of a key
+MIN_SCORE    = 0.6    # same cutoff the old difflib lookup used
+NAME_SUFFIX = re.compile(r"\b(LIMITED|LTD)\b\.?")
+INDEX_VERSION = 2     # bump when build_index changes; older pickles are rebuilt
+
+# Common short names that are neither the ticker nor a prefix of the company name
+ALIASES = {
+    "L&T":    "LT",
+    "SBI":    "SBIN",
+    "HUL":    "HINDUNILVR",
+    "AIRTEL": "BHARTIARTL",
+    "KOTAK":  "KOTAKBANK",
+}
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def normalize(text: str) -> str:
+    """Uppercase, drop punctuation and the LIMITED/LTD suffix, collapse spaces."""
+    text = re.sub(r"[^A-Z0-9& ]+", " ", text.upper())
+    text = NAME_SUFFIX.sub(" ", text)
+    return " ".join(text.split())
+
+
+def _grams(text: str) -> set:
+    padded = f" {text} "
+    return {padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)}
+
+
+def build_index(symbols: dict) -> dict:
+    """
+    Compile {symbol: company name} into lookup structures:
+      - keys:   [(normalized key, symbol)] for every ticker and company name
+      - exact:  normalized key -> symbol
+      - trie:   nested dicts over key characters; '' holds the key ids ending there
+      - grams:  character trigram -> key ids (postings)
+      - ngrams: number of distinct trigrams per key id
+    ALIASES whose symbol is listed are added to `exact`.
+    """
+    keys, exact, trie, grams, ngrams = [], {}, {}, {}, []
+    for sym, name in symbols.items():
+        for key in {normalize(sym), normalize(str(name))}:
+            if not key:
+                continue
+            kid = len(keys)
+            keys.append((key, sym))
+            exact.setdefault(key, sym)
+            node = trie
+            for ch in key:
+                node = node.setdefault(ch, {})
+            node.setdefault("", []).append(kid)
+            key_grams = _grams(key)
+            ngrams.append(len(key_grams))
+            for g in key_grams:
+                grams.setdefault(g, []).append(kid)
+    for alias, sym in ALIASES.items():
+        if sym in symbols:
+            exact.setdefault(normalize(alias), sym)
+    return {"version": INDEX_VERSION, "keys": keys, "exact": exact, "trie": trie,
+            "grams": grams, "ngrams": ngrams}
+
+
+def save_index(index: dict, path: str = INDEX_PATH) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def get_index() -> dict:
+    """
+    The compiled index, loaded once per process. Uses symbol_index.pickle
+    when it is newer than nse_symbols.json, otherwise rebuilds and saves it.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            try:
+                if os.path.getmtime(INDEX_PATH) >= os.path.getmtime(JSON_PATH):
+                    with open(INDEX_PATH, "rb") as f:
+                        _index = pickle.load(f)
+                    if _index.get("version") != INDEX_VERSION:
+                        _index = None
+            except OSError:
+                pass
+            if _index is None:
+                with open(JSON_PATH, "r", encoding="utf-8") as f:
+                    _index = build_index(json.load(f))
+                try:
+                    save_index(_index)
+                except OSError:
+                    pass
+        return _index
+
+
+def _prefix_ids(trie: dict, prefix: str, limit: int) -> list:
+    """Key ids under `prefix`, shortest keys first (breadth-first walk)."""
+    node = trie
+    for ch in prefix:
+        node = node.get(ch)
+        if node is None:
+            return []
+    ids, level = [], [node]
+    while level and len(ids) < limit:
+        nxt = []
+        for n in level:
+            ids.extend(n.get("", []))
+            nxt.extend(child for ch, child in sorted(n.items()) if ch)
+        level = nxt
+    return ids[:limit]
+
+
+def match(query: str, limit: int = 5) -> tuple:
+    """
+    (ranked [(symbol, score)], confident) for a ticker or company name,
+    tolerant of typos and partial names ('tata consultancy', 'relaince').
+
+    `confident` is True only for an exact ticker, company name or alias, or
+    a prefix of one company's keys. Typo matches ('hello' → CELLO) and
+    prefixes several companies share ('hdfc') are only suggestions.
+    """
+    q = normalize(query)
+    if not q:
+        return [], False
+    idx = get_index()
+    if q in idx["exact"]:
+        return [(idx["exact"][q], 1.0)], True
+
+    # Keys the query is a clean prefix of ('tata consultancy')
+    best = {}
+    if len(q) >= 3:
+        for kid in _prefix_ids(idx["trie"], q, MAX_PREFIXED):
+            key, sym = idx["keys"][kid]
+            if (PREFIX_SCORE, -len(key)) > best.get(sym, (0, 0)):
+                best[sym] = (PREFIX_SCORE, -len(key))
+
+    if best:
+        return _ranked(best, limit), len(best) == 1
+
+    # Typos ('relaince'): rank keys by shared trigrams (Dice coefficient) from
+    # the postings, then re-rank only the top few with SequenceMatcher
+    q_grams = _grams(q)
+    counts = {}
+    for g in q_grams:
+        for kid in idx["grams"].get(g, ()):
+            counts[kid] = counts.get(kid, 0) + 1
+    ngrams = idx["ngrams"]
+    top = heapq.nlargest(MAX_SCORED, counts, key=lambda kid: 2 * counts[kid] / (len(q_grams) + ngrams[kid]))
+    for kid in top:
+        key, sym = idx["keys"][kid]
+        score = SequenceMatcher(None, q, key).ratio()
+        if score >= MIN_SCORE and (score, -len(key)) > best.get(sym, (0, 0)):
+            best[sym] = (score, -len(key))
+    return _ranked(best, limit), False
+
+
+def search(query: str, limit: int = 5) -> list:
+    """Ranked [(symbol, score)] for a ticker or company name (see match)."""
+    return match(query, limit)[0]
+
+
+def _ranked(best: dict, limit: int) -> list:
+    """{symbol: (score, -key length)} → [(symbol, score)], best first."""
+    ranked = sorted(best.items(), key=lambda kv: kv[1], reverse=True)
+    return [(sym, round(score, 3)) for sym, (score, _) in ranked[:limit]]
+
+
+def resolve(query: str):
+    """Best matching NSE symbol for `query`, or None."""
+    matches = search(query, limit=1)
+    return matches[0][0] if matches else None
+
+
+def autocomplete(prefix: str, limit: int = 10) -> list:
+    """Symbols whose ticker or company name starts with `prefix`."""
+    q = normalize(prefix)
+    if not q:
+        return []
+    idx = get_index()
+    out = []
+    for kid in _prefix_ids(idx["trie"], q, limit * 4):
+        sym = idx["keys"][kid][1]
+        if sym not in out:
+            out.append(sym)
+    return out[:limit]
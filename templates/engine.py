@@ -0,0 +1,191 @@
+# templates/engine.py
+import re
+import threading
+from functools import lru_cache
+
+from config import REPORT_CACHE_TTL
+from services.result_cache import ResultCache
+
+SECTION_CACHE_SIZE = 4096   # rendered sections kept across all symbols/targets
+
+# MarkdownV2 reserves these characters everywhere outside code blocks
+_MD_SPECIAL  = '\\_*[]()~`>#+-=|{}.!'
+_MD_ESCAPE   = str.maketrans({c: '\\' + c for c in _MD_SPECIAL})
+_MD_CODE     = str.maketrans({'\\': '\\\\', '`': '\\`'})
+_HTML_ESCAPE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+# PDF fonts have no emoji; core PDF fonts are latin-1 only
+_PDF_ARROWS  = str.maketrans({'🔺': '+', '🔻': '-'})
+_PDF_ESCAPE  = str.maketrans({'₹': 'Rs.', '–': '-', '’': "'", '•': '-'})
+_EMOJI       = re.compile('[\U00010000-\U0010FFFF]\\s?')
+
+
+def _unicode_pdf(text: str) -> str:
+    return _EMOJI.sub('', text.translate(_PDF_ARROWS))
+
+
+def _latin1(text: str) -> str:
+    return _unicode_pdf(text).translate(_PDF_ESCAPE).encode('latin-1', 'ignore').decode('latin-1')
+
+
+class Target:
+    """How one output format escapes text and marks up titles, rows and tables."""
+
+    def __init__(self, name, escape, heading, title, bullet, pad_labels, table):
+        self.name       = name
+        self.escape     = escape       # str -> str for any dynamic or static text
+        self.heading    = heading      # escaped document heading -> markup
+        self.title      = title        # escaped section title -> markup
+        self.bullet     = bullet       # prefix of every bullet line
+        self.pad_labels = pad_labels   # pad row labels to a column (monospace output)
+        self.table      = table        # raw table lines -> markup (does its own escaping)
+
+
+TARGETS = {
+    'text': Target(
+        'text', str, str, lambda t: f"🔹 {t}", "  • ", True,
+        lambda lines: "\n".join(lines),
+    ),
+    'markdown': Target(
+        'markdown', lambda s: s.translate(_MD_ESCAPE),
+        lambda h: f"*{h}*", lambda t: f"*{' '.join(t.split())}*", "• ", False,
+        lambda lines: "```\n" + "\n".join(lines).translate(_MD_CODE) + "\n```",
+    ),
+    'html': Target(
+        'html', lambda s: s.translate(_HTML_ESCAPE),
+        lambda h: f"<b>{h}</b>", lambda t: f"<b>{' '.join(t.split())}</b>", "• ", False,
+        lambda lines: "<pre>" + "\n".join(lines).translate(_HTML_ESCAPE) + "</pre>",
+    ),
+    'pdf': Target(
+        'pdf', _latin1, str, lambda t: ' '.join(t.split()), "- ", False,
+        lambda lines: "\n".join(_latin1(line) for line in lines),
+    ),
+    # PDF with an embedded Unicode TTF (services/pdf_generator.py)
+    'pdf_unicode': Target(
+        'pdf_unicode', _unicode_pdf, str, lambda t: ' '.join(t.split()), "• ", False,
+        lambda lines: "\n".join(_unicode_pdf(line) for line in lines),
+    ),
+}
+
+# Telegram parse_mode for each chat target
+PARSE_MODES = {'text': None, 'markdown': 'MarkdownV2', 'html': 'HTML'}
+
+
+class Section:
+    """
+    One titled block of a layout.
+
+    `prepare(ctx)` turns the render context into the section's display
+    values (plain strings, never None), and `items` lays them out:
+        ('heading', key)       document heading
+        ('text', key)          plain line
+        ('row', label, key)    "• label: value"
+        ('bullet', key)        "• value"
+        ('rows', key)          ctx[key] is a list of (label, value) rows
+        ('table', key)         ctx[key] is a list of monospace lines
+    Sections with cache=False (e.g. anything showing today's date) are
+    rendered on every call.
+    """
+
+    def __init__(self, key, title, prepare, items, cache=True):
+        self.key     = key
+        self.title   = title
+        self.prepare = prepare
+        self.items   = items
+        self.cache   = cache
+
+
+class Layout:
+    def __init__(self, name, version, sections, label_width=22):
+        self.name        = name
+        self.version     = version
+        self.sections    = sections
+        self.label_width = label_width
+
+
+def _compile_item(item, target: Target, width: int):
+    """Static text of `item` escaped and formatted once; returns a render op."""
+    esc, kind = target.escape, item[0]
+    if kind == 'heading':
+        return kind, item[1], None
+    if kind == 'text':
+        return kind, item[1], ""
+    if kind == 'row':
+        label = esc(item[1])
+        prefix = target.bullet + (label.ljust(width) if target.pad_labels else label) + ": "
+        return kind, item[2], prefix
+    if kind in ('bullet', 'rows'):
+        return kind, item[1], target.bullet
+    if kind == 'table':
+        return kind, item[1], None
+    raise ValueError(f"Unknown layout item: {kind}")
+
+
+@lru_cache(maxsize=None)
+def compile_layout(layout: Layout, target_name: str):
+    """
+    [(section, rendered title, ops)] for `layout` in `target_name`, built
+    once per process: static labels and titles are escaped and padded here,
+    so rendering only escapes the values.
+    """
+    target = TARGETS[target_name]
+    compiled = []
+    for section in layout.sections:
+        title = target.title(target.escape(section.title)) if section.title else ""
+        ops = [_compile_item(item, target, layout.label_width) for item in section.items]
+        compiled.append((section, title, ops))
+    return compiled
+
+
+def _render_ops(ops, values: dict, target: Target, width: int) -> str:
+    esc, out = target.escape, []
+    for kind, key, prefix in ops:
+        value = values[key]
+        if kind == 'heading':
+            out.append(target.heading(esc(value)))
+        elif kind == 'table':
+            out.append(target.table(value))
+        elif kind == 'rows':
+            for label, val in value:
+                label = esc(label)
+                out.append(prefix + (label.ljust(width) if target.pad_labels else label) + ": " + esc(val))
+        else:
+            out.append(prefix + esc(value))
+    return "\n".join(out)
+
+
+_section_cache = ResultCache(max_entries=SECTION_CACHE_SIZE, ttl=REPORT_CACHE_TTL)
+_cache_lock = threading.Lock()
+
+
+def render_sections(layout: Layout, ctx: dict, target_name: str, cache_key=None) -> list:
+    """
+    [(title, body)] for every section of `layout`, rendered from `ctx` in
+    `target_name`. With a `cache_key` (e.g. (symbol, bar_id, input digest)) cacheable
+    sections are reused across calls for the same key and layout version,
+    skipping both their prepare step and rendering.
+    """
+    target = TARGETS[target_name]
+    rendered = []
+    for section, title, ops in compile_layout(layout, target_name):
+        key = None
+        if cache_key is not None and section.cache:
+            key = (layout.name, layout.version, target_name, section.key) + tuple(cache_key)
+            with _cache_lock:
+                hit = _section_cache.get(key)
+            if hit is not None:
+                rendered.append(hit)
+                continue
+        body = _render_ops(ops, section.prepare(ctx), target, layout.label_width)
+        if key is not None:
+            with _cache_lock:
+                _section_cache.put(key, (title, body))
+        rendered.append((title, body))
+    return rendered
+
+
+def render(layout: Layout, ctx: dict, target_name: str = 'text', cache_key=None) -> str:
+    """The whole document: sections separated by a blank line."""
+    return "\n\n".join(
+        f"{title}\n{body}" if title else body
+        for title, body in render_sections(layout, ctx, target_name, cache_key)
+    )
@@ -0,0 +1,312 @@
+# templates/report.py
+import json
+import math
+import hashlib
+from datetime import datetime
+
+from services.backtest_engine import get_edge, format_edge
+from templates.engine import Layout, Section, render, render_sections
+
+# Bump whenever the layout or any value formatting changes: it is part of
+# every cached section's key.
+TEMPLATE_VERSION = 3
+
+DISCLAIMER = (
+    "📌 Disclaimer: This analysis is for informational purposes only and "
+    "should not be considered as investment advice. Please consult a qualified "
+    "financial advisor before making any investment decisions. All investments "
+    "involve risk, including the possible loss of principal. Past performance "
+    "is not indicative of future results."
+)
+
+
+def _missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def fmt(value, spec: str = "", prefix: str = "", suffix: str = "", scale: float = 1, div: float = 1) -> str:
+    """`value * scale / div` formatted with `spec`, or 'N/A' when it is missing or not a number."""
+    if _missing(value):
+        return "N/A"
+    if spec:
+        try:
+            value = format(value * scale / div, spec)
+        except (TypeError, ValueError):
+            return "N/A"
+    return f"{prefix}{value}{suffix}"
+
+
+def _text(value) -> str:
+    return "N/A" if _missing(value) or value == "" else str(value)
+
+
+def _cr(value) -> str:
+    return fmt(value, ",.2f", "₹", " Cr", div=1e7)
+
+
+# ── section values ─────────────────────────────────────────────────────
+def _header(ctx):
+    return {
+        'heading': f"📘 {ctx['symbol']} – Technical Snapshot",
+        'date':    f"Date: {datetime.now():%Y-%m-%d}",
+    }
+
+
+def _window(a) -> str:
+    """' over the last N bars' when the analysis could not use the full stored history."""
+    bars = a.get('history_bars')
+    return f" over the last {bars} bars" if bars else ""
+
+
+def _price(ctx):
+    a = ctx['analysis']
+    cmp_price, low52, high52 = a.get('cmp'), a.get('fifty_two_wk_low'), a.get('fifty_two_wk_high')
+    position = "N/A"
+    if isinstance(cmp_price, (int, float)) and low52 and high52 and cmp_price > 0:
+        low_dist  = (cmp_price - low52) / cmp_price * 100
+        high_dist = (high52 - cmp_price) / cmp_price * 100
+        position = (f"{low_dist:.2f}% Far From 52-Week Low"
+                    if low_dist <= high_dist
+                    else f"{high_dist:.2f}% Far From 52-Week High")
+    return {
+        'cmp':      f"₹{_text(cmp_price)}",
+        'range':    f"{_text(low52)} – {_text(high52)}{_window(a)}",
+        'position': position,
+    }
+
+
+def _zone(zone) -> str:
+    zone = zone or []
+    return f"₹{zone[0] if zone else 'N/A'} – ₹{zone[1] if len(zone) > 1 else 'N/A'}"
+
+
+def _trend(ctx):
+    a = ctx['analysis']
+    cmp_price, ema_200 = a.get('cmp'), a.get('ema_200')
+    bullish = isinstance(cmp_price, (int, float)) and not _missing(ema_200) and cmp_price > ema_200
+    return {
+        'trend':            "Strong Bullish" if bullish else "Strong Bearish",
+        'support':          _zone(a.get('support_zone')),
+        'resistance':       _zone(a.get('resistance_zone')),
+        'swing_support':    f"₹{a.get('swing_support') or 'N/A'}",
+        'swing_resistance': f"₹{a.get('swing_resistance') or 'N/A'}",
+    }
+
+
+def _indicators(ctx):
+    a = ctx['analysis']
+    cmp_price = a.get('cmp')
+
+    def ema(key, dist_key, window=""):
+        e, d = a.get(key), a.get(dist_key)
+        if _missing(e) or _missing(d) or _missing(cmp_price):
+            dist = "N/A"
+        else:
+            dist = f"{abs(d):.2f}% {'above' if e > cmp_price else 'below'}"
+        return f"₹{_text(e)}{window} ({dist})"
+
+    return {
+        'rsi':     _text(a.get('rsi')),
+        'ema_21':  ema('ema_21', 'dist21'),
+        'ema_50':  ema('ema_50', 'dist50'),
+        'ema_200': ema('ema_200', 'dist200', _window(a)),
+    }
+
+
+def _fields(*keys):
+    """Section values that are the analysis fields themselves."""
+    return lambda ctx: {k: _text(ctx['analysis'].get(k)) for k in keys}
+
+
+def _breakout(ctx):
+    a, symbol = ctx['analysis'], ctx['symbol']
+    # Historical edge of the setup (services/backtest_engine.py, 20-day horizon)
+    edge = get_edge(symbol)
+    crosses = []
+    for key in ('ema_21_50_cross', 'ema_50_200_cross'):
+        cross = a.get(key, 'None')
+        if cross and cross != 'None':
+            # 'Golden Cross (21x50)' -> golden_21_50
+            kind, pair = cross.split(' ')[0].lower(), cross[cross.find('(') + 1:-1].replace('x', '_')
+            cross_edge = get_edge(symbol, f"{kind}_{pair}")
+            own = cross_edge['symbol'] or {}
+            crosses.append((cross, format_edge(own if own.get('trades') else cross_edge['universe'])))
+    return {
+        'setup': (
+            f"Breakout if Price is greater than ₹{_text(a.get('breakout_level'))} "
+            f"and also Volume is greater than {_text(a.get('breakout_volume'))} Lakh Shares."
+        ),
+        'edge_symbol':   format_edge(edge['symbol']),
+        'edge_universe': format_edge(edge['universe']),
+        'crosses':       crosses,
+    }
+
+
+def _options(ctx):
+    a = ctx['analysis']
+    call_strike, call_oi = a.get('top_call_oi_strike'), a.get('top_call_oi_interest')
+    put_strike, put_oi   = a.get('top_put_oi_strike'), a.get('top_put_oi_interest')
+    max_pain, expiry     = a.get('max_pain_strike'), a.get('option_expiry')
+    return {
+        'call':  f"₹{call_strike} ({call_oi})" if not _missing(call_strike) and not _missing(call_oi) else "N/A",
+        'put':   f"₹{put_strike} ({put_oi})" if not _missing(put_strike) and not _missing(put_oi) else "N/A",
+        'pain':  (f"₹{max_pain}" + (f" (Expiry {expiry})" if expiry else "")) if not _missing(max_pain) else "N/A",
+        'pcr':   _text(a.get('pcr')),
+        'conc':  fmt(a.get('oi_concentration'), suffix="%"),
+    }
+
+
+def _latest_results(earnings) -> str:
+    """Most recent Screener figures ([{'year', 'revenue', 'pat', 'growth'}], in Cr)."""
+    if not isinstance(earnings, list) or not earnings or not isinstance(earnings[0], dict):
+        return "N/A"
+    latest = earnings[0]
+    text = f"Revenue {fmt(latest.get('revenue'), ',.0f', '₹', ' Cr')} · PAT {fmt(latest.get('pat'), ',.0f', '₹', ' Cr')}"
+    if not _missing(latest.get('growth')):
+        text += f" (YoY {fmt(latest['growth'], '.1f', suffix='%')})"
+    return text
+
+
+def _fundamentals(ctx):
+    f = ctx['fund'] or {}
+    return {
+        'results':    _latest_results(ctx['analysis'].get('earnings')),
+        'market_cap': _cr(f.get('market_cap')),
+        'pe_ttm':     fmt(f.get('trailing_pe'), ".2f"),
+        'pe_fwd':     fmt(f.get('forward_pe'), ".2f"),
+        'pb':         fmt(f.get('price_to_book'), ".2f"),
+        'div_yield':  fmt(f.get('dividend_yield'), ".2f", suffix="%", scale=100),
+        'roe':        fmt(f.get('return_on_equity'), ".2f", suffix="%", scale=100),
+        'de':         fmt(f.get('debt_to_equity'), ".2f", div=100),
+        'eps':        fmt(f.get('eps_ttm'), ".2f"),
+    }
+
+
+def _yoy_tag(new, old) -> str:
+    if _missing(new) or _missing(old):
+        return "N/A"
+    change = (new - old) / old * 100 if old else 0
+    return f"🔺{change:.1f}%" if change >= 0 else f"🔻{abs(change):.1f}%"
+
+
+def _trends(ctx):
+    af = ctx['af'] or {}
+    data = sorted(zip(af.get('years', []), af.get('revenue', []), af.get('pat', [])),
+                  key=lambda row: row[0])
+    header = " Year |  Revenue  | YoY Rev% |    PAT    | YoY PAT% "
+    lines = [header, "-" * len(header)]
+    if len(data) >= 4:
+        last4 = data[-4:]
+        for (_, r0, p0), (y1, r1, p1) in zip(last4, last4[1:]):
+            lines.append(
+                f" {y1:<6}|  {fmt(r1, ',.0f', '₹', div=1e7)} |   {_yoy_tag(r1, r0)} |"
+                f"   {fmt(p1, ',.0f', '₹', div=1e7)} |   {_yoy_tag(p1, p0)}"
+            )
+    else:
+        lines.append("  • N/A")
+    return {'table': lines}
+
+
+REPORT_LAYOUT = Layout('stock_report', TEMPLATE_VERSION, [
+    Section('header', None, _header, [('heading', 'heading'), ('text', 'date')], cache=False),
+    Section('price', "I.    Price Summary", _price, [
+        ('row', 'CMP (NSE)', 'cmp'),
+        ('row', '52-Week Range', 'range'),
+        ('row', '52-Week Position', 'position'),
+    ]),
+    Section('trend', "II.   Trend Overview", _trend, [
+        ('row', 'Trend', 'trend'),
+        ('row', 'Support Zone', 'support'),
+        ('row', 'Resistance Zone', 'resistance'),
+        ('row', 'Swing Support', 'swing_support'),
+        ('row', 'Swing Resistance', 'swing_resistance'),
+    ]),
+    Section('indicators', "III.  Indicators", _indicators, [
+        ('row', 'RSI (14)', 'rsi'),
+        ('row', 'EMA 21', 'ema_21'),
+        ('row', 'EMA 50', 'ema_50'),
+        ('row', 'EMA 200', 'ema_200'),
+    ]),
+    Section('price_action', "IV.   Price Action",
+            _fields('daily_pattern', 'daily_structure', 'weekly_pattern', 'weekly_structure'), [
+        ('row', 'Daily Pattern', 'daily_pattern'),
+        ('row', 'Daily Structure', 'daily_structure'),
+        ('row', 'Weekly Pattern', 'weekly_pattern'),
+        ('row', 'Weekly Structure', 'weekly_structure'),
+    ]),
+    Section('volume', "V.    Volume Analysis", lambda ctx: {
+        'today': fmt(ctx['analysis'].get('volume_today'), suffix=" Lakh"),
+        'surge': fmt(ctx['analysis'].get('volume_surge_pct'), suffix="%"),
+        'avg':   fmt(ctx['analysis'].get('volume_avg'), suffix=" Lakh"),
+        'signal': _text(ctx['analysis'].get('volume_signal')),
+    }, [
+        ('row', 'Today’s Volume', 'today'),
+        ('row', 'Surge Over 20 Days', 'surge'),
+        ('row', '50-Day Avg Vol.', 'avg'),
+        ('row', 'Volume Signal', 'signal'),
+    ]),
+    Section('corporate', "VI.   Corporate & Events Calendar",
+            _fields('earnings_date', 'ex_dividend_date', 'shareholding_changes'), [
+        ('row', 'Next Earnings Date', 'earnings_date'),
+        ('row', 'Ex-Dividend Date', 'ex_dividend_date'),
+        ('row', 'Shareholding Changes', 'shareholding_changes'),
+    ]),
+    Section('breakout', "VII.  Breakout Setup", _breakout, [
+        ('bullet', 'setup'),
+        ('row', 'Edge (This Stock)', 'edge_symbol'),
+        ('row', 'Edge (All NSE)', 'edge_universe'),
+        ('rows', 'crosses'),
+    ]),
+    Section('options', "VIII. Option Chain Summary", _options, [
+        ('row', 'Max Call OI Strike', 'call'),
+        ('row', 'Max Put OI Strike', 'put'),
+        ('row', 'Max Pain Strike', 'pain'),
+        ('row', 'Put/Call Ratio', 'pcr'),
+        ('row', 'Top-3 Strike OI Share', 'conc'),
+    ]),
+    Section('fundamentals', "IX.   Fundamental Snapshot", _fundamentals, [
+        ('row', 'Market Cap', 'market_cap'),
+        ('row', 'P/E (TTM)', 'pe_ttm'),
+        ('row', 'P/E (Forward)', 'pe_fwd'),
+        ('row', 'P/B', 'pb'),
+        ('row', 'Dividend Yield', 'div_yield'),
+        ('row', 'ROE', 'roe'),
+        ('row', 'Debt/Equity', 'de'),
+        ('row', 'EPS (TTM)', 'eps'),
+        ('row', 'Latest Results', 'results'),
+    ]),
+    Section('trends', "X.    3-Year Fundamental Trends", _trends, [('table', 'table')]),
+    Section('disclaimer', None, lambda ctx: {'text': DISCLAIMER}, [('text', 'text')]),
+])
+
+
+def _digest(*inputs):
+    """Short checksum of the render inputs, or None if they can't be serialized."""
+    try:
+        blob = json.dumps(inputs, sort_keys=True, default=str)
+    except (TypeError, ValueError):
+        return None
+    return hashlib.blake2b(blob.encode(), digest_size=8).hexdigest()
+
+
+def _context(symbol: str, analysis: dict, fund: dict, af: dict):
+    ctx = {'symbol': symbol.upper(), 'analysis': analysis, 'fund': fund, 'af': af}
+    # Sections change with the bar (which may be an intraday snapshot) and with
+    # the options, fundamentals and earnings folded into the inputs
+    digest = _digest(analysis, fund, af)
+    cache_key = (ctx['symbol'], analysis['bar_id'], digest) if analysis.get('bar_id') and digest else None
+    return ctx, cache_key
+
+
+def render_report(symbol: str, analysis: dict, fund: dict = None, af: dict = None,
+                  target: str = 'text') -> str:
+    """The stock report for one analyze_stock result in `target` (text, markdown, html or pdf)."""
+    ctx, cache_key = _context(symbol, analysis, fund, af)
+    return render(REPORT_LAYOUT, ctx, target, cache_key)
+
+
+def render_report_sections(symbol: str, analysis: dict, fund: dict = None, af: dict = None,
+                           target: str = 'pdf') -> list:
+    """[(title, body)] per report section, for outputs that lay sections out themselves."""
+    ctx, cache_key = _context(symbol, analysis, fund, af)
+    return render_sections(REPORT_LAYOUT, ctx, target, cache_key)
@@ -2,45 +2,126 @@
 
 import os
 import json
+import time
+import argparse
+import threading
+from datetime import date, datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import requests
 from bs4 import BeautifulSoup
 
-SYMBOLS_FILE = os.path.join("symbols", "nse_symbols.json")
-CACHE_PATH = os.path.join("data", "screener_cache.json")
+from config import SCREENER_WORKERS, SCREENER_RATE, SCREENER_TIMEOUT, SCREENER_MAX_MINUTES
+from services.screener_cache import EARNINGS_CACHE
 
-def fetch_earnings(stock_name):
-    url = f"https://www.screener.in/company/{stock_name}/consolidated/"
-    headers = {
-        "User-Agent": "Mozilla/5.0"
-    }
+SYMBOLS_FILE    = os.path.join("symbols", "nse_symbols.json")
+CHECKPOINT_PATH = os.path.join("data", "screener_cache.jsonl")
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0"
+}
+
+_local = threading.local()
+
+
+class RateLimiter:
+    """Spaces request starts at least 1/rate seconds apart across all threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self.next_at  = time.monotonic()
+        self.lock     = threading.Lock()
 
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_at - now
+            self.next_at = max(now, self.next_at) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def _session() -> requests.Session:
+    """One keep-alive session per worker thread."""
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+        _local.session.headers.update(HEADERS)
+    return _local.session
+
+
+def _number(text: str):
     try:
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            return None
+        return float(text.replace("%", ""))
+    except ValueError:
+        return None
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        table = soup.find("table", {"class": "ranges-table"})
 
-        if not table:
+def parse_earnings(html: str):
+    """
+    Latest Sales / Net Profit from a Screener company page, in the
+    EARNINGS_CACHE shape shared with services/screener_fetcher.py:
+    [{'year', 'revenue' (Cr), 'pat' (Cr), 'growth' (%)}], most recent first.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.find("table", {"class": "ranges-table"})
+
+    if not table:
+        return None
+
+    rows = table.find_all("tr")
+    labels = [td.text.strip() for td in rows[0].find_all("td")]
+    data = [td.text.strip().replace(",", "") for td in rows[1].find_all("td")]
+
+    try:
+        rev_index = labels.index("Sales")
+        pat_index = labels.index("Net Profit")
+
+        revenue = _number(data[rev_index])
+        pat = _number(data[pat_index])
+        if revenue is None or pat is None:
             return None
+        growth = _number(data[pat_index + 1]) if pat_index + 1 < len(data) else None
 
-        rows = table.find_all("tr")
-        labels = [td.text.strip() for td in rows[0].find_all("td")]
-        data = [td.text.strip().replace(",", "") for td in rows[1].find_all("td")]
+        return [{"year": "Year-1", "revenue": revenue, "pat": pat, "growth": growth}]
+    except:
+        return None
 
-        try:
-            rev_index = labels.index("Sales")
-            pat_index = labels.index("Net Profit")
 
-            revenue = data[rev_index] + " Cr"
-            pat = data[pat_index] + " Cr"
-            profit_growth = data[pat_index + 1] + "%"
+def fetch_earnings(stock_name, previous=None):
+    """
+    Fetch one Screener page, conditionally if `previous` (the last checkpoint
+    record) carries an ETag / Last-Modified.
 
-            return f"• Revenue: ₹{revenue}\n• PAT: ₹{pat}\n• YoY Profit Growth: {profit_growth}"
-        except:
+    Returns:
+        dict: checkpoint record {symbol, earnings, etag, last_modified, fetched_on},
+        reusing the previous earnings on 304 Not Modified; None on failure.
+    """
+    url = f"https://www.screener.in/company/{stock_name}/consolidated/"
+    headers = {}
+    # Records from before the shared EARNINGS_CACHE format are fetched in full
+    if previous and isinstance(previous.get("earnings"), list):
+        if previous.get("etag"):
+            headers["If-None-Match"] = previous["etag"]
+        if previous.get("last_modified"):
+            headers["If-Modified-Since"] = previous["last_modified"]
+
+    try:
+        response = _session().get(url, headers=headers, timeout=SCREENER_TIMEOUT)
+        if response.status_code == 304:
+            earnings = previous.get("earnings")
+        elif response.status_code == 200:
+            earnings = parse_earnings(response.text)
+        else:
             return None
 
+        return {
+            "symbol": stock_name,
+            "earnings": earnings,
+            "etag": response.headers.get("ETag") or (previous or {}).get("etag"),
+            "last_modified": response.headers.get("Last-Modified") or (previous or {}).get("last_modified"),
+            "fetched_on": date.today().isoformat(),
+        }
+
     except Exception as e:
         print(f"Error fetching {stock_name}: {e}")
         return None
@@ -49,30 +130,105 @@ def load_symbols():
     try:
         with open(SYMBOLS_FILE, "r", encoding="utf-8") as f:
             data = json.load(f)
+            # nse_symbols.json is {symbol: company name}; older files were a list of records
+            if isinstance(data, dict):
+                return [symbol.upper() for symbol in data]
             return [entry["symbol"].upper() for entry in data if "symbol" in entry]
     except Exception as e:
         print(f"⚠️ Failed to load symbols: {e}")
         return []
 
-def update_cache(symbols):
+def load_checkpoint():
+    """Latest checkpoint record per symbol from the append-only JSON lines file."""
+    records = {}
+    if not os.path.exists(CHECKPOINT_PATH):
+        return records
+    with open(CHECKPOINT_PATH, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue  # torn last line after a crash
+            records[rec["symbol"]] = rec
+    return records
+
+def compact(records):
+    """
+    Rewrite the checkpoint with one line per symbol and publish the earnings
+    to EARNINGS_CACHE, the store the bot's reports read from.
+    """
+    tmp = CHECKPOINT_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for rec in records.values():
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    os.replace(tmp, CHECKPOINT_PATH)
+
+    EARNINGS_CACHE.put_many({
+        sym: rec["earnings"] for sym, rec in records.items() if isinstance(rec.get("earnings"), list)
+    })
+
+def update_cache(symbols, workers=SCREENER_WORKERS, rate=SCREENER_RATE,
+                 max_minutes=SCREENER_MAX_MINUTES, resume=True):
+    """
+    Crawl Screener for `symbols` with `workers` threads at no more than
+    `rate` requests/second. Every result is appended to CHECKPOINT_PATH as
+    soon as it arrives, so a crash loses at most the in-flight pages;
+    symbols already fetched today are skipped when `resume` is set. No new
+    fetches start after `max_minutes`.
+    """
     if not os.path.exists("data"):
         os.makedirs("data")
 
-    cache = {}
-    for symbol in symbols:
-        print(f"🔍 Fetching {symbol}...")
-        earnings = fetch_earnings(symbol)
-        if earnings:
-            cache[symbol] = earnings
+    records = load_checkpoint()
+    today = date.today().isoformat()
+    pending = [s for s in symbols
+               if not (resume and records.get(s, {}).get("fetched_on") == today)]
+    print(f"🔍 {len(pending)} symbols to fetch ({len(symbols) - len(pending)} already done today)")
 
-    with open(CACHE_PATH, "w", encoding="utf-8") as f:
-        json.dump(cache, f, indent=2, ensure_ascii=False)
+    limiter  = RateLimiter(rate)
+    deadline = time.monotonic() + max_minutes * 60
+    lock     = threading.Lock()
 
-    print("\n✅ Screener cache updated successfully!")
+    def task(symbol):
+        if time.monotonic() > deadline:
+            return None
+        limiter.wait()
+        return fetch_earnings(symbol, records.get(symbol))
+
+    done = 0
+    with open(CHECKPOINT_PATH, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(task, s): s for s in pending}
+        for fut in as_completed(futures):
+            rec = fut.result()
+            if rec is None:
+                continue
+            with lock:
+                out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                out.flush()
+                records[rec["symbol"]] = rec
+            done += 1
+            if done % 100 == 0:
+                print(f"  … {done}/{len(pending)} fetched ({datetime.now():%H:%M:%S})")
+
+    if time.monotonic() > deadline:
+        print("⏱️ Time budget reached; rerun to resume from the checkpoint.")
+
+    compact(records)
+    print(f"\n✅ Screener cache updated successfully! ({done} fetched)")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the Screener earnings cache.")
+    parser.add_argument("--limit", type=int, default=None, help="only the first N symbols")
+    parser.add_argument("--workers", type=int, default=SCREENER_WORKERS)
+    parser.add_argument("--rate", type=float, default=SCREENER_RATE, help="max requests per second")
+    parser.add_argument("--max-minutes", type=float, default=SCREENER_MAX_MINUTES)
+    parser.add_argument("--fresh", action="store_true", help="ignore today's checkpoint")
+    args = parser.parse_args()
+
     stock_list = load_symbols()
     if not stock_list:
         print("⚠️ No symbols found to fetch.")
     else:
-        update_cache(stock_list[:50])  # Limit to 50 for initial run, or remove [:50] for full
+        update_cache(stock_list[:args.limit], workers=args.workers, rate=args.rate,
+                     max_minutes=args.max_minutes, resume=not args.fresh)
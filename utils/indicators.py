@@ -16,6 +16,9 @@ def calculate_rsi(prices: pd.Series, period: int = 14) -> float:
     latest_rsi = rsi.iloc[-1]
     return round(latest_rsi, 2) if not pd.isna(latest_rsi) else 0.0
 
+def ema_series(prices: pd.Series, period: int) -> pd.Series:
+    return prices.ewm(span=period, adjust=False).mean()
+
 def calculate_ema(prices: pd.Series, period: int) -> float:
-    ema = prices.ewm(span=period, adjust=False).mean()
+    ema = ema_series(prices, period)
     return round(ema.iloc[-1], 2)
@@ -2,14 +2,18 @@
 
 from apscheduler.schedulers.blocking import BlockingScheduler
 from services.screener_fetcher import batch_update_stocks
-
-# List of stocks to auto-refresh weekly
-WATCHLIST = ["INFY", "TCS", "RELIANCE", "HDFCBANK", "ICICIBANK", "LT"]
+from services.watchlist import WatchlistBook
 
 def update_screener_weekly():
-    print("🔄 Weekly Screener Cache Update Started...")
-    batch_update_stocks(WATCHLIST)
-    print("✅ Screener Cache Updated Successfully.")
+    # Refresh every symbol any user is watching, each exactly once. The bot
+    # edits the watchlists in its own process, so re-read them on every run.
+    symbols = WatchlistBook().union()
+    if not symbols:
+        print("ℹ️ No watched symbols, nothing to refresh.")
+        return
+    print(f"🔄 Weekly Screener Cache Update Started for {len(symbols)} symbols...")
+    fresh = batch_update_stocks(symbols)
+    print(f"✅ Screener Cache Updated Successfully ({len(fresh)}/{len(symbols)} refreshed).")
 
 if __name__ == "__main__":
     scheduler = BlockingScheduler()